@@ -0,0 +1,266 @@
+"""
+Compact, budgeted context for AI prompts.
+
+Instead of pasting raw ``/miner-data`` JSON and full history arrays into a
+prompt, ``ContextBuilder`` condenses the fleet into:
+
+* a fleet digest (online count, TH/s, W, W/TH, temps, reject rate),
+* one short row per miner, worst first (offline, hot, rejecting, inefficient),
+* downsampled history series stored as a first value plus rounded deltas,
+* the forecast outlook when one is available.
+
+The result is shrunk step by step (fewer series points, fewer miner rows)
+until it fits ``AI_CONTEXT_BUDGET_BYTES`` and is cached per snapshot
+version, so repeated prompts over unchanged data are free to build.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from claude_client import canonical_json
+
+AI_CONTEXT_BUDGET_BYTES = int(os.getenv("AI_CONTEXT_BUDGET_BYTES", "4000"))
+BYTES_PER_TOKEN = 4  # rough heuristic for English/JSON text
+HOT_TEMP_C = float(os.getenv("AI_TEMP_THRESHOLD", "78"))
+
+# Shrink ladder: (history points, miner rows); None keeps every miner.
+SHRINK_LADDER = (
+    (32, None),
+    (24, 24),
+    (16, 12),
+    (8, 8),
+    (4, 4),
+    (0, 0),
+)
+MINER_COLUMNS = ["name", "state", "th", "w", "wth", "temp", "rej%"]
+CLIENT_LIST_POINTS = 12
+
+
+def _r(value: Any, digits: int = 2) -> Any:
+    if isinstance(value, float):
+        rounded = round(value, digits)
+        return int(rounded) if rounded.is_integer() else rounded
+    return value
+
+
+def downsample(series: List[float], points: int) -> List[float]:
+    """Bucket-mean downsampling to at most ``points`` values (keeps the last value exact)."""
+    if points <= 0:
+        return []
+    if len(series) <= points:
+        return list(series)
+    out = []
+    size = len(series) / points
+    for idx in range(points):
+        bucket = series[int(idx * size):int((idx + 1) * size)] or [series[-1]]
+        out.append(sum(bucket) / len(bucket))
+    out[-1] = series[-1]
+    return out
+
+
+def encode_deltas(series: List[float], digits: int = 2) -> Dict[str, Any]:
+    if not series:
+        return {}
+    rounded = [round(v, digits) for v in series]
+    deltas = [_r(b - a, digits) for a, b in zip(rounded, rounded[1:])]
+    return {"first": _r(rounded[0], digits), "d": deltas}
+
+
+def _miner_state(miner: Dict[str, Any]) -> str:
+    if not miner.get("alive"):
+        return "off"
+    temp = max(float(miner.get("temp", 0) or 0), float(miner.get("chipTemp", 0) or 0))
+    if temp >= HOT_TEMP_C:
+        return "hot"
+    accepted = float(miner.get("sharesAccepted", 0) or 0)
+    rejected = float(miner.get("sharesRejected", 0) or 0)
+    if accepted + rejected and rejected / (accepted + rejected) >= 0.02:
+        return "rej"
+    return "ok"
+
+
+def _miner_row(name: str, miner: Dict[str, Any]) -> List[Any]:
+    accepted = float(miner.get("sharesAccepted", 0) or 0)
+    rejected = float(miner.get("sharesRejected", 0) or 0)
+    total = accepted + rejected
+    return [
+        name,
+        _miner_state(miner),
+        _r(float(miner.get("hashrate_1m", 0) or 0), 3),
+        _r(float(miner.get("power", 0) or 0), 1),
+        _r(float(miner.get("efficiency", 0) or 0), 1),
+        _r(float(miner.get("temp", 0) or 0), 1),
+        _r(rejected / total * 100, 2) if total else 0,
+    ]
+
+
+_STATE_RANK = {"off": 0, "hot": 1, "rej": 2, "ok": 3}
+
+
+def miner_digests(stats: Dict[str, Dict[str, Any]]) -> List[List[Any]]:
+    rows = [_miner_row(name, miner) for name, miner in stats.items()]
+    # Worst first so truncation keeps the rigs worth talking about.
+    rows.sort(key=lambda r: (_STATE_RANK.get(r[1], 9), -(r[4] or 0), r[0]))
+    return rows
+
+
+def fleet_digest(stats: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    miners = list(stats.values())
+    online = [m for m in miners if m.get("alive")]
+    total_hash = sum(float(m.get("hashrate_1m", 0) or 0) for m in online)
+    total_power = sum(float(m.get("power", 0) or 0) for m in online)
+    temps = [float(m.get("temp", 0) or 0) for m in online if m.get("temp")]
+    accepted = sum(float(m.get("sharesAccepted", 0) or 0) for m in online)
+    rejected = sum(float(m.get("sharesRejected", 0) or 0) for m in online)
+    return {
+        "miners": len(miners),
+        "online": len(online),
+        "th": _r(total_hash, 3),
+        "w": _r(total_power, 1),
+        "wth": _r(total_power / total_hash, 1) if total_hash else None,
+        "temp_avg": _r(sum(temps) / len(temps), 1) if temps else None,
+        "temp_max": _r(max(temps), 1) if temps else None,
+        "rej%": _r(rejected / (accepted + rejected) * 100, 2) if accepted + rejected else 0,
+    }
+
+
+def history_digest(summary: Optional[Dict[str, Any]], points: int) -> Dict[str, Any]:
+    if not summary or not summary.get("samples"):
+        return {}
+    timestamps = summary.get("timestamps") or []
+    digest: Dict[str, Any] = {
+        "samples": summary.get("samples"),
+        "from": timestamps[0] if timestamps else None,
+        "to": summary.get("latest_timestamp"),
+        "avg_th": _r(float(summary.get("fleet_avg_hash", 0) or 0), 3),
+        "trend": summary.get("fleet_hash_trend"),
+    }
+    if points:
+        digest["th"] = encode_deltas(downsample(summary.get("total_hash_series") or [], points), 3)
+        digest["temp"] = encode_deltas(downsample(summary.get("avg_temp_series") or [], points), 1)
+    hottest = summary.get("hottest")
+    if hottest:
+        digest["hottest"] = [hottest.get("name"), _r(float(hottest.get("temp", 0) or 0), 1)]
+    forecast = summary.get("forecast") or {}
+    outlook = {}
+    for metric, fc in forecast.items():
+        if fc and fc.get("points"):
+            last = fc["points"][-1]
+            outlook[metric] = {
+                "steps": last["step"],
+                "value": _r(last["value"], 2),
+                "band": [_r(last["lower"], 2), _r(last["upper"], 2)],
+                "trend": fc.get("trend"),
+            }
+    if outlook:
+        digest["outlook"] = outlook
+    return digest
+
+
+def compact_client_data(value: Any, depth: int = 0) -> Any:
+    """Round floats, shorten long lists and cap nesting of browser-posted data."""
+    if depth > 3:
+        return None
+    if isinstance(value, dict):
+        return {str(k): compact_client_data(v, depth + 1) for k, v in list(value.items())[:40]}
+    if isinstance(value, list):
+        if value and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+            return [_r(float(v), 3) for v in downsample([float(v) for v in value], CLIENT_LIST_POINTS)]
+        return [compact_client_data(v, depth + 1) for v in value[:CLIENT_LIST_POINTS]]
+    if isinstance(value, float):
+        return _r(value, 3)
+    if isinstance(value, str):
+        return value[:200]
+    return value
+
+
+def latest_snapshot(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-miner rows from the newest logged timestamp, shaped like /miner-data."""
+    if not rows:
+        return {}
+    latest = rows[-1].get("timestamp")
+    return {row["name"]: row for row in rows if row.get("timestamp") == latest and row.get("name")}
+
+
+class ContextBuilder:
+    def __init__(self, budget_bytes: int = AI_CONTEXT_BUDGET_BYTES, cache_size: int = 16):
+        self.budget_bytes = budget_bytes
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_size = cache_size
+
+    @staticmethod
+    def snapshot_version(
+        stats: Dict[str, Dict[str, Any]],
+        summary: Optional[Dict[str, Any]],
+        extra: Any = None,
+        source: Any = None,
+    ) -> str:
+        """
+        Cache key for a context. ``source`` is a cheap change marker for
+        ``stats`` and ``summary`` (e.g. the fleet snapshot and history log
+        versions); only without one is the full fleet hashed.
+        """
+        if source is not None:
+            marker = [source, extra]
+        else:
+            summary = summary or {}
+            marker = [stats, summary.get("latest_timestamp"), summary.get("samples"), extra]
+        return hashlib.sha1(canonical_json(marker).encode("utf-8")).hexdigest()
+
+    def build(
+        self,
+        stats: Dict[str, Dict[str, Any]],
+        summary: Optional[Dict[str, Any]] = None,
+        extra: Any = None,
+        source: Any = None,
+    ) -> Dict[str, Any]:
+        """Return ``{"text", "data", "bytes", "approx_tokens", "version"}`` within budget."""
+        version = self.snapshot_version(stats, summary, extra, source)
+        cached = self._cache.get(version)
+        if cached is not None:
+            self._cache.move_to_end(version)
+            return cached
+
+        fleet = fleet_digest(stats)
+        miners = miner_digests(stats)
+        client = compact_client_data(extra) if extra is not None else None
+        data: Dict[str, Any] = {}
+        text = ""
+        for points, miner_limit in SHRINK_LADDER:
+            shown = miners if miner_limit is None else miners[:miner_limit]
+            data = {"fleet": fleet}
+            if shown:
+                data["cols"] = MINER_COLUMNS
+                data["miners"] = shown
+            if len(shown) < len(miners):
+                data["miners_omitted"] = len(miners) - len(shown)
+            history = history_digest(summary, points)
+            if history:
+                data["hist"] = history
+            if client is not None:
+                data["client"] = client
+            text = canonical_json(data)
+            if len(text.encode("utf-8")) <= self.budget_bytes:
+                break
+        else:
+            # Still over budget at the smallest level: drop the browser payload.
+            # What remains is the fleet digest and history headline (a few
+            # hundred bytes), which is kept intact rather than truncated.
+            data.pop("client", None)
+            text = canonical_json(data)
+
+        size = len(text.encode("utf-8"))
+        result = {
+            "text": text,
+            "data": data,
+            "bytes": size,
+            "approx_tokens": size // BYTES_PER_TOKEN,
+            "version": version,
+        }
+        self._cache[version] = result
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return result
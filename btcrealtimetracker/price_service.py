@@ -0,0 +1,185 @@
+"""
+Shared BTC spot price service for the ``/btc-price`` and ``/btc-price-24h``
+routers.
+
+All sources are queried at once, each under its own timeout, and a tick is
+produced as soon as ``quorum`` of them answer (the stragglers are
+cancelled). Ticks are cached for ``ttl`` seconds and concurrent requests
+share one in-flight fetch, so every open tab polling the orb costs at most
+one upstream round per TTL, and latency is the fastest quorum instead of
+the sum of sequential calls. If no source answers, the last tick is served
+marked ``stale``.
+
+Every fresh tick is also appended to ``PriceHistory``, a bounded in-memory
+ring buffer that the profitability engine reads prices from.
+
+Source URLs can be overridden (``COINGECKO_PRICE_URL``, ``BINANCE_PRICE_URL``,
+``BITSTAMP_PRICE_URL``) to point at local stand-ins.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import os
+from collections import deque
+from time import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger("btc_price")
+
+BTC_PRICE_TTL = float(os.getenv("BTC_PRICE_TTL", "10"))
+BTC_PRICE_QUORUM = int(os.getenv("BTC_PRICE_QUORUM", "2"))
+BTC_PRICE_SOURCE_TIMEOUT = float(os.getenv("BTC_PRICE_SOURCE_TIMEOUT", "3"))
+BTC_PRICE_HISTORY = int(os.getenv("BTC_PRICE_HISTORY", "2880"))  # ~8h of 10s ticks
+
+Parser = Callable[[Any], Tuple[float, Optional[float]]]
+
+
+def _bitstamp(j: Dict[str, Any]) -> Tuple[float, Optional[float]]:
+    last, open_ = float(j["last"]), float(j["open"])
+    return last, ((last - open_) / open_ * 100 if open_ else None)
+
+
+DEFAULT_SOURCES: List[Tuple[str, str, Parser]] = [
+    (
+        "coingecko",
+        os.getenv(
+            "COINGECKO_PRICE_URL",
+            "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd&include_24hr_change=true",
+        ),
+        lambda j: (float(j["bitcoin"]["usd"]), j["bitcoin"].get("usd_24h_change")),
+    ),
+    (
+        "binance",
+        os.getenv("BINANCE_PRICE_URL", "https://api.binance.com/api/v3/ticker/24hr?symbol=BTCUSDT"),
+        lambda j: (float(j["lastPrice"]), float(j["priceChangePercent"])),
+    ),
+    (
+        "bitstamp",
+        os.getenv("BITSTAMP_PRICE_URL", "https://www.bitstamp.net/api/v2/ticker/btcusd/"),
+        _bitstamp,
+    ),
+]
+
+
+class PriceHistory:
+    """Bounded (epoch seconds, USD) ring buffer; timestamps are kept ascending."""
+
+    def __init__(self, maxlen: int = BTC_PRICE_HISTORY):
+        self._ts: deque = deque(maxlen=maxlen)
+        self._prices: deque = deque(maxlen=maxlen)
+
+    def record(self, price: float, ts: Optional[float] = None) -> None:
+        ts = time() if ts is None else ts
+        if self._ts and ts <= self._ts[-1]:
+            return
+        self._ts.append(ts)
+        self._prices.append(float(price))
+
+    def price_at(self, ts: float) -> Optional[float]:
+        """Last price at or before ``ts`` (the oldest one for earlier times)."""
+        if not self._ts:
+            return None
+        idx = bisect.bisect_right(self._ts, ts) - 1
+        return self._prices[max(idx, 0)]
+
+    def latest(self) -> Optional[float]:
+        return self._prices[-1] if self._prices else None
+
+    def points(self, limit: Optional[int] = None) -> List[Tuple[float, float]]:
+        pairs = list(zip(self._ts, self._prices))
+        return pairs[-limit:] if limit else pairs
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+
+class PriceService:
+    def __init__(
+        self,
+        sources: Optional[List[Tuple[str, str, Parser]]] = None,
+        ttl: float = BTC_PRICE_TTL,
+        quorum: int = BTC_PRICE_QUORUM,
+        source_timeout: float = BTC_PRICE_SOURCE_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.sources = sources or DEFAULT_SOURCES
+        self.ttl = ttl
+        self.quorum = max(1, min(quorum, len(self.sources)))
+        self.source_timeout = source_timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tick: Optional[Dict[str, Any]] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self.history = PriceHistory()
+        self.counters = {"hits": 0, "fetches": 0, "source_errors": 0}
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.source_timeout,
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=len(self.sources)),
+            )
+        return self._client
+
+    async def _query(self, name: str, url: str, parser: Parser) -> Tuple[str, float, Optional[float]]:
+        resp = await asyncio.wait_for(self._http().get(url), self.source_timeout)
+        resp.raise_for_status()
+        price, change = parser(resp.json())
+        return name, float(price), (float(change) if change is not None else None)
+
+    async def _fetch(self) -> Dict[str, Any]:
+        self.counters["fetches"] += 1
+        tasks = [asyncio.ensure_future(self._query(*source)) for source in self.sources]
+        answers: List[Tuple[str, float, Optional[float]]] = []
+        try:
+            for done in asyncio.as_completed(tasks):
+                try:
+                    answers.append(await done)
+                except Exception as exc:
+                    self.counters["source_errors"] += 1
+                    logger.debug("BTC price source failed: %s", exc)
+                    continue
+                if len(answers) >= self.quorum:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+        if not answers:
+            if self._tick is not None:
+                return {**self._tick, "stale": True}
+            return {"success": False, "error": "No price data"}
+        prices = [price for _, price, _ in answers]
+        changes = [change for _, _, change in answers if change is not None]
+        tick = {
+            "success": True,
+            "price": sum(prices) / len(prices),
+            "change_24h": sum(changes) / len(changes) if changes else None,
+            "sources": len(answers),
+            "source_names": [name for name, _, _ in answers],
+            "fetched_at": time(),
+        }
+        self._tick = tick
+        self.history.record(tick["price"], tick["fetched_at"])
+        return tick
+
+    async def tick(self) -> Dict[str, Any]:
+        """Latest cached tick, fetching one (shared by concurrent callers) when expired."""
+        if self._tick is not None and time() - self._tick["fetched_at"] < self.ttl:
+            self.counters["hits"] += 1
+            return self._tick
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._fetch())
+        return await asyncio.shield(self._inflight)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+PRICE_SERVICE = PriceService()
@@ -0,0 +1,238 @@
+"""
+Shared Anthropic Messages API client for the analytics widgets.
+
+One pooled ``httpx.AsyncClient`` is reused across requests, responses are
+cached by a hash of the canonicalized request body (TTL + LRU), and
+identical requests that arrive while one is already in flight share that
+single upstream call instead of each paying the API latency.
+
+``stream_text`` consumes the Messages SSE stream and yields text deltas as
+they arrive; ``InsightStreamParser`` turns that text into insight objects
+as soon as each one closes, so callers can forward them incrementally.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger("claude_client")
+
+CLAUDE_CACHE_TTL = float(os.getenv("CLAUDE_CACHE_TTL", "300"))
+CLAUDE_CACHE_SIZE = int(os.getenv("CLAUDE_CACHE_SIZE", "64"))
+CLAUDE_TIMEOUT = float(os.getenv("CLAUDE_TIMEOUT", "20"))
+
+
+def canonical_json(value: Any) -> str:
+    """Stable, compact JSON: sorted keys and no whitespace."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def request_key(url: str, body: Dict[str, Any]) -> str:
+    digest = hashlib.sha256()
+    digest.update(url.encode("utf-8"))
+    digest.update(b"\n")
+    digest.update(canonical_json(body).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TTLCache:
+    """Small LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ClaudeClient:
+    def __init__(
+        self,
+        ttl: float = CLAUDE_CACHE_TTL,
+        max_entries: int = CLAUDE_CACHE_SIZE,
+        timeout: float = CLAUDE_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.cache = TTLCache(ttl, max_entries)
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            )
+        return self._client
+
+    async def _post(self, key: str, url: str, headers: Dict[str, str], body: Dict[str, Any]) -> Dict[str, Any]:
+        resp = await self._http().post(url, headers=headers, content=canonical_json(body).encode("utf-8"))
+        resp.raise_for_status()
+        payload = resp.json()
+        self.cache.set(key, payload)
+        return payload
+
+    async def create_message(self, url: str, headers: Dict[str, str], body: Dict[str, Any]) -> Dict[str, Any]:
+        """POST ``body`` to the Messages endpoint, served from cache when possible."""
+        key = request_key(url, body)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.counters["hits"] += 1
+            return cached
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            self.counters["misses"] += 1
+            task = asyncio.ensure_future(self._post(key, url, headers, body))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        # Shield so one caller disconnecting does not cancel the shared call.
+        return await asyncio.shield(task)
+
+    async def stream_text(self, url: str, headers: Dict[str, str], body: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Yield response text incrementally. A cached non-streaming response for
+        the same body is replayed at once; a completed stream is cached in
+        the regular message format so later plain requests hit it too.
+        """
+        key = request_key(url, body)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.counters["hits"] += 1
+            yield message_text(cached)
+            return
+        self.counters["misses"] += 1
+        parts: List[str] = []
+        stream_body = {**body, "stream": True}
+        async with self._http().stream(
+            "POST", url, headers=headers, content=canonical_json(stream_body).encode("utf-8")
+        ) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if not data or data == "[DONE]":
+                    continue
+                try:
+                    event = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                if event.get("type") == "error":
+                    raise RuntimeError(event.get("error", {}).get("message") or "stream error")
+                delta = event.get("delta") or {}
+                if event.get("type") == "content_block_delta" and delta.get("type") == "text_delta":
+                    text = delta.get("text") or ""
+                    if text:
+                        parts.append(text)
+                        yield text
+        self.cache.set(key, {"content": [{"type": "text", "text": "".join(parts)}]})
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "cached": len(self.cache), "inflight": len(self._inflight)}
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def message_text(payload: Dict[str, Any]) -> str:
+    """First text block of a Messages API response."""
+    content = payload.get("content") or []
+    if content and isinstance(content, list):
+        chunk = content[0]
+        if isinstance(chunk, dict):
+            return chunk.get("text") or ""
+        if isinstance(chunk, str):
+            return chunk
+    return ""
+
+
+class InsightStreamParser:
+    """
+    Incrementally extract complete objects from a streamed JSON array.
+
+    Text is fed in arbitrary chunks (markdown fences and prose around the
+    array are ignored); ``feed`` returns every object that closed within
+    the new text.
+    """
+
+    def __init__(self) -> None:
+        self._buffer: List[str] = []
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        found: List[Dict[str, Any]] = []
+        for char in text:
+            if not self._in_array:
+                self._in_array = char == "["
+                continue
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                elif char == "]":
+                    self._in_array = False
+                continue
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj = json.loads("".join(self._buffer))
+                    except json.JSONDecodeError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        found.append(obj)
+                    self._buffer = []
+        return found
@@ -1,13 +1,21 @@
 import asyncio
+import base64
 import csv
+import io
+import os
+import struct
 from collections import deque
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
 DATA_DIR = Path('data_logs')
 DATA_FILE = DATA_DIR / 'miner_metrics.csv'
-FIELDNAMES = [
+POOL_FILE = DATA_DIR / 'pool_metrics.csv'
+
+# Schema versions are identified by the CSV header, so logs written by older
+# builds stay readable and are upgraded in place on the next write.
+FIELDNAMES_V1 = [
     'timestamp',
     'name',
     'hashrate_1m',
@@ -20,39 +28,187 @@ FIELDNAMES = [
     'sharesRejected',
     'alive'
 ]
+FIELDNAMES_V2 = FIELDNAMES_V1 + [
+    'frequency',
+    'voltage',
+    'fanrpm',
+    'asicTemps',
+    'wifiRSSI',
+    'bestDiff',
+    'poolDifficulty'
+]
+SCHEMAS = {1: FIELDNAMES_V1, 2: FIELDNAMES_V2}
+# Pool-credited hashrate per mapped worker, logged next to the miner metrics.
+POOL_FIELDNAMES = ['timestamp', 'name', 'worker', 'pool_hashrate', 'status']
+SCHEMA_VERSION = 2
+FIELDNAMES = SCHEMAS[SCHEMA_VERSION]
 
 _lock = asyncio.Lock()
+_schema_checked = False
+
+
+def detect_schema_version(header: Sequence[str]) -> Optional[int]:
+    for version, fields in SCHEMAS.items():
+        if list(header) == fields:
+            return version
+    return None
+
+
+def pack_asic_temps(temps: Any) -> str:
+    """Pack per-ASIC temps as little-endian int16 deci-degrees, base64 without padding."""
+    if not temps:
+        return ''
+    values = []
+    for temp in temps:
+        try:
+            values.append(max(-32768, min(32767, round(float(temp) * 10))))
+        except (TypeError, ValueError):
+            values.append(0)
+    raw = struct.pack(f'<{len(values)}h', *values)
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def unpack_asic_temps(packed: Any) -> List[float]:
+    if not packed:
+        return []
+    text = str(packed)
+    try:
+        raw = base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+        count = len(raw) // 2
+        return [value / 10 for value in struct.unpack(f'<{count}h', raw[:count * 2])]
+    except (ValueError, struct.error):
+        return []
+
+
+def _compact(value: Any, digits: int = 5) -> Any:
+    """Render numbers tersely; zeros become empty cells (readers treat '' as 0)."""
+    if isinstance(value, bool):
+        return 1 if value else ''
+    if isinstance(value, (int, float)):
+        if not value:
+            return ''
+        number = round(value, digits)
+        return int(number) if float(number).is_integer() else number
+    return value if value not in (None, 0) else ''
+
+
+def _number_or_text(value: Any) -> Any:
+    """bestDiff is a number on some firmware and a suffixed string ('4.29G') on AxeOS."""
+    if value in (None, ''):
+        return 0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def encode_row(timestamp: str, name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'timestamp': timestamp,
+        'name': name,
+        'hashrate_1m': _compact(payload.get('hashrate_1m', 0)),
+        'hashrate_24h': _compact(payload.get('hashrate_24h', 0)),
+        'power': _compact(payload.get('power', 0)),
+        'efficiency': _compact(payload.get('efficiency', 0)),
+        'temp': _compact(payload.get('temp', 0)),
+        'chipTemp': _compact(payload.get('chipTemp', 0)),
+        'sharesAccepted': _compact(payload.get('sharesAccepted', 0)),
+        'sharesRejected': _compact(payload.get('sharesRejected', 0)),
+        'alive': _compact(bool(payload.get('alive', False))),
+        'frequency': _compact(payload.get('frequency', 0), 1),
+        'voltage': _compact(payload.get('voltage', 0), 1),
+        'fanrpm': _compact(payload.get('fanrpm', 0), 0),
+        'asicTemps': pack_asic_temps(payload.get('asicTemps')),
+        'wifiRSSI': _compact(payload.get('wifiRSSI', 0), 0),
+        'bestDiff': _compact(payload.get('bestDiff', 0)),
+        'poolDifficulty': _compact(payload.get('poolDifficulty', 0)),
+    }
+
 
-def _write_rows(miner_stats: Dict[str, Dict[str, Any]]):
+def _upgrade_log_schema():
+    """Rewrite an older-schema log with the current header (new columns blank)."""
+    global _schema_checked
+    if _schema_checked or not DATA_FILE.exists():
+        _schema_checked = True
+        return
+    with DATA_FILE.open('r', newline='') as csvfile:
+        header = next(csv.reader(csvfile), [])
+    if not header or header == FIELDNAMES:
+        _schema_checked = True
+        return
+    tmp_file = DATA_FILE.with_suffix('.csv.tmp')
+    with DATA_FILE.open('r', newline='') as src, tmp_file.open('w', newline='') as dst:
+        writer = csv.DictWriter(dst, FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        for row in csv.DictReader(src):
+            writer.writerow(row)
+    os.replace(tmp_file, DATA_FILE)
+    _schema_checked = True
+
+
+def _write_rows(miner_stats: Dict[str, Dict[str, Any]], timestamp: Optional[str] = None):
     DATA_DIR.mkdir(exist_ok=True)
+    _upgrade_log_schema()
     file_exists = DATA_FILE.exists()
-    timestamp = datetime.now(timezone.utc).isoformat()
-    rows = []
-    for name, payload in miner_stats.items():
-        rows.append({
-            'timestamp': timestamp,
-            'name': name,
-            'hashrate_1m': round(payload.get('hashrate_1m', 0), 5),
-            'hashrate_24h': round(payload.get('hashrate_24h', 0), 5),
-            'power': payload.get('power', 0),
-            'efficiency': round(payload.get('efficiency', 0), 5),
-            'temp': payload.get('temp', 0),
-            'chipTemp': payload.get('chipTemp', 0),
-            'sharesAccepted': payload.get('sharesAccepted', 0),
-            'sharesRejected': payload.get('sharesRejected', 0),
-            'alive': bool(payload.get('alive', False))
-        })
+    timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+    rows = [encode_row(timestamp, name, payload) for name, payload in miner_stats.items()]
     with DATA_FILE.open('a', newline='') as csvfile:
         writer = csv.DictWriter(csvfile, FIELDNAMES)
         if not file_exists:
             writer.writeheader()
         writer.writerows(rows)
 
-async def log_miner_metrics(miner_stats: Dict[str, Dict[str, Any]]):
+async def log_miner_metrics(miner_stats: Dict[str, Dict[str, Any]], timestamp: Optional[str] = None):
+    """Append one row per miner, stamped now or with the sample's own ``timestamp``."""
     if not miner_stats:
         return
     async with _lock:
-        await asyncio.to_thread(_write_rows, miner_stats)
+        await asyncio.to_thread(_write_rows, miner_stats, timestamp)
+
+
+def _write_pool_rows(pool_miners: Dict[str, Dict[str, Any]], timestamp: str):
+    DATA_DIR.mkdir(exist_ok=True)
+    file_exists = POOL_FILE.exists()
+    rows = [
+        {
+            'timestamp': timestamp,
+            'name': name,
+            'worker': payload.get('pool_name', ''),
+            'pool_hashrate': _compact(payload.get('hashrate', 0)),
+            'status': payload.get('status', ''),
+        }
+        for name, payload in pool_miners.items()
+    ]
+    with POOL_FILE.open('a', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, POOL_FIELDNAMES)
+        if not file_exists:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+async def log_pool_metrics(pool_miners: Dict[str, Dict[str, Any]], timestamp: Optional[str] = None):
+    """Append pool-side hashrate (TH/s) keyed by local miner name."""
+    if not pool_miners:
+        return
+    timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+    async with _lock:
+        await asyncio.to_thread(_write_pool_rows, pool_miners, timestamp)
+
+
+def load_recent_pool_metrics(limit: int = 288) -> List[Dict[str, Any]]:
+    if limit <= 0 or not POOL_FILE.exists():
+        return []
+    buffer: deque = deque(maxlen=limit)
+    with POOL_FILE.open('r', newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            buffer.append({
+                'timestamp': row.get('timestamp'),
+                'name': row.get('name'),
+                'worker': row.get('worker'),
+                'pool_hashrate': float(row.get('pool_hashrate', 0) or 0),
+                'status': row.get('status'),
+            })
+    return list(buffer)
 
 
 def _cast_row(row: Dict[str, Any]) -> Dict[str, Any]:
@@ -65,9 +221,16 @@ def _cast_row(row: Dict[str, Any]) -> Dict[str, Any]:
         'efficiency': float(row.get('efficiency', 0) or 0),
         'temp': float(row.get('temp', 0) or 0),
         'chipTemp': float(row.get('chipTemp', 0) or 0),
-        'sharesAccepted': int(row.get('sharesAccepted', 0) or 0),
-        'sharesRejected': int(row.get('sharesRejected', 0) or 0),
-        'alive': str(row.get('alive', '')).lower() in {'true', '1', 'yes'}
+        'sharesAccepted': int(float(row.get('sharesAccepted', 0) or 0)),
+        'sharesRejected': int(float(row.get('sharesRejected', 0) or 0)),
+        'alive': str(row.get('alive', '')).lower() in {'true', '1', 'yes'},
+        'frequency': float(row.get('frequency', 0) or 0),
+        'voltage': float(row.get('voltage', 0) or 0),
+        'fanrpm': float(row.get('fanrpm', 0) or 0),
+        'asicTemps': unpack_asic_temps(row.get('asicTemps')),
+        'wifiRSSI': float(row.get('wifiRSSI', 0) or 0),
+        'bestDiff': _number_or_text(row.get('bestDiff')),
+        'poolDifficulty': float(row.get('poolDifficulty', 0) or 0),
     }
 
 
@@ -84,3 +247,158 @@ def load_recent_metrics(limit: int = 288) -> List[Dict[str, Any]]:
         for row in reader:
             buffer.append(_cast_row(row))
     return list(buffer)
+
+
+def read_metrics_after(
+    cursor: Optional[Tuple[int, int]] = None,
+    max_bytes: int = 4 * 1024 * 1024,
+) -> Tuple[List[Dict[str, Any]], Tuple[int, int]]:
+    """
+    Rows appended to the metric log since ``cursor`` plus the cursor to
+    resume from. The cursor is ``(inode, byte offset)``; a replaced (schema
+    upgrade) or truncated log is read again from the start. Only complete
+    lines are consumed, so a row being appended is picked up next time.
+    At most ``max_bytes`` are read per call.
+    """
+    try:
+        handle = DATA_FILE.open('rb')
+    except FileNotFoundError:
+        return [], (0, 0)
+    with handle:
+        stat = os.fstat(handle.fileno())
+        offset = cursor[1] if cursor and cursor[0] == stat.st_ino and cursor[1] <= stat.st_size else 0
+        header = handle.readline()
+        offset = max(offset, len(header))
+        handle.seek(offset)
+        chunk = handle.read(max_bytes)
+    end = chunk.rfind(b'\n') + 1
+    if not header.endswith(b'\n') or not end:
+        return [], (stat.st_ino, offset)
+    text = (header + chunk[:end]).decode('utf-8', 'replace')
+    rows = [_cast_row(row) for row in csv.DictReader(io.StringIO(text, newline=''))]
+    return rows, (stat.st_ino, offset + end)
+
+
+def history_version(path: Path = DATA_FILE) -> Tuple[int, int]:
+    """Cheap change marker for a metric log: (mtime_ns, size)."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return (0, 0)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def last_logged_timestamp(path: Optional[Path] = None) -> Optional[str]:
+    """Timestamp of the final row in a metric log, read from the file's tail."""
+    path = path or DATA_FILE
+    try:
+        with path.open('rb') as handle:
+            handle.seek(0, os.SEEK_END)
+            handle.seek(max(handle.tell() - 8192, 0))
+            lines = handle.read().splitlines()
+    except FileNotFoundError:
+        return None
+    for line in reversed(lines):
+        first = line.split(b',', 1)[0].decode('utf-8', 'replace').strip()
+        if _parse_timestamp(first) is not None:
+            return first
+    return None
+
+
+class SnapshotRecorder:
+    """
+    Writes fleet snapshots that arrive from elsewhere (the cloud-mode Gist
+    relay or ``/ingest``) into the metric log under their source
+    ``last_updated`` time. A snapshot not newer than the last one recorded
+    is skipped, so re-fetching an unchanged Gist or receiving a retried
+    batch adds no rows. The log's last timestamp seeds the check after a
+    restart.
+    """
+
+    def __init__(self):
+        self._last: Optional[datetime] = None
+        self._seeded = False
+        self._guard = asyncio.Lock()
+        self.counters = {'recorded': 0, 'duplicates': 0, 'invalid': 0}
+
+    def reseed(self) -> None:
+        """Re-read the log's last timestamp before the next record (another process may have written)."""
+        self._seeded = False
+
+    async def record(self, snapshot: Optional[Dict[str, Any]]) -> bool:
+        if not snapshot:
+            return False
+        stamp = _parse_timestamp(snapshot.get('last_updated'))
+        miners = snapshot.get('miners')
+        if stamp is None or not isinstance(miners, dict) or not miners:
+            self.counters['invalid'] += 1
+            return False
+        async with self._guard:
+            if not self._seeded:
+                self._last = _parse_timestamp(await asyncio.to_thread(last_logged_timestamp))
+                self._seeded = True
+            if self._last is not None and stamp <= self._last:
+                self.counters['duplicates'] += 1
+                return False
+            await log_miner_metrics(miners, stamp.astimezone(timezone.utc).isoformat())
+            self._last = stamp
+            self.counters['recorded'] += 1
+            return True
+
+    async def record_many(self, snapshots: List[Dict[str, Any]]) -> int:
+        """Record snapshots oldest first; returns how many produced rows."""
+        ordered = sorted(
+            snapshots,
+            key=lambda s: _parse_timestamp(s.get('last_updated')) or datetime.min.replace(tzinfo=timezone.utc),
+        )
+        recorded = 0
+        for snapshot in ordered:
+            recorded += await self.record(snapshot)
+        return recorded
+
+
+def measure_storage_overhead(miner_stats: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Encode one snapshot under each schema and report CSV bytes per sample
+    (one miner row) so the cost of the extended columns is visible.
+    """
+    timestamp = datetime.now(timezone.utc).isoformat()
+    results: Dict[str, Dict[str, float]] = {}
+    for version, fields in SCHEMAS.items():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fields, extrasaction='ignore')
+        for name, payload in miner_stats.items():
+            if version == 1:
+                # v1 wrote plain rounded values without compaction.
+                row = {
+                    'timestamp': timestamp,
+                    'name': name,
+                    'hashrate_1m': round(payload.get('hashrate_1m', 0), 5),
+                    'hashrate_24h': round(payload.get('hashrate_24h', 0), 5),
+                    'power': payload.get('power', 0),
+                    'efficiency': round(payload.get('efficiency', 0), 5),
+                    'temp': payload.get('temp', 0),
+                    'chipTemp': payload.get('chipTemp', 0),
+                    'sharesAccepted': payload.get('sharesAccepted', 0),
+                    'sharesRejected': payload.get('sharesRejected', 0),
+                    'alive': bool(payload.get('alive', False)),
+                }
+            else:
+                row = encode_row(timestamp, name, payload)
+            writer.writerow(row)
+        size = len(buffer.getvalue().encode('utf-8'))
+        count = max(len(miner_stats), 1)
+        results[f'v{version}'] = {
+            'bytes_total': size,
+            'bytes_per_sample': size / count,
+            'columns': len(fields),
+        }
+    return results
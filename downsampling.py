@@ -0,0 +1,138 @@
+"""
+Server-side decimation for history charts.
+
+``/historical-metrics?points=N`` reduces each fleet series (total hashrate,
+average temperature, total power) with Largest-Triangle-Three-Buckets or
+min/max bucketing, then keeps the union of the timestamps chosen for every
+series. Per-miner rows are returned only for those timestamps, so a chart
+payload holds at most ``N`` timestamps however long the requested range is.
+
+The repo carries no numeric dependencies, so the bucket scans are plain
+single-pass loops over prebuilt lists rather than numpy kernels; LTTB is
+O(n) in the number of timestamps.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence, Tuple
+
+DECIMATION_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(values: Sequence[float], points: int) -> List[int]:
+    """
+    Indices kept by Largest-Triangle-Three-Buckets (x is the sample index).
+
+    The first and last samples are always kept; each interior bucket
+    contributes the sample forming the largest triangle with the previous
+    pick and the mean of the next bucket.
+    """
+    n = len(values)
+    if points >= n or n <= 2:
+        return list(range(n))
+    if points < 3:
+        return [0, n - 1][:max(points, 0)]
+    picked = [0]
+    every = (n - 2) / (points - 2)
+    anchor = 0
+    for bucket in range(points - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_start = end
+        next_end = min(int((bucket + 2) * every) + 1, n)
+        if next_start >= n - 1:
+            avg_x, avg_y = float(n - 1), float(values[n - 1])
+        else:
+            span = next_end - next_start
+            avg_x = (next_start + next_end - 1) / 2.0
+            avg_y = sum(values[next_start:next_end]) / span
+        ax, ay = anchor, values[anchor]
+        best, best_area = start, -1.0
+        for idx in range(start, min(end, n - 1)):
+            # Twice the triangle area; the constant factor does not matter.
+            area = abs((ax - avg_x) * (values[idx] - ay) - (ax - idx) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = idx, area
+        picked.append(best)
+        anchor = best
+    picked.append(n - 1)
+    return picked
+
+
+def minmax_indices(values: Sequence[float], points: int) -> List[int]:
+    """Indices of the min and max of each of ``points // 2`` buckets, in order."""
+    n = len(values)
+    if points >= n:
+        return list(range(n))
+    buckets = max(points // 2, 1)
+    every = n / buckets
+    picked: List[int] = []
+    for bucket in range(buckets):
+        start = int(bucket * every)
+        end = max(int((bucket + 1) * every), start + 1)
+        lo = hi = start
+        for idx in range(start + 1, min(end, n)):
+            if values[idx] < values[lo]:
+                lo = idx
+            elif values[idx] > values[hi]:
+                hi = idx
+        picked.extend(sorted({lo, hi}))
+    return picked
+
+
+def decimate_indices(series: Sequence[Sequence[float]], points: int, method: str = "lttb") -> List[int]:
+    """
+    Union of the indices chosen for each series. Every series gets an equal
+    share of ``points`` so the union never exceeds it (for ``points`` of at
+    least three per series).
+    """
+    if not series:
+        return []
+    n = len(series[0])
+    if points >= n:
+        return list(range(n))
+    share = max(points // len(series), 3 if method == "lttb" else 2)
+    pick = lttb_indices if method == "lttb" else minmax_indices
+    keep = set()
+    for values in series:
+        keep.update(pick(values, share))
+    return sorted(keep)
+
+
+def _power_by_timestamp(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    totals: Dict[str, float] = defaultdict(float)
+    for row in rows:
+        totals[row.get("timestamp")] += row.get("power", 0) or 0
+    return totals
+
+
+def decimate_history(
+    rows: List[Dict[str, Any]],
+    summary: Dict[str, Any],
+    points: int,
+    method: str = "lttb",
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Reduce ``rows`` and the summary series to at most ``points`` timestamps.
+
+    ``summary`` must come from ``summarize_history`` over the full ``rows``
+    so aggregates (average, trend, forecast) still reflect every sample.
+    """
+    timestamps = summary.get("timestamps") or []
+    if points <= 0 or len(timestamps) <= points:
+        return rows, summary
+    power = _power_by_timestamp(rows)
+    series = [
+        summary.get("total_hash_series") or [0.0] * len(timestamps),
+        summary.get("avg_temp_series") or [0.0] * len(timestamps),
+        [power.get(ts, 0.0) for ts in timestamps],
+    ]
+    keep = decimate_indices(series, points, method)
+    kept_ts = [timestamps[i] for i in keep]
+    wanted = set(kept_ts)
+    reduced = dict(summary)
+    reduced["timestamps"] = kept_ts
+    reduced["total_hash_series"] = [series[0][i] for i in keep]
+    reduced["avg_temp_series"] = [series[1][i] for i in keep]
+    reduced["decimation"] = {"method": method, "points": len(keep), "source_points": len(timestamps)}
+    return [row for row in rows if row.get("timestamp") in wanted], reduced
@@ -0,0 +1,264 @@
+"""
+Per-miner efficiency curves fitted from logged frequency/voltage telemetry.
+
+For every miner we fit, by least squares on the v2 metric log columns:
+
+* hashrate (TH/s)  ~ 1 + f + V
+* power (W)        ~ 1 + f*V^2 + V          (CMOS dynamic + static power)
+* voltage (V)      ~ 1 + f                  (the miner's stable V/f line)
+* board temp (C)   ~ 1 + power
+
+Each fit keeps only its normal-equation sums (X^T X, X^T y), so new rows are
+folded in with a rank-one update and refitting is a tiny linear solve per
+miner; no history is replayed. Coefficients and the predicted optimum are
+cached per miner until more points arrive.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+MIN_SAMPLES = 12          # rows needed before a miner gets a model
+MIN_DISTINCT_FREQ = 2     # at least two frequency settings to see a slope
+RIDGE = 1e-6              # keeps the solve stable when V never changes
+CANDIDATE_STEPS = 25      # frequencies evaluated across the observed range
+DEFAULT_TEMP_LIMIT_C = 75.0
+
+
+def _volts(value: float) -> float:
+    """AxeOS reports core voltage in mV; accept either unit."""
+    return value / 1000.0 if value > 10 else value
+
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> Optional[List[float]]:
+    """Gaussian elimination with partial pivoting for the small normal systems."""
+    size = len(vector)
+    aug = [row[:] + [vector[idx]] for idx, row in enumerate(matrix)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(aug[r][col]))
+        if abs(aug[pivot][col]) < 1e-12:
+            return None
+        aug[col], aug[pivot] = aug[pivot], aug[col]
+        for row in range(col + 1, size):
+            factor = aug[row][col] / aug[col][col]
+            if factor:
+                for k in range(col, size + 1):
+                    aug[row][k] -= factor * aug[col][k]
+    coef = [0.0] * size
+    for row in range(size - 1, -1, -1):
+        acc = aug[row][size] - sum(aug[row][k] * coef[k] for k in range(row + 1, size))
+        coef[row] = acc / aug[row][row]
+    return coef
+
+
+class LeastSquares:
+    """Running normal equations for y ~ X·beta with an R^2 side channel."""
+
+    __slots__ = ("xtx", "xty", "yty", "y_sum", "n")
+
+    def __init__(self, width: int):
+        self.xtx = [[0.0] * width for _ in range(width)]
+        self.xty = [0.0] * width
+        self.yty = 0.0
+        self.y_sum = 0.0
+        self.n = 0
+
+    def add(self, x: Sequence[float], y: float) -> None:
+        for i, xi in enumerate(x):
+            self.xty[i] += xi * y
+            row = self.xtx[i]
+            for j in range(i, len(x)):
+                row[j] += xi * x[j]
+        self.yty += y * y
+        self.y_sum += y
+        self.n += 1
+
+    def solve(self) -> Optional[Dict[str, Any]]:
+        width = len(self.xty)
+        if self.n < width:
+            return None
+        matrix = [
+            [self.xtx[min(i, j)][max(i, j)] + (RIDGE if i == j and i else 0.0) for j in range(width)]
+            for i in range(width)
+        ]
+        coef = _solve(matrix, self.xty)
+        if coef is None:
+            return None
+        # SSE = y'y - 2 b'X'y + b'X'X b, computed from the sums alone.
+        fitted = sum(coef[i] * self.xty[i] for i in range(width))
+        quad = sum(coef[i] * matrix[i][j] * coef[j] for i in range(width) for j in range(width))
+        sse = max(self.yty - 2 * fitted + quad, 0.0)
+        sst = self.yty - self.y_sum * self.y_sum / self.n
+        r2 = 1 - sse / sst if sst > 1e-12 else 1.0
+        return {"coef": coef, "r2": r2}
+
+
+def _hash_features(freq: float, volts: float) -> List[float]:
+    return [1.0, freq, volts]
+
+
+def _power_features(freq: float, volts: float) -> List[float]:
+    return [1.0, freq * volts * volts, volts]
+
+
+def _dot(coef: Sequence[float], features: Sequence[float]) -> float:
+    return sum(c * x for c, x in zip(coef, features))
+
+
+class MinerEfficiencyModel:
+    """Accumulated fits for one miner plus cached predicted operating points."""
+
+    def __init__(self) -> None:
+        self.hashrate = LeastSquares(3)
+        self.power = LeastSquares(3)
+        self.voltage = LeastSquares(2)
+        self.temp = LeastSquares(2)
+        self.freq_min = self.freq_max = 0.0
+        self.volt_min = self.volt_max = 0.0
+        self.frequencies: set = set()
+        self.last_ts: Optional[str] = None
+        self.latest: Dict[str, float] = {}
+        self._cache: Optional[Dict[str, Any]] = None
+        self._candidates: Optional[List[Dict[str, float]]] = None
+        self._dirty = True
+
+    @property
+    def samples(self) -> int:
+        return self.hashrate.n
+
+    def add_row(self, row: Dict[str, Any]) -> bool:
+        freq = float(row.get("frequency", 0) or 0)
+        volts = _volts(float(row.get("voltage", 0) or 0))
+        hashrate = float(row.get("hashrate_1m", 0) or 0)
+        power = float(row.get("power", 0) or 0)
+        if not row.get("alive", True) or freq <= 0 or volts <= 0 or hashrate <= 0 or power <= 0:
+            return False
+        self.hashrate.add(_hash_features(freq, volts), hashrate)
+        self.power.add(_power_features(freq, volts), power)
+        self.voltage.add([1.0, freq], volts)
+        temp = float(row.get("temp", 0) or 0)
+        if temp > 0:
+            self.temp.add([1.0, power], temp)
+        if not self.frequencies:
+            self.freq_min = self.freq_max = freq
+            self.volt_min = self.volt_max = volts
+        self.freq_min, self.freq_max = min(self.freq_min, freq), max(self.freq_max, freq)
+        self.volt_min, self.volt_max = min(self.volt_min, volts), max(self.volt_max, volts)
+        self.frequencies.add(round(freq))
+        self.latest = {"frequency": freq, "voltage": volts, "hashrate": hashrate, "power": power}
+        self._dirty = True
+        return True
+
+    def fit(self) -> Optional[Dict[str, Any]]:
+        if not self._dirty:
+            return self._cache
+        self._dirty = False
+        self._cache = None
+        self._candidates = None
+        if self.samples < MIN_SAMPLES or len(self.frequencies) < MIN_DISTINCT_FREQ:
+            return None
+        fits = {
+            "hashrate": self.hashrate.solve(),
+            "power": self.power.solve(),
+            "voltage": self.voltage.solve(),
+            "temp": self.temp.solve() if self.temp.n >= MIN_SAMPLES else None,
+        }
+        if not (fits["hashrate"] and fits["power"] and fits["voltage"]):
+            return None
+        self._cache = fits
+        return fits
+
+    def predict(self, freq: float, volts: Optional[float] = None) -> Optional[Dict[str, float]]:
+        fits = self.fit()
+        if not fits:
+            return None
+        if volts is None:
+            volts = _dot(fits["voltage"]["coef"], [1.0, freq])
+            volts = min(max(volts, self.volt_min), self.volt_max)
+        hashrate = _dot(fits["hashrate"]["coef"], _hash_features(freq, volts))
+        power = _dot(fits["power"]["coef"], _power_features(freq, volts))
+        if hashrate <= 0 or power <= 0:
+            return None
+        prediction = {
+            "frequency_mhz": freq,
+            "voltage_mv": volts * 1000.0,
+            "hashrate_ths": hashrate,
+            "power_w": power,
+            "efficiency_w_th": power / hashrate,
+        }
+        if fits["temp"]:
+            prediction["temp_c"] = _dot(fits["temp"]["coef"], [1.0, power])
+        return prediction
+
+    def candidates(self, steps: int = CANDIDATE_STEPS) -> List[Dict[str, float]]:
+        """Predicted operating points across the observed frequency range."""
+        if not self.fit():
+            return []
+        if steps == CANDIDATE_STEPS and self._candidates is not None:
+            return self._candidates
+        span = self.freq_max - self.freq_min
+        points = []
+        for idx in range(steps):
+            freq = self.freq_min + span * idx / max(steps - 1, 1)
+            prediction = self.predict(freq)
+            if prediction:
+                points.append(prediction)
+        if steps == CANDIDATE_STEPS:
+            self._candidates = points
+        return points
+
+    def optimal_point(self, temp_limit_c: float = DEFAULT_TEMP_LIMIT_C) -> Optional[Dict[str, Any]]:
+        """Lowest predicted W/TH inside the observed envelope and under the temp limit."""
+        fits = self.fit()
+        if not fits:
+            return None
+        feasible = [
+            p for p in self.candidates()
+            if p.get("temp_c") is None or p["temp_c"] <= temp_limit_c
+        ]
+        if not feasible:
+            return None
+        best = min(feasible, key=lambda p: p["efficiency_w_th"])
+        return {
+            **best,
+            "samples": self.samples,
+            "fit_r2": {
+                "hashrate": fits["hashrate"]["r2"],
+                "power": fits["power"]["r2"],
+            },
+            "observed_frequency_mhz": [self.freq_min, self.freq_max],
+        }
+
+
+class EfficiencyModelRegistry:
+    """Per-miner model cache fed incrementally from metric log rows."""
+
+    def __init__(self) -> None:
+        self._models: Dict[str, MinerEfficiencyModel] = {}
+
+    def observe_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """Fold rows newer than each miner's last seen timestamp into its fit."""
+        added = 0
+        for row in rows:
+            name = row.get("name")
+            ts = row.get("timestamp")
+            if not name or not ts:
+                continue
+            model = self._models.get(name)
+            if model is None:
+                model = self._models[name] = MinerEfficiencyModel()
+            if model.last_ts is not None and ts <= model.last_ts:
+                continue
+            model.last_ts = ts
+            if model.add_row(row):
+                added += 1
+        return added
+
+    def model_for(self, name: Optional[str]) -> Optional[MinerEfficiencyModel]:
+        return self._models.get(name) if name else None
+
+    def optimal_point(self, name: Optional[str], temp_limit_c: float = DEFAULT_TEMP_LIMIT_C) -> Optional[Dict[str, Any]]:
+        model = self.model_for(name)
+        return model.optimal_point(temp_limit_c) if model else None
+
+    def names(self) -> List[str]:
+        return sorted(self._models)
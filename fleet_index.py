@@ -0,0 +1,172 @@
+"""
+Secondary indexes over a fleet snapshot for ``/miner-data`` queries.
+
+A ``FleetIndex`` is built once per snapshot (``FleetIndexCache`` keeps the
+one for the current snapshot version, or snapshot object when the source
+has no version) and holds:
+
+* ``by_status``: status slug (``ok``, ``overheating``, ``high-reject-rate``,
+  ``offline``) -> miner names, in snapshot order;
+* ``by_type``: lower-cased miner type (``bg02``, ``nerdq``, ...) -> names;
+* sort orders per key, the temperature rank built eagerly and the others
+  on first use.
+
+A query then resolves its filters to name sets from those indexes, walks
+the requested order only until ``offset + limit`` matches are found, and
+copies just the requested ``fields`` of the miners it returns.
+"""
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+Miners = Dict[str, Dict[str, Any]]
+
+
+class FleetQueryError(ValueError):
+    pass
+
+
+def status_key(status: Any) -> str:
+    """``"⚠️ High Reject Rate"`` -> ``"high-reject-rate"``."""
+    return re.sub(r"[^a-z0-9]+", "-", str(status or "unknown").lower()).strip("-") or "unknown"
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None
+
+
+def temperature(miner: Dict[str, Any]) -> Optional[float]:
+    """ASIC temperature as used for status (chipTemp, else board temp); None when unknown."""
+    for field in ("chipTemp", "temp"):
+        value = _number(miner.get(field))
+        if value:
+            return value
+    return None
+
+
+SORT_KEYS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "temp": temperature,
+    "hashrate": lambda m: _number(m.get("hashrate_1m")),
+    "hashrate_24h": lambda m: _number(m.get("hashrate_24h")),
+    "efficiency": lambda m: _number(m.get("efficiency")) or None,  # 0 = no hashrate
+    "power": lambda m: _number(m.get("power")),
+    "uptime": lambda m: _number(m.get("uptime")),
+}
+
+
+def split_param(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+class FleetIndex:
+    def __init__(self, miners: Miners):
+        self.miners = miners
+        self.names = list(miners)
+        self.position = {name: idx for idx, name in enumerate(self.names)}
+        by_status: Dict[str, List[str]] = defaultdict(list)
+        by_type: Dict[str, List[str]] = defaultdict(list)
+        for name in self.names:
+            miner = miners[name] or {}
+            by_status[status_key(miner.get("status"))].append(name)
+            by_type[str(miner.get("type") or "unknown").lower()].append(name)
+        self.by_status = dict(by_status)
+        self.by_type = dict(by_type)
+        self._orders: Dict[Tuple[str, bool], List[str]] = {}
+        self.temperature_rank = self.order("temp", descending=True)  # hottest first
+
+    def order(self, key: str, descending: bool = False) -> List[str]:
+        """Names sorted on ``key`` (ties in snapshot order, unknown values last)."""
+        cached = self._orders.get((key, descending))
+        if cached is not None:
+            return cached
+        if key == "name":
+            ordered = sorted(self.names, reverse=descending)
+        else:
+            extract = SORT_KEYS.get(key)
+            if extract is None:
+                raise FleetQueryError(f"Unknown sort key '{key}' (use name, {', '.join(SORT_KEYS)})")
+            valued, missing = [], []
+            for name in self.names:
+                value = extract(self.miners[name] or {})
+                (missing if value is None else valued).append((value, name))
+            valued.sort(key=lambda item: item[0], reverse=descending)
+            ordered = [name for _, name in valued] + [name for _, name in missing]
+        self._orders[(key, descending)] = ordered
+        return ordered
+
+    def _members(self, index: Dict[str, List[str]], keys: Iterable[str]) -> Set[str]:
+        members: Set[str] = set()
+        for key in keys:
+            members.update(index.get(key, ()))
+        return members
+
+    def query(
+        self,
+        statuses: Sequence[str] = (),
+        types: Sequence[str] = (),
+        sort: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[str], int]:
+        """Matching names for one page, and the total number of matches."""
+        allowed: Optional[Set[str]] = None
+        if statuses:
+            allowed = self._members(self.by_status, (status_key(s) for s in statuses))
+        if types:
+            of_type = self._members(self.by_type, (t.lower() for t in types))
+            allowed = of_type if allowed is None else allowed & of_type
+        if sort:
+            ordered = self.order(sort.lstrip("-+"), descending=sort.startswith("-"))
+        elif allowed is None:
+            ordered = self.names
+        else:
+            ordered = sorted(allowed, key=self.position.__getitem__)
+            allowed = None
+        total = len(ordered) if allowed is None else len(allowed)
+        end = total if limit is None else min(offset + limit, total)
+        if allowed is None:
+            return ordered[offset:end], total
+        picked: List[str] = []
+        for name in ordered:
+            if name in allowed:
+                picked.append(name)
+                if len(picked) >= end:
+                    break
+        return picked[offset:], total
+
+    def project(self, names: Iterable[str], fields: Sequence[str] = ()) -> Miners:
+        if not fields:
+            return {name: self.miners[name] for name in names}
+        out: Miners = {}
+        for name in names:
+            miner = self.miners[name] or {}
+            out[name] = {field: miner[field] for field in fields if field in miner}
+        return out
+
+
+class FleetIndexCache:
+    """The ``FleetIndex`` for the most recent snapshot."""
+
+    def __init__(self):
+        self._version: Optional[Hashable] = None
+        self._miners: Optional[Miners] = None
+        self._index: Optional[FleetIndex] = None
+        self.counters = {"builds": 0, "hits": 0}
+
+    def index_for(self, miners: Miners, version: Optional[Hashable] = None) -> FleetIndex:
+        """Index for ``miners``; reused while ``version`` (else the snapshot object) is unchanged."""
+        stale = version != self._version or (version is None and miners is not self._miners)
+        if self._index is None or stale:
+            self._index = FleetIndex(miners)
+            self._version = version
+            self._miners = miners
+            self.counters["builds"] += 1
+        else:
+            self.counters["hits"] += 1
+        return self._index
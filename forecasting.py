@@ -0,0 +1,233 @@
+"""
+Short-horizon forecasts for fleet and per-miner telemetry.
+
+Each series keeps a Holt (double exponential smoothing) state that is
+advanced one sample at a time, so new metric rows only cost O(new points)
+and serving a forecast never replays history. Smoothing parameters are
+picked with a small SSE grid search over a bounded window of recent values
+and re-tuned every ``RETUNE_EVERY`` samples.
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+ALPHA_GRID = (0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+BETA_RATIOS = (0.0, 0.05, 0.1, 0.2, 0.4)  # beta expressed as a fraction of alpha
+WINDOW = 288          # values kept per series for re-tuning
+RETUNE_EVERY = 48     # samples between grid searches
+MSE_WINDOW = 96       # effective window of the residual variance estimate
+MIN_POINTS = 3        # below this no forecast is produced
+Z_95 = 1.96
+TREND_THRESHOLD = 0.05  # relative change over the horizon that counts as a trend
+
+FLEET = "__fleet__"
+SeriesKey = Tuple[str, str]
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _replay(values: Iterable[float], alpha: float, beta: float) -> Tuple[float, float, float, float, int]:
+    """Run the error-correction Holt recursion; returns (level, trend, mse, sse, n_resid)."""
+    level = trend = 0.0
+    mse = sse = 0.0
+    n_resid = 0
+    for idx, value in enumerate(values):
+        if idx == 0:
+            level, trend = value, 0.0
+            continue
+        error = value - (level + trend)
+        level = level + trend + alpha * error
+        trend = trend + beta * error
+        n_resid += 1
+        sse += error * error
+        mse += (error * error - mse) / min(n_resid, MSE_WINDOW)
+    return level, trend, mse, sse, n_resid
+
+
+class HoltSeries:
+    """Incrementally updated Holt linear-trend model for one series."""
+
+    __slots__ = ("alpha", "beta", "level", "trend", "mse", "n", "n_resid", "values", "_since_tune")
+
+    def __init__(self, alpha: float = 0.5, beta: float = 0.05):
+        self.alpha = alpha
+        self.beta = beta
+        self.level = 0.0
+        self.trend = 0.0
+        self.mse = 0.0
+        self.n = 0
+        self.n_resid = 0
+        self.values: Deque[float] = deque(maxlen=WINDOW)
+        self._since_tune = 0
+
+    def update(self, value: float) -> None:
+        self.values.append(value)
+        self.n += 1
+        self._since_tune += 1
+        if self.n == 1:
+            self.level, self.trend = value, 0.0
+        else:
+            error = value - (self.level + self.trend)
+            self.level = self.level + self.trend + self.alpha * error
+            self.trend = self.trend + self.beta * error
+            self.n_resid += 1
+            self.mse += (error * error - self.mse) / min(self.n_resid, MSE_WINDOW)
+        # Tune early (once a handful of points exist) and then periodically.
+        if self.n == MIN_POINTS * 2 or self._since_tune >= RETUNE_EVERY:
+            self.retune()
+
+    def retune(self) -> None:
+        """Grid-search alpha/beta on the retained window and resync the state."""
+        values = list(self.values)
+        if len(values) < MIN_POINTS:
+            return
+        best: Optional[Tuple[float, float, float]] = None
+        for alpha in ALPHA_GRID:
+            for ratio in BETA_RATIOS:
+                beta = alpha * ratio
+                sse = _replay(values, alpha, beta)[3]
+                if best is None or sse < best[0]:
+                    best = (sse, alpha, beta)
+        _, self.alpha, self.beta = best
+        self.level, self.trend, self.mse, _, self.n_resid = _replay(values, self.alpha, self.beta)
+        self._since_tune = 0
+
+    def forecast(self, horizon: int, z: float = Z_95) -> List[Dict[str, float]]:
+        sigma2 = self.mse
+        points = []
+        spread = 1.0  # running 1 + sum((alpha + beta*j)^2)
+        for step in range(1, horizon + 1):
+            if step > 1:
+                spread += (self.alpha + self.beta * (step - 1)) ** 2
+            value = self.level + step * self.trend
+            half_width = z * math.sqrt(max(sigma2 * spread, 0.0))
+            points.append({
+                "step": step,
+                "value": value,
+                "lower": value - half_width,
+                "upper": value + half_width,
+            })
+        return points
+
+
+class ForecastRegistry:
+    """
+    Caches one ``HoltSeries`` per (subject, metric) and feeds it metric rows.
+
+    Rows are the ``data_logger.load_recent_metrics`` dicts; only timestamps
+    newer than the last ingested one are applied, so calling
+    ``observe_rows`` with an overlapping window on every request is cheap.
+    """
+
+    METRICS = ("hashrate", "temp")
+
+    def __init__(self) -> None:
+        self._series: Dict[SeriesKey, HoltSeries] = {}
+        self._last_ts: Optional[str] = None
+        self._recent_ts: Deque[datetime] = deque(maxlen=32)
+
+    def _get(self, key: SeriesKey) -> HoltSeries:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = HoltSeries()
+        return series
+
+    def observe_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Ingest rows newer than the last seen timestamp; returns timestamps applied.
+
+        ``rows`` is a row-limited tail of the log, so its oldest timestamp may
+        have lost some miners to the limit. Unless that timestamp was already
+        seen (the window overlaps the last one), it is skipped rather than
+        folded into the level and trend as a partial fleet total.
+        """
+        grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        oldest: Optional[str] = None
+        for row in rows:
+            ts = row.get("timestamp")
+            if not ts:
+                continue
+            if oldest is None or ts < oldest:
+                oldest = ts
+            if self._last_ts is None or ts > self._last_ts:
+                grouped[ts].append(row)
+        grouped.pop(oldest, None)
+        for ts in sorted(grouped):
+            self._observe_snapshot(ts, grouped[ts])
+        return len(grouped)
+
+    def _observe_snapshot(self, ts: str, rows: List[Dict[str, Any]]) -> None:
+        total_hash = 0.0
+        temps = []
+        for row in rows:
+            name = row.get("name")
+            hashrate = float(row.get("hashrate_1m", 0) or 0)
+            temp = float(row.get("temp", 0) or 0)
+            total_hash += hashrate
+            if name:
+                self._get((name, "hashrate")).update(hashrate)
+                if temp:
+                    self._get((name, "temp")).update(temp)
+            if temp:
+                temps.append(temp)
+        self._get((FLEET, "hashrate")).update(total_hash)
+        if temps:
+            self._get((FLEET, "temp")).update(sum(temps) / len(temps))
+        self._last_ts = ts
+        parsed = _parse_ts(ts)
+        if parsed:
+            self._recent_ts.append(parsed)
+
+    def _step_seconds(self) -> Optional[float]:
+        stamps = list(self._recent_ts)
+        gaps = sorted((b - a).total_seconds() for a, b in zip(stamps, stamps[1:]))
+        gaps = [g for g in gaps if g > 0]
+        return gaps[len(gaps) // 2] if gaps else None
+
+    def forecast(self, subject: str, metric: str, horizon: int) -> Optional[Dict[str, Any]]:
+        series = self._series.get((subject, metric))
+        if series is None or series.n < MIN_POINTS or horizon <= 0:
+            return None
+        points = series.forecast(horizon)
+        step = self._step_seconds()
+        last = self._recent_ts[-1] if self._recent_ts else None
+        if step and last:
+            for point in points:
+                point["timestamp"] = (last + timedelta(seconds=step * point["step"])).isoformat()
+        projected = points[-1]["value"] - series.level
+        trend = "stable"
+        if series.level and abs(projected) > abs(series.level) * TREND_THRESHOLD:
+            trend = "rising" if projected > 0 else "slipping"
+        return {
+            "metric": metric,
+            "alpha": series.alpha,
+            "beta": series.beta,
+            "level": series.level,
+            "slope": series.trend,
+            "rmse": math.sqrt(series.mse),
+            "samples": series.n,
+            "step_seconds": step,
+            "trend": trend,
+            "points": points,
+        }
+
+    def fleet_forecast(self, horizon: int) -> Dict[str, Any]:
+        return {
+            metric: self.forecast(FLEET, metric, horizon)
+            for metric in self.METRICS
+        }
+
+    def miner_forecasts(self, horizon: int) -> Dict[str, Dict[str, Any]]:
+        names = sorted({subject for subject, _ in self._series if subject != FLEET})
+        return {
+            name: {metric: self.forecast(name, metric, horizon) for metric in self.METRICS}
+            for name in names
+        }
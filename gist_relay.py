@@ -0,0 +1,208 @@
+"""
+Cloud-mode reader for the miner snapshot that ``sync_to_gist.py`` publishes.
+
+A background task keeps the snapshot current so requests only ever read the
+in-memory copy. Refreshes are conditional GETs (``If-None-Match`` /
+``If-Modified-Since``), so an unchanged Gist costs a 304 with no body, and
+they are scheduled from the payload itself: the next one is due
+``sync_interval`` after ``last_updated`` (plus a small grace for the raw CDN),
+falling back to polling every ``GIST_CACHE_TTL`` seconds once that moment has
+passed without a new upload. Concurrent refreshes share one in-flight request.
+
+Listeners registered with ``add_listener`` are awaited with each payload
+whose ``last_updated`` differs from the previous one (cloud mode uses this
+to write snapshots into the metric history).
+
+``GIST_RAW_URL`` can point at a local server serving the same JSON.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from contextlib import suppress
+from datetime import datetime, timezone
+from time import monotonic, time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger("gist_relay")
+
+GIST_RAW_URL = os.getenv(
+    "GIST_RAW_URL",
+    "https://gist.githubusercontent.com/harborglowvintage-oss/9e0d60bcc84c808f505f9a4bfea0bc2f/raw/miner_data.json"
+)
+GIST_CACHE_TTL = int(os.getenv("GIST_CACHE_TTL", "30"))  # fallback poll interval
+GIST_TIMEOUT = float(os.getenv("GIST_TIMEOUT", "10"))
+GIST_REFRESH_GRACE = float(os.getenv("GIST_REFRESH_GRACE", "5"))
+GIST_MIN_REFRESH = float(os.getenv("GIST_MIN_REFRESH", "5"))
+GIST_COLD_WAIT = float(os.getenv("GIST_COLD_WAIT", "2"))
+
+
+def _epoch(value: Any) -> Optional[float]:
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class GistRelay:
+    def __init__(
+        self,
+        url: str = GIST_RAW_URL,
+        poll_interval: float = GIST_CACHE_TTL,
+        timeout: float = GIST_TIMEOUT,
+        grace: float = GIST_REFRESH_GRACE,
+        min_interval: float = GIST_MIN_REFRESH,
+        cold_wait: float = GIST_COLD_WAIT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = url
+        self.poll_interval = max(poll_interval, min_interval)
+        self.timeout = timeout
+        self.grace = grace
+        self.min_interval = min_interval
+        self.cold_wait = cold_wait
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._payload: Optional[Dict[str, Any]] = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Dict[str, Any]], Awaitable[Any]]] = []
+        self.counters = {"fetches": 0, "updated": 0, "not_modified": 0, "errors": 0}
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, transport=self._transport)
+        return self._client
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], Awaitable[Any]]) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    # Fetching ----------------------------------------------------------
+    async def _fetch(self) -> Optional[Dict[str, Any]]:
+        self.counters["fetches"] += 1
+        headers = {}
+        if self._payload is not None:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+        response = await self._http().get(self.url, headers=headers)
+        self._checked_at = monotonic()
+        if response.status_code == 304:
+            self.counters["not_modified"] += 1
+            return self._payload
+        response.raise_for_status()
+        payload = response.json()
+        if not isinstance(payload, dict):
+            raise ValueError("Gist payload is not a JSON object")
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
+        changed = self._payload is None or payload.get("last_updated") != self._payload.get("last_updated")
+        self._payload = payload
+        if changed:
+            self.counters["updated"] += 1
+            logger.info(
+                "Fetched %d miner(s) from Gist (last_updated: %s)",
+                len(payload.get("miners") or {}), payload.get("last_updated", "unknown"),
+            )
+            for listener in self._listeners:
+                try:
+                    await listener(payload)
+                except Exception as exc:
+                    logger.warning("Gist listener failed: %s", exc)
+        return payload
+
+    def refresh(self) -> asyncio.Task:
+        """Start a refresh, or join the one already in flight."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._fetch())
+
+            def _done(task: asyncio.Task) -> None:
+                if not task.cancelled() and task.exception() is not None:
+                    self.counters["errors"] += 1
+                    logger.warning("Gist refresh failed: %s", task.exception())
+
+            self._inflight.add_done_callback(_done)
+        return self._inflight
+
+    def next_delay(self, now: Optional[float] = None) -> float:
+        """Seconds until the next refresh is worth doing."""
+        payload = self._payload or {}
+        updated = _epoch(payload.get("last_updated"))
+        interval = payload.get("sync_interval")
+        if updated is None or not isinstance(interval, (int, float)) or interval <= 0:
+            return self.poll_interval
+        due = updated + interval + self.grace - (time() if now is None else now)
+        if due <= 0:
+            # The agent skipped an upload or is late; fall back to plain polling.
+            return self.poll_interval
+        return max(min(due, self.poll_interval * 4), self.min_interval)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.shield(self.refresh())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await asyncio.sleep(self.next_delay())
+
+    def start(self) -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.ensure_future(self.run())
+
+    async def aclose(self) -> None:
+        for task in (self._runner, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError, Exception):
+                    await task
+        self._runner = self._inflight = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # Read side ---------------------------------------------------------
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """Latest snapshot as-is, without starting or awaiting a refresh."""
+        return self._payload
+
+    async def payload(self) -> Optional[Dict[str, Any]]:
+        """Latest snapshot without waiting on GitHub (bounded wait only before the first one)."""
+        if self._payload is not None:
+            if self._runner is None or self._runner.done():
+                # No background refresher (e.g. tests/scripts): refresh on read, stale-while-revalidate.
+                if self._checked_at is None or monotonic() - self._checked_at >= self.poll_interval:
+                    self.refresh()
+            return self._payload
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.refresh()), self.cold_wait)
+        except Exception:
+            return None
+
+    async def miners(self) -> Optional[Dict[str, Any]]:
+        payload = await self.payload()
+        return payload.get("miners", {}) if payload is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        payload = self._payload or {}
+        return {
+            **self.counters,
+            "last_updated": payload.get("last_updated"),
+            "etag": self._etag,
+            "checked_age": round(monotonic() - self._checked_at, 1) if self._checked_at is not None else None,
+            "next_refresh_in": round(self.next_delay(), 1),
+            "running": self._runner is not None and not self._runner.done(),
+        }
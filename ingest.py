@@ -0,0 +1,151 @@
+"""
+Direct telemetry ingest: the sync agent POSTs batches of timestamped fleet
+snapshots to the dashboard's ``/ingest`` endpoint instead of relaying them
+through a Gist.
+
+Wire format (shared by ``sync_to_gist.py`` and the endpoint)::
+
+    POST /ingest
+    Authorization: Bearer <INGEST_TOKEN>
+    Content-Encoding: gzip
+    {"samples": [{"last_updated": "...Z", "sync_interval": 60, "miners": {...}}, ...]}
+
+Samples are keyed by ``last_updated``; re-sent samples (a retried batch
+whose response was lost) are counted as duplicates and ignored, so the
+agent can retry freely.
+"""
+from __future__ import annotations
+
+import gzip
+import hmac
+import json
+import os
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+INGEST_TOKEN = os.getenv("INGEST_TOKEN")
+INGEST_MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", str(8 * 1024 * 1024)))  # decompressed
+INGEST_MAX_SAMPLES = int(os.getenv("INGEST_MAX_SAMPLES", "2880"))  # kept in memory
+
+
+class IngestError(ValueError):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def token_matches(header: Optional[str], token: Optional[str] = None) -> bool:
+    """Constant-time check of an ``Authorization: Bearer`` header."""
+    token = INGEST_TOKEN if token is None else token
+    if not token or not header:
+        return False
+    scheme, _, value = header.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(value.strip().encode(), token.encode())
+
+
+def encode_batch(samples: List[Dict[str, Any]]) -> bytes:
+    """Gzip-compressed compact JSON body for a batch of samples."""
+    blob = json.dumps({"samples": samples}, separators=(",", ":"), default=str).encode("utf-8")
+    return gzip.compress(blob, compresslevel=6)
+
+
+def _inflate(body: bytes, encoding: str, max_bytes: int) -> bytes:
+    encoding = (encoding or "identity").strip().lower()
+    if encoding in ("", "identity"):
+        if len(body) > max_bytes:
+            raise IngestError("Batch too large", 413)
+        return body
+    if encoding not in ("gzip", "deflate"):
+        raise IngestError(f"Unsupported Content-Encoding: {encoding}", 415)
+    # Bounded inflate so a small compressed body cannot expand without limit.
+    wbits = 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS
+    inflater = zlib.decompressobj(wbits)
+    try:
+        out = inflater.decompress(body, max_bytes + 1)
+    except zlib.error as exc:
+        raise IngestError(f"Corrupt {encoding} body: {exc}") from exc
+    if len(out) > max_bytes or inflater.unconsumed_tail:
+        raise IngestError("Batch too large", 413)
+    return out
+
+
+def _epoch(value: Any) -> Optional[float]:
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def sample_epoch(sample: Optional[Dict[str, Any]]) -> Optional[float]:
+    """``last_updated`` of a snapshot as epoch seconds (None when missing/invalid)."""
+    return _epoch(sample.get("last_updated")) if sample else None
+
+
+def decode_batch(body: bytes, encoding: str = "identity", max_bytes: int = INGEST_MAX_BYTES) -> List[Dict[str, Any]]:
+    """Validated samples from a request body; raises ``IngestError``."""
+    raw = _inflate(body, encoding, max_bytes)
+    try:
+        data = json.loads(raw)
+    except ValueError as exc:
+        raise IngestError(f"Invalid JSON: {exc}") from exc
+    samples = data.get("samples") if isinstance(data, dict) else None
+    if not isinstance(samples, list):
+        raise IngestError("Expected an object with a 'samples' list")
+    valid = []
+    for sample in samples:
+        if not isinstance(sample, dict) or not isinstance(sample.get("miners"), dict):
+            raise IngestError("Each sample needs a 'miners' object")
+        if _epoch(sample.get("last_updated")) is None:
+            raise IngestError("Each sample needs an ISO 'last_updated' timestamp")
+        valid.append(sample)
+    return valid
+
+
+class IngestStore:
+    """Recent ingested samples ordered by ``last_updated``, de-duplicated on it."""
+
+    def __init__(self, max_samples: int = INGEST_MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._samples: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.counters = {"batches": 0, "accepted": 0, "duplicates": 0}
+
+    def add(self, samples: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Store new samples; returns (accepted, duplicates)."""
+        accepted = duplicates = 0
+        out_of_order = False
+        newest = next(reversed(self._samples)) if self._samples else None
+        for sample in samples:
+            key = sample["last_updated"]
+            if key in self._samples:
+                duplicates += 1
+                continue
+            if newest is not None and _epoch(key) < _epoch(newest):
+                out_of_order = True
+            else:
+                newest = key
+            self._samples[key] = sample
+            accepted += 1
+        if out_of_order:
+            self._samples = OrderedDict(sorted(self._samples.items(), key=lambda kv: _epoch(kv[0])))
+        while len(self._samples) > self.max_samples:
+            self._samples.popitem(last=False)
+        self.counters["batches"] += 1
+        self.counters["accepted"] += accepted
+        self.counters["duplicates"] += duplicates
+        return accepted, duplicates
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        return self._samples[next(reversed(self._samples))] if self._samples else None
+
+    def samples(self, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Samples strictly newer than ``since`` (all when None), oldest first."""
+        cutoff = _epoch(since) if since else None
+        return [s for k, s in self._samples.items() if cutoff is None or _epoch(k) > cutoff]
+
+    def __len__(self) -> int:
+        return len(self._samples)
@@ -1,6 +1,8 @@
+import asyncio
 import logging
 import os
-from typing import Optional, List, Dict
+from time import monotonic, time
+from typing import Any, Awaitable, Callable, Optional, List, Dict, Tuple
 
 import httpx
 
@@ -8,75 +10,367 @@ logger = logging.getLogger("luxor_api")
 
 # Luxor account configuration
 LUXOR_USERNAME = "harborglowvintage"
-LUXOR_BASE_URL = "https://app.luxor.tech/api/v2"
+LUXOR_BASE_URL = os.getenv("LUXOR_BASE_URL", "https://app.luxor.tech/api/v2").rstrip("/")
 LUXOR_DEFAULT_SUBACCOUNT = "harborglowvintage"
 
+# Responses are fresh for LUXOR_CACHE_TTL seconds; after that they are still
+# served (and refreshed in the background) until LUXOR_STALE_TTL.
+LUXOR_CACHE_TTL = float(os.getenv("LUXOR_CACHE_TTL", "60"))
+LUXOR_STALE_TTL = float(os.getenv("LUXOR_STALE_TTL", "900"))
+LUXOR_TIMEOUT = float(os.getenv("LUXOR_TIMEOUT", "5"))
+LUXOR_MAX_BACKOFF = float(os.getenv("LUXOR_MAX_BACKOFF", "300"))
+LUXOR_PAGE_SIZE = int(os.getenv("LUXOR_PAGE_SIZE", "250"))
+LUXOR_PAGE_CONCURRENCY = int(os.getenv("LUXOR_PAGE_CONCURRENCY", "4"))
+LUXOR_MAX_PAGES = int(os.getenv("LUXOR_MAX_PAGES", "100"))
+WORKERS_PATH = "/pool/workers/BTC"
 
-async def debug_luxor_connection() -> Dict:
+
+class LuxorRateLimited(Exception):
+    """Raised while the client is backing off after a 429/503 from Luxor."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"Luxor rate limited; retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+class LuxorClient:
+    """
+    Pooled, cached access to the Luxor REST API.
+
+    ``cached`` implements stale-while-revalidate: fresh entries return
+    immediately, stale ones return immediately while one background task
+    refreshes them, and concurrent misses share a single upstream call.
+    429/503 responses put the whole client into backoff (``Retry-After``
+    when given, otherwise exponential) so refreshes stop hammering the API.
+    """
+
+    def __init__(
+        self,
+        base_url: str = LUXOR_BASE_URL,
+        ttl: float = LUXOR_CACHE_TTL,
+        stale_ttl: float = LUXOR_STALE_TTL,
+        timeout: float = LUXOR_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._backoff_until = 0.0
+        self._backoff_step = 0
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0, "rate_limited": 0}
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            )
+        return self._client
+
+    def backoff_remaining(self) -> float:
+        return max(self._backoff_until - monotonic(), 0.0)
+
+    async def get_json(self, path: str, api_key: str, params: Dict[str, Any]) -> Any:
+        """GET ``path`` with rate-limit backoff; raises on HTTP errors."""
+        remaining = self.backoff_remaining()
+        if remaining > 0:
+            raise LuxorRateLimited(remaining)
+        headers = {"Authorization": api_key, "Content-Type": "application/json"}
+        logger.debug("📡 Luxor API Call → %s%s | params: %s", self.base_url, path, params)
+        response = await self._http().get(path, headers=headers, params=params)
+        if response.status_code in (429, 503):
+            self._backoff_step += 1
+            delay = _retry_after(response)
+            if delay is None:
+                delay = min(2.0 ** self._backoff_step, LUXOR_MAX_BACKOFF)
+            self._backoff_until = monotonic() + delay
+            self.counters["rate_limited"] += 1
+            logger.warning("Luxor API returned %s; backing off %.0fs", response.status_code, delay)
+            raise LuxorRateLimited(delay)
+        response.raise_for_status()
+        self._backoff_step = 0
+        return response.json()
+
+    async def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        self.counters["refreshes"] += 1
+        value = await loader()
+        stored_at = monotonic()
+        if isinstance(value, dict) and value.get("partial"):
+            # Keep partial results servable, but refresh them on the next read.
+            stored_at -= self.ttl
+        self._entries[key] = (stored_at, value)
+        return value
+
+    def _start_refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(key, loader))
+            self._refreshing[key] = task
+
+            def _done(t: asyncio.Task, k: str = key) -> None:
+                self._refreshing.pop(k, None)
+                if not t.cancelled() and t.exception() is not None:
+                    self.counters["errors"] += 1
+                    logger.warning("Luxor refresh for %s failed: %s", k, t.exception())
+
+            task.add_done_callback(_done)
+        return task
+
+    async def cached(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        now = monotonic()
+        if entry is not None:
+            age = now - entry[0]
+            if age <= self.ttl:
+                self.counters["hits"] += 1
+                return entry[1]
+            if age <= self.stale_ttl:
+                self.counters["stale_hits"] += 1
+                self._start_refresh(key, loader)
+                return entry[1]
+        self.counters["misses"] += 1
+        task = self._start_refresh(key, loader)
+        try:
+            # Shield so a disconnecting caller does not cancel the shared fetch.
+            return await asyncio.shield(task)
+        except Exception:
+            if entry is not None:
+                logger.warning("Serving expired Luxor data for %s after refresh failure", key)
+                return entry[1]
+            raise
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Cached value regardless of age, without triggering a refresh."""
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def age(self, key: str) -> Optional[float]:
+        entry = self._entries.get(key)
+        return monotonic() - entry[0] if entry else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "refreshing": len(self._refreshing),
+            "backoff_remaining": round(self.backoff_remaining(), 1),
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def aclose(self) -> None:
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+LUXOR_CLIENT = LuxorClient()
+
+
+def _credentials(api_key: Optional[str], subaccount: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    api_key = api_key or os.getenv("LUXOR_API_KEY")
+    subaccount = subaccount or os.getenv("LUXOR_SUBACCOUNT") or LUXOR_DEFAULT_SUBACCOUNT
+    return api_key, subaccount
+
+
+async def debug_luxor_connection(client: Optional[LuxorClient] = None) -> Dict:
     """Debug function to verify Luxor API connection and configuration."""
-    api_key = os.getenv("LUXOR_API_KEY")
-    subaccount = os.getenv("LUXOR_SUBACCOUNT") or LUXOR_DEFAULT_SUBACCOUNT
-    
+    client = client or LUXOR_CLIENT
+    api_key, subaccount = _credentials(None, None)
+
     config = {
         "api_key_set": bool(api_key),
         "api_key_preview": f"{api_key[:10]}...{api_key[-5:]}" if api_key else "NOT SET",
         "subaccount": subaccount,
-        "base_url": LUXOR_BASE_URL,
-        "endpoint": f"{LUXOR_BASE_URL}/pool/workers/BTC",
+        "base_url": client.base_url,
+        "endpoint": f"{client.base_url}{WORKERS_PATH}",
+        "cache": client.stats(),
     }
-    
+
     # Test the connection
     if not api_key:
         config["connection_status"] = "FAILED: API key not set"
         return config
-    
-    headers = {
-        "Authorization": api_key,
-        "Content-Type": "application/json",
-    }
-    
+
     params = {
         "subaccount_names": subaccount,
         "status": "ACTIVE",
-        "limit": 10,  # Small limit for debug
+        "page_number": 1,
+        "page_size": 10,  # Small page for debug
     }
-    
+    key = f"debug:{subaccount}"
+
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            url = f"{LUXOR_BASE_URL}/pool/workers/BTC"
-            logger.debug("📡 Luxor API Call → %s | params: %s", url, params)
-            response = await client.get(url, headers=headers, params=params)
-        
-        config["connection_status"] = f"SUCCESS: HTTP {response.status_code}"
-        config["response_length"] = len(response.text)
-        config["response_preview"] = response.text[:200]
-        
-        if response.status_code == 200:
-            try:
-                data = response.json()
-                config["json_valid"] = True
-                config["json_structure"] = list(data.keys()) if isinstance(data, dict) else "list"
-            except Exception as e:
-                config["json_valid"] = False
-                config["json_error"] = str(e)
-        
+        data = await client.cached(key, lambda: client.get_json(WORKERS_PATH, api_key, params))
+        config["connection_status"] = "SUCCESS"
+        config["cache_age_s"] = round(client.age(key) or 0.0, 1)
+        config["json_valid"] = True
+        config["json_structure"] = list(data.keys()) if isinstance(data, dict) else "list"
+        last_fetch = client.peek(f"workers:{subaccount}")
+        if isinstance(last_fetch, dict):
+            config["last_worker_fetch"] = {k: v for k, v in last_fetch.items() if k != "workers"}
         return config
     except Exception as e:
         config["connection_status"] = f"FAILED: {str(e)}"
         return config
 
 
-async def get_luxor_data(api_key: str | None = None, subaccount: str | None = None) -> Optional[List[Dict]]:
+def _worker_list(data: Any) -> List[Dict]:
+    # The API returns a list of workers or paginated results
+    workers = data.get("data", data.get("workers", [])) if isinstance(data, dict) else data
+    if not isinstance(workers, list):
+        workers = [workers] if workers else []
+    return workers
+
+
+def _page_count(data: Any, page_size: int) -> Optional[int]:
+    """Total pages from the v2 ``pagination`` block, or None when not reported."""
+    pagination = data.get("pagination") if isinstance(data, dict) else None
+    if not isinstance(pagination, dict):
+        return None
+    total = pagination.get("item_count") or pagination.get("total_items") or pagination.get("total")
+    try:
+        total = int(total)
+    except (TypeError, ValueError):
+        return None
+    return max((total + page_size - 1) // page_size, 1)
+
+
+def _worker_key(worker: Dict) -> str:
+    return str(worker.get("id") or worker.get("name") or worker.get("workerName") or id(worker))
+
+
+async def fetch_all_workers(
+    client: LuxorClient,
+    api_key: str,
+    params: Dict[str, Any],
+    page_size: int = LUXOR_PAGE_SIZE,
+    concurrency: int = LUXOR_PAGE_CONCURRENCY,
+    max_pages: int = LUXOR_MAX_PAGES,
+) -> Dict[str, Any]:
+    """
+    Fetch every page of workers. Page 1 reports the item count; the rest are
+    requested concurrently (at most ``concurrency`` in flight) and merged as
+    they arrive, de-duplicated by worker id/name. When the count is not
+    reported, pages are probed in waves of ``concurrency`` until a short
+    page comes back.
+
+    A failing page is retried once; if it still fails the workers from the
+    other pages are returned with ``partial`` set and the failed page
+    numbers listed. A failure on page 1 raises.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    merged: Dict[str, Dict] = {}
+    failed: List[int] = []
+    fetched = 0
+
+    def page_params(number: int) -> Dict[str, Any]:
+        return {**params, "page_number": number, "page_size": page_size}
+
+    def merge(data: Any) -> int:
+        nonlocal fetched
+        fetched += 1
+        workers = _worker_list(data)
+        for worker in workers:
+            merged[_worker_key(worker)] = worker
+        return len(workers)
+
+    async def fetch_page(number: int) -> Tuple[int, Any]:
+        async with semaphore:
+            error: Exception = RuntimeError("not fetched")
+            for _attempt in range(2):
+                try:
+                    return number, await client.get_json(WORKERS_PATH, api_key, page_params(number))
+                except LuxorRateLimited as exc:
+                    return number, exc
+                except Exception as exc:
+                    error = exc
+            return number, error
+
+    async def fetch_pages(numbers) -> List[int]:
+        sizes = []
+        for done in asyncio.as_completed([fetch_page(n) for n in numbers]):
+            number, data = await done
+            if isinstance(data, Exception):
+                logger.warning("Luxor worker page %d failed: %s", number, data)
+                failed.append(number)
+            else:
+                sizes.append(merge(data))
+        return sizes
+
+    first = await client.get_json(WORKERS_PATH, api_key, page_params(1))
+    first_size = merge(first)
+    total_pages = _page_count(first, page_size)
+    if total_pages is not None:
+        await fetch_pages(range(2, min(total_pages, max_pages) + 1))
+    else:
+        next_page, last_full = 2, first_size >= page_size
+        while last_full and next_page <= max_pages:
+            wave = range(next_page, min(next_page + concurrency, max_pages + 1))
+            sizes = await fetch_pages(wave)
+            next_page = wave.stop
+            last_full = len(sizes) == len(wave) and all(size >= page_size for size in sizes)
+
+    return {
+        "workers": list(merged.values()),
+        "pages": fetched,
+        "total_pages": total_pages,
+        "failed_pages": sorted(failed),
+        "partial": bool(failed),
+    }
+
+
+def _active_workers(workers: List[Dict]) -> List[Dict]:
+    # Filter to only ACTIVE workers (double-check even though we filter in query)
+    active_workers = [w for w in workers if w.get("status", "").upper() == "ACTIVE"]
+    logger.debug("Luxor API returned %d total workers, %d active", len(workers), len(active_workers))
+
+    # Calculate aggregate hashrate for logging
+    total_hashrate = sum(w.get("hashrate", 0) for w in active_workers)
+    total_hashrate_ths = total_hashrate / 1e12 if total_hashrate > 0 else 0
+    logger.debug("Luxor API active workers total hashrate: %.2f TH/s", total_hashrate_ths)
+    return active_workers
+
+
+async def get_luxor_sample(
+    api_key: str | None = None,
+    subaccount: str | None = None,
+    client: Optional[LuxorClient] = None,
+) -> Optional[Dict[str, Any]]:
     """
     Fetch worker data from the Luxor pool REST API v2 so the dashboard can
     compare local miner metrics to pool-side statistics.
-    
+
     Endpoint: /api/v2/pool/workers/BTC
     Query param: subaccount_names (not subaccount - per official v2 docs)
-    Returns worker hashrate, efficiency, and status for the specified subaccount.
+    Returns the cached fetch: ``workers`` (hashrate, efficiency and status
+    for the subaccount's active workers), ``fetched_at`` (epoch seconds when
+    Luxor was queried) and the paging details. Served from the shared
+    ``LuxorClient`` cache; stale data is returned while a background
+    refresh runs, so ``fetched_at`` can be well before now.
     """
-    api_key = api_key or os.getenv("LUXOR_API_KEY")
-    subaccount = subaccount or os.getenv("LUXOR_SUBACCOUNT") or LUXOR_DEFAULT_SUBACCOUNT
+    client = client or LUXOR_CLIENT
+    api_key, subaccount = _credentials(api_key, subaccount)
 
     if not api_key:
         logger.warning("LUXOR_API_KEY not found.")
@@ -86,47 +380,24 @@ async def get_luxor_data(api_key: str | None = None, subaccount: str | None = No
         logger.warning("LUXOR_SUBACCOUNT not configured.")
         return None
 
-    # Use Authorization header with API key
-    headers = {
-        "Authorization": api_key,
-        "Content-Type": "application/json",
-    }
-    
-    # Query parameters for filtering workers
+    # Query parameters for filtering workers; paging is added per request
     params = {
         "subaccount_names": subaccount,
         "status": "ACTIVE",
-        "limit": 250,
     }
 
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            url = f"{LUXOR_BASE_URL}/pool/workers/BTC"
-            logger.debug("📡 Luxor API Call → %s | params: %s", url, params)
-            response = await client.get(url, headers=headers, params=params)
-
-        response.raise_for_status()
-        data = response.json()
-
-        logger.debug("Luxor API response received: %s", data)
-        
-        # Transform Luxor API response format to match expected structure
-        # The API returns a list of workers or paginated results
-        workers = data.get("data", data.get("workers", []))
-        if not isinstance(workers, list):
-            workers = [workers] if workers else []
-        
-        # Filter to only ACTIVE workers (double-check even though we filter in query)
-        active_workers = [w for w in workers if w.get("status", "").upper() == "ACTIVE"]
-        logger.debug("Luxor API returned %d total workers, %d active", len(workers), len(active_workers))
-
-        # Calculate aggregate hashrate for logging
-        total_hashrate = sum(w.get("hashrate", 0) for w in active_workers)
-        total_hashrate_ths = total_hashrate / 1e12 if total_hashrate > 0 else 0
-        
-        logger.debug("Luxor API active workers total hashrate: %.2f TH/s", total_hashrate_ths)
-        return active_workers
+    async def load() -> Dict[str, Any]:
+        fetched_at = time()
+        result = await fetch_all_workers(client, api_key, params)
+        result["workers"] = _active_workers(result["workers"])
+        result["fetched_at"] = fetched_at
+        return result
 
+    try:
+        return await client.cached(f"workers:{subaccount}", load)
+    except LuxorRateLimited as exc:
+        logger.warning("Luxor API unavailable: %s", exc)
+        return None
     except httpx.HTTPStatusError as exc:
         body = exc.response.text if exc.response is not None else "no body"
         logger.error("Luxor API HTTP error (%s): %s", exc.response.status_code, body)
@@ -134,3 +405,31 @@ async def get_luxor_data(api_key: str | None = None, subaccount: str | None = No
     except Exception as exc:
         logger.error("Error fetching Luxor data: %s", exc)
         return None
+
+
+async def get_luxor_data(
+    api_key: str | None = None,
+    subaccount: str | None = None,
+    client: Optional[LuxorClient] = None,
+) -> Optional[List[Dict]]:
+    """Active Luxor workers for the subaccount (see ``get_luxor_sample``)."""
+    sample = await get_luxor_sample(api_key, subaccount, client)
+    return sample["workers"] if sample is not None else None
+
+
+# Strong references to prefetch tasks: the event loop only keeps weak ones.
+_prefetches: "set[asyncio.Task]" = set()
+
+
+def _prefetch_done(task: asyncio.Task) -> None:
+    _prefetches.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Luxor prefetch failed: %s", task.exception())
+
+
+def prefetch_luxor_data() -> None:
+    """Warm the worker cache in the background so the first page load is fast."""
+    if os.getenv("LUXOR_API_KEY"):
+        task = asyncio.ensure_future(get_luxor_data())
+        _prefetches.add(task)
+        task.add_done_callback(_prefetch_done)
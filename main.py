@@ -1,14 +1,16 @@
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+import bisect
 import ipaddress
 import os
 import re
 import logging
-from typing import List, Dict, Any, Optional
-from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict, defaultdict
 from contextlib import suppress
-from time import time
+from datetime import datetime, timezone
+from time import monotonic, time
 from dotenv import load_dotenv
-from luxor_api import get_luxor_data
+from luxor_api import LUXOR_CLIENT, get_luxor_data, get_luxor_sample, prefetch_luxor_data
 
 load_dotenv()
 
@@ -19,6 +21,15 @@ def _env_flag(name: str, default: bool = True) -> bool:
     return raw.strip().lower() not in {"0", "false", "off", "no"}
 
 
+def shared_state_enabled() -> bool:
+    """SHARED_STATE, defaulting to on only when WEB_CONCURRENCY asks for several workers."""
+    try:
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    except ValueError:
+        workers = 1
+    return _env_flag("SHARED_STATE", workers > 1)
+
+
 def _extra_networks_from_env() -> List[ipaddress.IPv4Network]:
     extra_networks = []
     cidr_blob = os.getenv("LAN_EXTRA_CIDRS", "")
@@ -33,65 +44,135 @@ def _extra_networks_from_env() -> List[ipaddress.IPv4Network]:
     return extra_networks
 
 
+class CidrTable:
+    """IPv4 networks merged into sorted, non-overlapping integer ranges for bisect lookup."""
+
+    def __init__(self, networks: List[ipaddress.IPv4Network]):
+        ranges = sorted((int(net.network_address), int(net.broadcast_address)) for net in networks)
+        starts: List[int] = []
+        ends: List[int] = []
+        for start, end in ranges:
+            if ends and start <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self._starts = starts
+        self._ends = ends
+
+    def __contains__(self, address: int) -> bool:
+        idx = bisect.bisect_right(self._starts, address) - 1
+        return idx >= 0 and address <= self._ends[idx]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+
+LAN_BASE_NETWORKS = [
+    ipaddress.IPv4Network('127.0.0.0/8'),
+    ipaddress.IPv4Network('10.0.0.0/8'),
+    ipaddress.IPv4Network('172.16.0.0/12'),
+    ipaddress.IPv4Network('192.168.0.0/16'),
+]
+LAN_DECISION_CACHE_SIZE = 4096
+
+
 # Restrict access to LAN by default (except for login)
-class LANOnlyMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        base_prefixes = [
-            ipaddress.IPv4Network('127.0.0.0/8'),
-            ipaddress.IPv4Network('10.0.0.0/8'),
-            ipaddress.IPv4Network('172.16.0.0/12'),
-            ipaddress.IPv4Network('192.168.0.0/16'),
-        ]
-        self.allowed_prefixes = base_prefixes + _extra_networks_from_env()
-        self.lan_enforcement_enabled = _env_flag("LAN_ONLY_MODE", True)
-
-    async def dispatch(self, request, call_next):
-        if not self.lan_enforcement_enabled:
-            return await call_next(request)
-        path = request.url.path
-        # Allow login/logout for all, but restrict dashboard/API to LAN
-        if path.startswith('/static') or path.startswith('/login') or path.startswith('/logout'):
-            return await call_next(request)
+class LANOnlyMiddleware:
+    """
+    Pure ASGI: no per-request task or body streaming wrapper. Client
+    addresses are classified once against a ``CidrTable`` and the decision
+    is cached per IP; off-LAN clients still need an admin session, read from
+    the scope populated by the (outer) SessionMiddleware.
+    """
+
+    def __init__(self, app, admin_username: Optional[str] = None, networks: Optional[List[ipaddress.IPv4Network]] = None):
+        self.app = app
+        self.admin_username = admin_username
+        self.table = CidrTable(networks if networks is not None else LAN_BASE_NETWORKS + _extra_networks_from_env())
         # In cloud environments, skip IP validation
-        if os.getenv("RENDER") or os.getenv("ENVIRONMENT") == "production":
-            return await call_next(request)
-        client_ip = request.client.host
+        cloud = bool(os.getenv("RENDER")) or os.getenv("ENVIRONMENT") == "production"
+        self.lan_enforcement_enabled = _env_flag("LAN_ONLY_MODE", True) and not cloud
+        self._decisions: "OrderedDict[str, Optional[bool]]" = OrderedDict()
+
+    def is_lan(self, host: Optional[str]) -> Optional[bool]:
+        """True/False for a LAN/non-LAN IPv4 client, None for an unparseable address."""
+        if host is None:
+            return None
+        decision = self._decisions.get(host, ...)
+        if decision is not ...:
+            self._decisions.move_to_end(host)
+            return decision
         try:
-            ip = ipaddress.IPv4Address(client_ip)
-            if not any(ip in net for net in self.allowed_prefixes):
-                # If not LAN, require authentication
-                if not (request.session.get("user") == AUTH_CONFIG["admin_username"]):
-                    return HTMLResponse("<h3>Access denied: LAN only</h3>", status_code=403)
-        except Exception:
-            return HTMLResponse("<h3>Access denied: Invalid IP</h3>", status_code=403)
-        return await call_next(request)
-
-
-# Cache control middleware for development (disable caching on /static for live updates)
-class CacheControlMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        # Disable caching for static files in development mode (allow fresh reloads)
-        if request.url.path.startswith('/static'):
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate, max-age=0"
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-        return response
+            decision = int(ipaddress.IPv4Address(host)) in self.table
+        except ValueError:
+            decision = None
+        self._decisions[host] = decision
+        if len(self._decisions) > LAN_DECISION_CACHE_SIZE:
+            self._decisions.popitem(last=False)  # least recently seen client
+        return decision
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.lan_enforcement_enabled:
+            return await self.app(scope, receive, send)
+        path = scope["path"]
+        # Allow login/logout for all, but restrict dashboard/API to LAN
+        # (/ingest is bearer-token authenticated by the route itself)
+        if path.startswith(('/static', '/login', '/logout')) or path == '/ingest':
+            return await self.app(scope, receive, send)
+        client = scope.get("client")
+        decision = self.is_lan(client[0] if client else None)
+        if decision is None:
+            return await HTMLResponse("<h3>Access denied: Invalid IP</h3>", status_code=403)(scope, receive, send)
+        if not decision:
+            # If not LAN, require authentication
+            session = scope.get("session") or {}
+            admin = self.admin_username or AUTH_CONFIG["admin_username"]
+            if session.get("user") != admin:
+                return await HTMLResponse("<h3>Access denied: LAN only</h3>", status_code=403)(scope, receive, send)
+        return await self.app(scope, receive, send)
+
+
+# Cache control middleware for development (disable caching on /static for live updates).
+# With the production static pipeline enabled, PrecompressedStaticFiles sets caching instead.
+class CacheControlMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith('/static'):
+            return await self.app(scope, receive, send)
+
+        async def send_no_cache(message):
+            if message["type"] == "http.response.start":
+                # Disable caching for static files in development mode (allow fresh reloads)
+                headers = MutableHeaders(scope=message)
+                headers["Cache-Control"] = "no-cache, no-store, must-revalidate, max-age=0"
+                headers["Pragma"] = "no-cache"
+                headers["Expires"] = "0"
+            await send(message)
+
+        return await self.app(scope, receive, send_no_cache)
 
 # Add middlewares AFTER the FastAPI app is created (see below)
 from fastapi import FastAPI, Request, Form, Response, status, Depends, Query
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse
+from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse, StreamingResponse
 import asyncio
 import json
-import httpx
 from pathlib import Path
 import secrets
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import RedirectResponse
 from tuning import auto_tune_miners, stats_to_tuning_payload
+from forecasting import ForecastRegistry
+from efficiency_model import EfficiencyModelRegistry
+from power_budget import curves_from_models, optimize_power_budget
+from profitability import ProfitabilityEngine
+from claude_client import ClaudeClient, InsightStreamParser, message_text
+from ai_context import ContextBuilder, latest_snapshot
+from response_encoding import EncodedPayload, columnar_fleet, columnar_history, json_response, telemetry_response
+from static_assets import STATIC_MAX_AGE, PrecompressedStaticFiles, StaticAssets
 AUTH_CONFIG_FILE = Path("auth_config.json")
 if AUTH_CONFIG_FILE.exists():
     with open(AUTH_CONFIG_FILE, 'r') as f:
@@ -104,13 +185,35 @@ logger = logging.getLogger("hashlab")
 app = FastAPI()
 # Use a persistent secret key if available, otherwise generate one (which invalidates sessions on restart)
 secret_key = os.getenv("SESSION_SECRET_KEY", secrets.token_hex(32))
-app.add_middleware(SessionMiddleware, secret_key=secret_key)
-app.add_middleware(CacheControlMiddleware)
+# Added innermost first: SessionMiddleware must wrap LANOnlyMiddleware so the
+# off-LAN admin check can read the session from the scope.
 app.add_middleware(LANOnlyMiddleware)
+# Fingerprinted, precompressed static files in production (STATIC_PIPELINE); no-cache otherwise.
+STATIC_ASSETS = StaticAssets()
+if not STATIC_ASSETS.enabled:
+    app.add_middleware(CacheControlMiddleware)
+app.add_middleware(SessionMiddleware, secret_key=secret_key)
 
 from miner_api import fetch_miner_stats
-from data_logger import log_miner_metrics, load_recent_metrics
+from data_logger import (
+    POOL_FILE,
+    SnapshotRecorder,
+    history_version,
+    load_recent_metrics,
+    load_recent_pool_metrics,
+    log_miner_metrics,
+    log_pool_metrics,
+    read_metrics_after,
+)
+from downsampling import decimate_history
+from fleet_index import FleetIndexCache, FleetQueryError, split_param
+from reconciliation import ReconciliationEngine
+from worker_mapping import WorkerMappingRegistry
 from btcrealtimetracker import btc_price_api, btc_price_api_24h
+from btcrealtimetracker.price_service import PRICE_SERVICE
+from gist_relay import GIST_CACHE_TTL, GIST_RAW_URL, GistRelay
+from ingest import INGEST_MAX_BYTES, IngestError, IngestStore, decode_batch, sample_epoch, token_matches
+from shared_state import FLEET_LEASE_TTL, Leadership, SharedState
 
 # Create directories if they don't exist
 Path("static").mkdir(exist_ok=True)
@@ -118,65 +221,56 @@ Path("templates").mkdir(exist_ok=True)
 
 # Cloud Mode Configuration
 CLOUD_MODE = _env_flag("CLOUD_MODE", False)
-GIST_RAW_URL = os.getenv(
-    "GIST_RAW_URL",
-    "https://gist.githubusercontent.com/harborglowvintage-oss/9e0d60bcc84c808f505f9a4bfea0bc2f/raw/miner_data.json"
-)
-GIST_CACHE_TTL = int(os.getenv("GIST_CACHE_TTL", "30"))  # Cache for 30 seconds by default
 
-# Gist data cache
-_gist_cache = {
-    "data": None,
-    "timestamp": 0,
-}
+# Kept fresh in the background in cloud mode; requests read the in-memory copy.
+GIST_RELAY = GistRelay()
+
 
 async def fetch_from_gist() -> Optional[Dict[str, Any]]:
-    """Fetch miner data from GitHub Gist with caching"""
-    now = time()
-    
-    # Return cached data if still valid
-    if _gist_cache["data"] and (now - _gist_cache["timestamp"]) < GIST_CACHE_TTL:
-        logger.debug("Using cached Gist data")
-        return _gist_cache["data"]
-    
-    logger.info("Fetching fresh data from Gist...")
-    try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.get(GIST_RAW_URL)
-            response.raise_for_status()
-            data = response.json()
-        
-        # Extract miners data from the Gist payload
-        miners_data = data.get("miners", {})
-        
-        # Update cache
-        _gist_cache["data"] = miners_data
-        _gist_cache["timestamp"] = now
-        
-        logger.info(f"Fetched {len(miners_data)} miner(s) from Gist (last_updated: {data.get('last_updated', 'unknown')})")
-        return miners_data
-    
-    except httpx.HTTPStatusError as e:
-        logger.error(f"HTTP error fetching from Gist: {e.response.status_code}")
-        # Return cached data even if expired, if available
-        if _gist_cache["data"]:
-            logger.warning("Returning stale cached data due to fetch error")
-            return _gist_cache["data"]
-        return None
-    except Exception as e:
-        logger.error(f"Error fetching from Gist: {e}")
-        # Return cached data even if expired, if available
-        if _gist_cache["data"]:
-            logger.warning("Returning stale cached data due to fetch error")
-            return _gist_cache["data"]
-        return None
+    """Miner data from the latest GitHub Gist snapshot (never blocks on a refresh)."""
+    return await GIST_RELAY.miners()
+
+
+# Samples pushed straight to /ingest by the sync agent (SYNC_TRANSPORT=ingest).
+INGEST_STORE = IngestStore()
+
+# Fleet state shared by all uvicorn workers (SQLite): one leader polls the
+# miners (or relays the Gist) and writes the logs; every worker serves the
+# leader's snapshot and the shared miner registry. On by default only when
+# more than one worker is configured; a single worker polls in-process.
+SHARED_STATE = SharedState() if shared_state_enabled() else None
+FLEET_LEADER = Leadership(SHARED_STATE) if SHARED_STATE is not None else None
+
+# In cloud mode, each new Gist/ingest snapshot becomes metric-log rows stamped
+# with its source last_updated, so history, charts and AI summaries have data.
+CLOUD_HISTORY = SnapshotRecorder()
+
+
+async def fetch_cloud_miners() -> Optional[Dict[str, Any]]:
+    """Newest miner map from either cloud source (direct ingest or the Gist relay)."""
+    pushed = INGEST_STORE.latest()
+    # With pushed data on hand, only consider a Gist snapshot that is already loaded.
+    relayed = GIST_RELAY.peek() if pushed is not None else await GIST_RELAY.payload()
+    if pushed is None:
+        return relayed.get("miners", {}) if relayed is not None else None
+    if relayed is not None and (sample_epoch(relayed) or 0) > (sample_epoch(pushed) or 0):
+        return relayed.get("miners", {})
+    return pushed["miners"]
 
 
 app.include_router(btc_price_api.router)
 app.include_router(btc_price_api_24h.router)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount(
+    "/static",
+    PrecompressedStaticFiles(
+        directory="static",
+        cache_control=f"public, max-age={STATIC_MAX_AGE}" if STATIC_ASSETS.enabled else None,
+    ),
+    name="static",
+)
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = STATIC_ASSETS.url
 
 hostname_label_re = re.compile(r"^(?!-)[A-Za-z0-9-]{1,63}(?<!-)$")
 
@@ -231,6 +325,8 @@ AI_HISTORY_LIMIT = int(os.getenv("AI_HISTORY_LIMIT", "288"))
 TEMP_ALERT_THRESHOLD = float(os.getenv("AI_TEMP_THRESHOLD", "78"))
 EFFICIENCY_ALERT_THRESHOLD = float(os.getenv("AI_EFFICIENCY_THRESHOLD", "42"))
 SHARE_REJECT_ALERT = float(os.getenv("AI_REJECT_THRESHOLD", "2"))
+FORECAST_HORIZON = int(os.getenv("FORECAST_HORIZON", "12"))  # samples ahead
+TUNING_HISTORY_LIMIT = int(os.getenv("TUNING_HISTORY_LIMIT", "2000"))
 ALLOWED_JSON_TASKS = [
     {
         "id": "fleet-overview",
@@ -363,6 +459,30 @@ def summarize_history(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+# Holt forecasts are advanced incrementally as new rows show up, so every
+# summary below reuses the cached fit instead of refitting the window.
+FORECASTS = ForecastRegistry()
+
+
+def summarize_history_with_forecast(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = summarize_history(rows)
+    if rows:
+        FORECASTS.observe_rows(rows)
+        forecast = FORECASTS.fleet_forecast(FORECAST_HORIZON)
+        summary["forecast"] = forecast
+        if forecast.get("hashrate"):
+            summary["fleet_hash_trend"] = forecast["hashrate"]["trend"]
+    return summary
+
+
+def _forecast_clause(forecast: Optional[Dict[str, Any]], fmt) -> str:
+    if not forecast or not forecast.get("points"):
+        return ""
+    last = forecast["points"][-1]
+    spread = (last["upper"] - last["lower"]) / 2
+    return f" · {last['step']}-sample outlook {fmt(last['value'])} (±{fmt(spread)})"
+
+
 def analyze_fleet_overview(
     stats: Dict[str, Dict[str, Any]],
     history_summary: Optional[Dict[str, Any]] = None
@@ -402,6 +522,10 @@ def analyze_fleet_overview(
     else:
         observations.append(f"🔴 FLEET AVAILABILITY: Critical - only {availability_pct:.1f}% online ({len(online)}/{len(miners)} miners)")
     
+    forecast = (history_summary or {}).get("forecast") or {}
+    hash_outlook = _forecast_clause(forecast.get("hashrate"), _fmt_ths)
+    temp_outlook = _forecast_clause(forecast.get("temp"), _fmt_temp)
+
     # Observation 2: Hashrate Performance
     if history_summary and history_summary.get("total_hash_series"):
         series = history_summary["total_hash_series"]
@@ -413,11 +537,11 @@ def analyze_fleet_overview(
             performance_vs_peak = (current / peak * 100) if peak > 0 else 0
             
             if performance_vs_peak >= 95:
-                observations.append(f"📈 HASHRATE TREND: Excellent - {trend.upper()} at {_fmt_ths(current)} ({performance_vs_peak:.1f}% of peak)")
+                observations.append(f"📈 HASHRATE TREND: Excellent - {trend.upper()} at {_fmt_ths(current)} ({performance_vs_peak:.1f}% of peak){hash_outlook}")
             elif performance_vs_peak >= 85:
-                observations.append(f"📊 HASHRATE TREND: Good - {trend.upper()} at {_fmt_ths(current)} ({performance_vs_peak:.1f}% of peak)")
+                observations.append(f"📊 HASHRATE TREND: Good - {trend.upper()} at {_fmt_ths(current)} ({performance_vs_peak:.1f}% of peak){hash_outlook}")
             else:
-                observations.append(f"📉 HASHRATE TREND: Below optimal - {trend.upper()} at {_fmt_ths(current)} ({performance_vs_peak:.1f}% of peak)")
+                observations.append(f"📉 HASHRATE TREND: Below optimal - {trend.upper()} at {_fmt_ths(current)} ({performance_vs_peak:.1f}% of peak){hash_outlook}")
         else:
             observations.append(f"📊 HASHRATE TREND: Current output at {_fmt_ths(total_hash)} - collecting baseline data")
     else:
@@ -427,13 +551,13 @@ def analyze_fleet_overview(
     if avg_temp:
         temp_margin = TEMP_ALERT_THRESHOLD - avg_temp
         if temp_margin > 10:
-            observations.append(f"🌡️ TEMPS CREEPING UP: Excellent thermal margin at {avg_temp:.1f}°C ({temp_margin:.1f}°C below threshold)")
+            observations.append(f"🌡️ TEMPS CREEPING UP: Excellent thermal margin at {avg_temp:.1f}°C ({temp_margin:.1f}°C below threshold){temp_outlook}")
         elif temp_margin > 5:
-            observations.append(f"🌡️ TEMPS CREEPING UP: Good cooling at {avg_temp:.1f}°C ({temp_margin:.1f}°C below threshold)")
+            observations.append(f"🌡️ TEMPS CREEPING UP: Good cooling at {avg_temp:.1f}°C ({temp_margin:.1f}°C below threshold){temp_outlook}")
         elif temp_margin > 0:
-            observations.append(f"⚠️ TEMPS CREEPING UP: Approaching limit at {avg_temp:.1f}°C (only {temp_margin:.1f}°C margin)")
+            observations.append(f"⚠️ TEMPS CREEPING UP: Approaching limit at {avg_temp:.1f}°C (only {temp_margin:.1f}°C margin){temp_outlook}")
         else:
-            observations.append(f"🔴 TEMPS CREEPING UP: Critical - {avg_temp:.1f}°C exceeds threshold by {abs(temp_margin):.1f}°C")
+            observations.append(f"🔴 TEMPS CREEPING UP: Critical - {avg_temp:.1f}°C exceeds threshold by {abs(temp_margin):.1f}°C{temp_outlook}")
     else:
         observations.append("🌡️ TEMPS CREEPING UP: No temperature data available from miners")
     
@@ -653,6 +777,36 @@ TASK_HANDLERS = {
 }
 
 
+def periodic_logger_enabled() -> bool:
+    # Only in development, not in production/cloud environments
+    if os.getenv("RENDER") or os.getenv("ENVIRONMENT") == "production" or CLOUD_MODE:
+        return False
+    return DATA_LOG_INTERVAL > 0
+
+
+_pool_logged: Dict[str, Any] = {"fetched_at": None}
+
+
+async def log_pool_sample() -> None:
+    """Log each Luxor fetch once, stamped with when Luxor was queried rather than when the cache was read."""
+    sample = await get_luxor_sample()
+    if sample is None or sample.get("fetched_at") == _pool_logged["fetched_at"]:
+        return  # unchanged cache entry (fresh hit, or stale while refreshes fail)
+    _pool_logged["fetched_at"] = sample["fetched_at"]
+    stamp = datetime.fromtimestamp(sample["fetched_at"], tz=timezone.utc).isoformat()
+    await log_pool_metrics(pool_miners_from_workers(sample["workers"]), stamp)
+
+
+async def log_pool_alongside(_payload: Any = None) -> None:
+    """Log the pool sample wherever miner metrics are logged (also usable as a Gist listener)."""
+    if not os.getenv("LUXOR_API_KEY"):
+        return
+    try:
+        await log_pool_sample()
+    except Exception as exc:
+        logger.warning("Failed to log pool metrics: %s", exc)
+
+
 async def periodic_metric_logger():
     if DATA_LOG_INTERVAL <= 0:
         logger.warning("DATA_LOG_INTERVAL<=0; periodic logger disabled.")
@@ -663,6 +817,7 @@ async def periodic_metric_logger():
             try:
                 stats = await gather_stats()
                 await log_miner_metrics(stats)
+                await log_pool_alongside()
             except Exception as exc:
                 logger.exception("Periodic metric logger failed: %s", exc)
             await asyncio.sleep(DATA_LOG_INTERVAL)
@@ -671,22 +826,89 @@ async def periodic_metric_logger():
         raise
 
 
+async def publish_cloud_payload(payload: Dict[str, Any]) -> None:
+    """Share a Gist/ingest snapshot with all workers (older snapshots are ignored)."""
+    await asyncio.to_thread(SHARED_STATE.publish, "fleet", payload.get("miners") or {}, sample_epoch(payload))
+
+
+async def record_ingested() -> None:
+    """Leader: write snapshots pushed to /ingest on any worker into the metric log, once each."""
+    queued = await asyncio.to_thread(SHARED_STATE.ingested)
+    if queued:
+        await CLOUD_HISTORY.record_many([sample for _, sample in queued])
+        await asyncio.to_thread(SHARED_STATE.ack_ingested, queued[-1][0])
+
+
+async def lead_fleet() -> None:
+    """This worker took the lease: it now polls/relays and writes the metric logs."""
+    if CLOUD_MODE:
+        CLOUD_HISTORY.reseed()  # the previous leader may have logged since this worker last did
+        GIST_RELAY.start()
+    else:
+        refresh_miners()
+        await prune_inactive_miners_on_startup()
+    if periodic_logger_enabled():
+        app.state.metric_logger_task = asyncio.create_task(periodic_metric_logger())
+
+
+async def step_down() -> None:
+    task = getattr(app.state, "metric_logger_task", None)
+    app.state.metric_logger_task = None
+    if task:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    if CLOUD_MODE:
+        await GIST_RELAY.aclose()
+
+
+async def poll_fleet() -> None:
+    """Leader tick: poll the miners once and publish the snapshot for every worker."""
+    if CLOUD_MODE:
+        # The Gist relay publishes through its listener; pushed snapshots are logged here.
+        await record_ingested()
+        await log_pool_alongside()
+        return
+    refresh_miners()
+    stats = await poll_local_miners()
+    await asyncio.to_thread(SHARED_STATE.publish, "fleet", stats, time())
+    if getattr(app.state, "metric_logger_task", None) is None:
+        # No periodic logger (production): log each polled snapshot, as /miner-data did per request.
+        await log_miner_metrics(stats)
+        await log_pool_alongside()
+
+
 @app.on_event("startup")
 async def startup_event():
+    # Read the fingerprinted asset manifest written by tools/build_static.py
+    await asyncio.to_thread(STATIC_ASSETS.load)
     # Log the operating mode
     if CLOUD_MODE:
         logger.info("*** CLOUD_MODE enabled - fetching miner data from GitHub Gist ***")
         logger.info(f"Gist URL: {GIST_RAW_URL}")
         logger.info(f"Cache TTL: {GIST_CACHE_TTL} seconds")
+        GIST_RELAY.add_listener(CLOUD_HISTORY.record)
+        if SHARED_STATE is not None:
+            GIST_RELAY.add_listener(publish_cloud_payload)  # relay runs on the leader only
+        else:
+            GIST_RELAY.add_listener(log_pool_alongside)
+            GIST_RELAY.start()
     else:
         logger.info("*** LOCAL MODE - polling miners directly from LAN ***")
-        await prune_inactive_miners_on_startup()
-    
-    # Only start periodic logger in development, not in production/cloud environments
-    if os.getenv("RENDER") or os.getenv("ENVIRONMENT") == "production" or CLOUD_MODE:
-        logger.info("Production/cloud environment detected - skipping periodic logger")
+        if SHARED_STATE is not None:
+            await asyncio.to_thread(SHARED_STATE.seed_registry, dict(MINERS), config_file_version())
+            refresh_miners()
+        else:
+            await prune_inactive_miners_on_startup()
+    prefetch_luxor_data()
+
+    app.state.metric_logger_task = None
+    if FLEET_LEADER is not None:
+        logger.info("Shared fleet state at %s (worker %s)", SHARED_STATE.path, os.getpid())
+        FLEET_LEADER.start(lead_fleet, poll_fleet, step_down)
         return
-    if DATA_LOG_INTERVAL <= 0:
+    if not periodic_logger_enabled():
+        logger.info("Production/cloud environment detected - skipping periodic logger")
         return
     task = asyncio.create_task(periodic_metric_logger())
     app.state.metric_logger_task = task
@@ -694,11 +916,17 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    if FLEET_LEADER is not None:
+        await FLEET_LEADER.aclose()
     task = getattr(app.state, "metric_logger_task", None)
     if task:
         task.cancel()
         with suppress(asyncio.CancelledError):
             await task
+    await CLAUDE_CLIENT.aclose()
+    await LUXOR_CLIENT.aclose()
+    await PRICE_SERVICE.aclose()
+    await GIST_RELAY.aclose()
 
 # Load miners from config file if it exists
 if CONFIG_FILE.exists():
@@ -709,13 +937,37 @@ if CONFIG_FILE.exists():
     except Exception as e:
         print(f"Error loading config: {e}")
 
+def config_file_version() -> int:
+    try:
+        return CONFIG_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
 def save_miners():
     try:
         with open(CONFIG_FILE, 'w') as f:
             json.dump(MINERS, f, indent=2)
+        if SHARED_STATE is not None:
+            # Written from the registry, so the next startup should not re-seed from it.
+            SHARED_STATE.note_file_version(config_file_version())
     except Exception as e:
         print(f"Error saving config: {e}")
 
+
+_registry_seen: Dict[str, Any] = {"version": None}
+
+
+def refresh_miners() -> None:
+    """Pick up /add-miner and /delete-miner changes made by any worker."""
+    if SHARED_STATE is None:
+        return
+    version, miners = SHARED_STATE.registry()
+    if version != _registry_seen["version"]:
+        MINERS.clear()
+        MINERS.update(miners)
+        _registry_seen["version"] = version
+
 async def detect_active_miners(miner_map: Dict[str, str]) -> Dict[str, str]:
     """Probe configured miners once and keep only those that respond."""
     items = list(miner_map.items())
@@ -730,6 +982,10 @@ async def detect_active_miners(miner_map: Dict[str, str]) -> Dict[str, str]:
     return active
 
 
+# With shared state the registry stays intact; the leader just skips these.
+PRUNED_MINERS: set = set()
+
+
 async def prune_inactive_miners_on_startup():
     if not MINERS:
         return
@@ -742,26 +998,71 @@ async def prune_inactive_miners_on_startup():
         len(inactive),
         ", ".join(inactive)
     )
+    if SHARED_STATE is not None:
+        PRUNED_MINERS.update(inactive)
+        return
     MINERS.clear()
     MINERS.update(active)
 
 
 async def gather_stats():
     """Gather miner statistics - from Gist in cloud mode, or directly from miners in local mode"""
+    return (await fleet_snapshot())[1]
+
+
+async def fleet_snapshot() -> Tuple[Optional[Tuple[str, int]], Dict[str, Dict[str, Any]]]:
+    """(version, stats) of the current fleet; the version is None for cloud snapshots."""
+    if SHARED_STATE is not None:
+        # The fleet leader's latest snapshot (same dict object until it changes).
+        shared = SHARED_STATE.versioned_snapshot(max_age=FLEET_LEASE_TTL)
+        if shared is not None:
+            return ("shared", shared[0]), shared[1]
+        # Nothing published yet, or nothing for a lease term (left over from before a
+        # restart, or the leader is stuck): use this worker's own sources.
     if CLOUD_MODE:
-        # Fetch from GitHub Gist in cloud mode
-        logger.debug("CLOUD_MODE enabled - fetching from Gist")
-        gist_data = await fetch_from_gist()
+        # Latest snapshot pushed to /ingest or relayed through the GitHub Gist
+        logger.debug("CLOUD_MODE enabled - reading cloud snapshot")
+        cloud_data = await fetch_cloud_miners()
         
-        if gist_data:
-            return gist_data
+        if cloud_data:
+            return None, cloud_data
         else:
-            # Fallback to empty data if Gist is unavailable
-            logger.warning("Gist data unavailable - returning empty miner stats")
-            return {}
+            # Fallback to empty data if neither source has data
+            logger.warning("Cloud miner data unavailable - returning empty miner stats")
+            return None, {}
     
-    # Local mode - poll miners directly
-    items = list(MINERS.items())
+    version, stats = await local_fleet_snapshot()
+    return ("local", version), stats
+
+
+# Local mode without a fleet leader: one poll serves every request for
+# FLEET_SNAPSHOT_TTL seconds (concurrent requests share the poll in flight),
+# and is numbered so /miner-data indexes and logs each poll once.
+FLEET_SNAPSHOT_TTL = float(os.getenv("FLEET_SNAPSHOT_TTL", "2"))
+_local_fleet: Dict[str, Any] = {"version": 0, "stats": None, "polled": 0.0, "poll": None, "logged": None}
+
+
+async def _poll_local_snapshot() -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    try:
+        stats = await poll_local_miners()
+        _local_fleet.update(version=_local_fleet["version"] + 1, stats=stats, polled=monotonic())
+        return _local_fleet["version"], stats
+    finally:
+        _local_fleet["poll"] = None
+
+
+async def local_fleet_snapshot() -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    if _local_fleet["stats"] is not None and monotonic() - _local_fleet["polled"] < FLEET_SNAPSHOT_TTL:
+        return _local_fleet["version"], _local_fleet["stats"]
+    if _local_fleet["poll"] is None:
+        _local_fleet["poll"] = asyncio.ensure_future(_poll_local_snapshot())
+    # Shield so a disconnecting client does not cancel the poll other requests wait on.
+    return await asyncio.shield(_local_fleet["poll"])
+
+
+async def poll_local_miners() -> Dict[str, Dict[str, Any]]:
+    """Poll every configured (and not pruned) miner directly."""
+    items = [(name, ip) for name, ip in MINERS.items() if name not in PRUNED_MINERS]
     tasks = [fetch_miner_stats(name, ip) for name, ip in items]
     results = await asyncio.gather(*tasks)
     enriched = {}
@@ -909,335 +1210,340 @@ async def analytics_claude_widget(request: Request):
     return templates.TemplateResponse("analytics_claude.html", {"request": request})
 
 
-def _build_claude_prompt(mining_data: Dict[str, Any]) -> str:
+# Pooled, caching Messages client shared by every insights request.
+CLAUDE_CLIENT = ClaudeClient()
+# Budgeted prompt context, cached per fleet/history snapshot.
+AI_CONTEXT = ContextBuilder()
+
+
+def _build_claude_prompt(context_text: str) -> str:
     instructions = (
         "You are an expert cryptocurrency mining analyst specializing in hashrate optimization, cooling, and uptime.\n"
-        "Analyze the following mining operation snapshot and return actionable insights.\n\n"
+        "Analyze the following mining operation snapshot and return actionable insights.\n"
+        "The context is compact JSON: 'fleet' totals, 'miners' rows (columns in 'cols', worst first), "
+        "'hist' series as a first value plus deltas, and 'client' data from the dashboard.\n\n"
         "Mining Data:\n"
     )
-    return f"{instructions}{json.dumps(mining_data, indent=2)}\n\n" \
+    return f"{instructions}{context_text}\n\n" \
         "Respond with a JSON array of objects with keys: type (critical/warning/success/info), " \
         "icon (emoji), title (<=50 chars), description, recommendation."
 
 
-@app.post("/analytics/claude-insights")
-async def analytics_claude_insights(request: Request):
-    if not is_authenticated(request):
-        return JSONResponse({"success": False, "error": "Unauthorized"}, status_code=401)
-    try:
-        payload = await request.json()
-    except Exception:
-        return JSONResponse({"success": False, "error": "Invalid JSON payload"}, status_code=400)
-
-    mining_data = payload.get("mining_data")
-    if mining_data is None:
-        return JSONResponse({"success": False, "error": "Missing mining_data"}, status_code=400)
-
-    claude_key = os.getenv("CLAUDE_API_KEY")
-    claude_model = os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
-    claude_version = os.getenv("CLAUDE_API_VERSION", "2023-06-01")
-    claude_url = os.getenv("CLAUDE_API_URL", "https://api.anthropic.com/v1/messages")
-
-    if not claude_key:
-        logger.info("CLAUDE_API_KEY not found. Generating insights from fleet analysis.")
-        # Generate insights from fleet overview analysis
-        stats = await gather_stats()
-        miners = list(stats.values())
-        online = [m for m in miners if m.get("alive")]
-        history_rows = await asyncio.to_thread(load_recent_metrics, AI_HISTORY_LIMIT)
-        history_summary = summarize_history(history_rows)
-        
-        # Generate 6 direct insights
-        insights = []
+async def build_fleet_analysis_insights() -> List[Dict[str, Any]]:
+    """Rule-based insights from live stats and history, used when no Claude key is set."""
+    stats = await gather_stats()
+    miners = list(stats.values())
+    online = [m for m in miners if m.get("alive")]
+    history_rows = await asyncio.to_thread(load_recent_metrics, AI_HISTORY_LIMIT)
+    history_summary = summarize_history_with_forecast(history_rows)
+    
+    # Generate 6 direct insights
+    insights = []
+    
+    # 1. Fleet Availability
+    availability_pct = (len(online) / len(miners) * 100) if miners else 0
+    if availability_pct == 100:
+        insights.append({
+            "type": "success",
+            "icon": "✅",
+            "title": "Fleet Availability",
+            "description": f"Perfect uptime - all {len(miners)} miners online and operational",
+            "recommendation": "Maintain current monitoring schedule and power infrastructure"
+        })
+    elif availability_pct >= 80:
+        insights.append({
+            "type": "success",
+            "icon": "✅",
+            "title": "Fleet Availability",
+            "description": f"Strong uptime at {availability_pct:.1f}% ({len(online)}/{len(miners)} online)",
+            "recommendation": "Check offline miners and verify network connectivity"
+        })
+    else:
+        insights.append({
+            "type": "critical",
+            "icon": "🔴",
+            "title": "Fleet Availability",
+            "description": f"Critical - only {availability_pct:.1f}% online ({len(online)}/{len(miners)} miners)",
+            "recommendation": "Immediate action required: check power, network, and restart offline miners"
+        })
+    
+    # 2. Hashrate Trend
+    total_hash = sum(m.get("hashrate_1m", 0) for m in online)
+    if history_summary and history_summary.get("total_hash_series") and len(history_summary["total_hash_series"]) >= 3:
+        series = history_summary["total_hash_series"]
+        peak = max(series)
+        current = series[-1]
+        trend = history_summary.get("fleet_hash_trend", "stable")
+        performance_vs_peak = (current / peak * 100) if peak > 0 else 0
         
-        # 1. Fleet Availability
-        availability_pct = (len(online) / len(miners) * 100) if miners else 0
-        if availability_pct == 100:
+        if performance_vs_peak >= 95:
             insights.append({
                 "type": "success",
-                "icon": "✅",
-                "title": "Fleet Availability",
-                "description": f"Perfect uptime - all {len(miners)} miners online and operational",
-                "recommendation": "Maintain current monitoring schedule and power infrastructure"
+                "icon": "📈",
+                "title": "Hashrate Trend",
+                "description": f"Excellent - {trend.upper()} at {current:.2f} TH/s ({performance_vs_peak:.1f}% of peak)",
+                "recommendation": "Keep current profiles; re-run analysis if hashrate dips below 95% of target"
             })
-        elif availability_pct >= 80:
+        elif performance_vs_peak >= 85:
             insights.append({
-                "type": "success",
-                "icon": "✅",
-                "title": "Fleet Availability",
-                "description": f"Strong uptime at {availability_pct:.1f}% ({len(online)}/{len(miners)} online)",
-                "recommendation": "Check offline miners and verify network connectivity"
+                "type": "info",
+                "icon": "📊",
+                "title": "Hashrate Trend",
+                "description": f"Good - {trend.upper()} at {current:.2f} TH/s ({performance_vs_peak:.1f}% of peak)",
+                "recommendation": "Monitor for further decline; consider re-tuning if performance drops"
             })
         else:
             insights.append({
-                "type": "critical",
-                "icon": "🔴",
-                "title": "Fleet Availability",
-                "description": f"Critical - only {availability_pct:.1f}% online ({len(online)}/{len(miners)} miners)",
-                "recommendation": "Immediate action required: check power, network, and restart offline miners"
+                "type": "warning",
+                "icon": "📉",
+                "title": "Hashrate Trend",
+                "description": f"Below optimal - {trend.upper()} at {current:.2f} TH/s ({performance_vs_peak:.1f}% of peak)",
+                "recommendation": "Investigate underperforming miners and check for throttling or cooling issues"
             })
-        
-        # 2. Hashrate Trend
-        total_hash = sum(m.get("hashrate_1m", 0) for m in online)
-        if history_summary and history_summary.get("total_hash_series") and len(history_summary["total_hash_series"]) >= 3:
-            series = history_summary["total_hash_series"]
-            peak = max(series)
-            current = series[-1]
-            trend = history_summary.get("fleet_hash_trend", "stable")
-            performance_vs_peak = (current / peak * 100) if peak > 0 else 0
-            
-            if performance_vs_peak >= 95:
-                insights.append({
-                    "type": "success",
-                    "icon": "📈",
-                    "title": "Hashrate Trend",
-                    "description": f"Excellent - {trend.upper()} at {current:.2f} TH/s ({performance_vs_peak:.1f}% of peak)",
-                    "recommendation": "Keep current profiles; re-run analysis if hashrate dips below 95% of target"
-                })
-            elif performance_vs_peak >= 85:
-                insights.append({
-                    "type": "info",
-                    "icon": "📊",
-                    "title": "Hashrate Trend",
-                    "description": f"Good - {trend.upper()} at {current:.2f} TH/s ({performance_vs_peak:.1f}% of peak)",
-                    "recommendation": "Monitor for further decline; consider re-tuning if performance drops"
-                })
-            else:
-                insights.append({
-                    "type": "warning",
-                    "icon": "📉",
-                    "title": "Hashrate Trend",
-                    "description": f"Below optimal - {trend.upper()} at {current:.2f} TH/s ({performance_vs_peak:.1f}% of peak)",
-                    "recommendation": "Investigate underperforming miners and check for throttling or cooling issues"
-                })
-        else:
+    else:
+        insights.append({
+            "type": "info",
+            "icon": "📊",
+            "title": "Hashrate Trend",
+            "description": f"Current output at {total_hash:.2f} TH/s - collecting baseline data",
+            "recommendation": "Allow system to collect more samples for trend analysis"
+        })
+    
+    # 3. Temperature Status
+    temps = [m.get("temp", 0) for m in online if m.get("temp")]
+    avg_temp = sum(temps) / len(temps) if temps else None
+    if avg_temp:
+        temp_margin = TEMP_ALERT_THRESHOLD - avg_temp
+        if temp_margin > 10:
             insights.append({
-                "type": "info",
-                "icon": "📊",
-                "title": "Hashrate Trend",
-                "description": f"Current output at {total_hash:.2f} TH/s - collecting baseline data",
-                "recommendation": "Allow system to collect more samples for trend analysis"
+                "type": "success",
+                "icon": "🌡️",
+                "title": "Temperature Status",
+                "description": f"Excellent thermal margin at {avg_temp:.1f}°C ({temp_margin:.1f}°C below threshold)",
+                "recommendation": "Current cooling strategy is effective - maintain airflow and ambient conditions"
             })
-        
-        # 3. Temperature Status
-        temps = [m.get("temp", 0) for m in online if m.get("temp")]
-        avg_temp = sum(temps) / len(temps) if temps else None
-        if avg_temp:
-            temp_margin = TEMP_ALERT_THRESHOLD - avg_temp
-            if temp_margin > 10:
-                insights.append({
-                    "type": "success",
-                    "icon": "🌡️",
-                    "title": "Temperature Status",
-                    "description": f"Excellent thermal margin at {avg_temp:.1f}°C ({temp_margin:.1f}°C below threshold)",
-                    "recommendation": "Current cooling strategy is effective - maintain airflow and ambient conditions"
-                })
-            elif temp_margin > 5:
-                insights.append({
-                    "type": "info",
-                    "icon": "🌡️",
-                    "title": "Temperature Status",
-                    "description": f"Good cooling at {avg_temp:.1f}°C ({temp_margin:.1f}°C below threshold)",
-                    "recommendation": "Monitor temps during peak heat hours; prepare additional cooling if needed"
-                })
-            elif temp_margin > 0:
-                insights.append({
-                    "type": "warning",
-                    "icon": "⚠️",
-                    "title": "Temps Creeping Up",
-                    "description": f"Approaching limit at {avg_temp:.1f}°C (only {temp_margin:.1f}°C margin)",
-                    "recommendation": "Improve ventilation, check fans, and reduce ambient temperature immediately"
-                })
-            else:
-                insights.append({
-                    "type": "critical",
-                    "icon": "🔴",
-                    "title": "Critical Temperature",
-                    "description": f"Critical - {avg_temp:.1f}°C exceeds threshold by {abs(temp_margin):.1f}°C",
-                    "recommendation": "Emergency cooling required - reduce frequency or power down hot miners"
-                })
-        else:
+        elif temp_margin > 5:
             insights.append({
                 "type": "info",
                 "icon": "🌡️",
                 "title": "Temperature Status",
-                "description": "No temperature data available from miners",
-                "recommendation": "Verify temperature sensors are functioning properly"
+                "description": f"Good cooling at {avg_temp:.1f}°C ({temp_margin:.1f}°C below threshold)",
+                "recommendation": "Monitor temps during peak heat hours; prepare additional cooling if needed"
+            })
+        elif temp_margin > 0:
+            insights.append({
+                "type": "warning",
+                "icon": "⚠️",
+                "title": "Temps Creeping Up",
+                "description": f"Approaching limit at {avg_temp:.1f}°C (only {temp_margin:.1f}°C margin)",
+                "recommendation": "Improve ventilation, check fans, and reduce ambient temperature immediately"
             })
-        
-        # 4. Power Efficiency
-        total_power = sum(m.get("power", 0) for m in online)
-        fleet_efficiency = (total_power / total_hash) if total_hash > 0 else 0
-        if fleet_efficiency > 0:
-            if fleet_efficiency < EFFICIENCY_ALERT_THRESHOLD * 0.8:
-                insights.append({
-                    "type": "success",
-                    "icon": "⚡",
-                    "title": "Power Efficiency",
-                    "description": f"Excellent - fleet average {fleet_efficiency:.1f} W/TH, {total_power:.0f}W total draw",
-                    "recommendation": "Efficiency is optimal for current hardware mix - maintain settings"
-                })
-            elif fleet_efficiency < EFFICIENCY_ALERT_THRESHOLD:
-                insights.append({
-                    "type": "info",
-                    "icon": "ℹ️",
-                    "title": "Power Efficiency",
-                    "description": f"Good - fleet average {fleet_efficiency:.1f} W/TH, {total_power:.0f}W total draw",
-                    "recommendation": "Acceptable efficiency - consider tuning if power costs are critical"
-                })
-            else:
-                insights.append({
-                    "type": "warning",
-                    "icon": "⚠️",
-                    "title": "Power Efficiency",
-                    "description": f"Below target - fleet average {fleet_efficiency:.1f} W/TH, {total_power:.0f}W total",
-                    "recommendation": "Consider staging rigs into low-power mode or upgrading to more efficient hardware"
-                })
         else:
+            insights.append({
+                "type": "critical",
+                "icon": "🔴",
+                "title": "Critical Temperature",
+                "description": f"Critical - {avg_temp:.1f}°C exceeds threshold by {abs(temp_margin):.1f}°C",
+                "recommendation": "Emergency cooling required - reduce frequency or power down hot miners"
+            })
+    else:
+        insights.append({
+            "type": "info",
+            "icon": "🌡️",
+            "title": "Temperature Status",
+            "description": "No temperature data available from miners",
+            "recommendation": "Verify temperature sensors are functioning properly"
+        })
+    
+    # 4. Power Efficiency
+    total_power = sum(m.get("power", 0) for m in online)
+    fleet_efficiency = (total_power / total_hash) if total_hash > 0 else 0
+    if fleet_efficiency > 0:
+        if fleet_efficiency < EFFICIENCY_ALERT_THRESHOLD * 0.8:
+            insights.append({
+                "type": "success",
+                "icon": "⚡",
+                "title": "Power Efficiency",
+                "description": f"Excellent - fleet average {fleet_efficiency:.1f} W/TH, {total_power:.0f}W total draw",
+                "recommendation": "Efficiency is optimal for current hardware mix - maintain settings"
+            })
+        elif fleet_efficiency < EFFICIENCY_ALERT_THRESHOLD:
             insights.append({
                 "type": "info",
                 "icon": "ℹ️",
                 "title": "Power Efficiency",
-                "description": f"Drawing {total_power:.0f}W total - efficiency calculation pending",
-                "recommendation": "Wait for hashrate stabilization to calculate accurate efficiency metrics"
+                "description": f"Good - fleet average {fleet_efficiency:.1f} W/TH, {total_power:.0f}W total draw",
+                "recommendation": "Acceptable efficiency - consider tuning if power costs are critical"
             })
-        
-        # 5. Share Quality
-        total_accepted = sum(m.get("sharesAccepted", 0) for m in online)
-        total_rejected = sum(m.get("sharesRejected", 0) for m in online)
-        total_shares = total_accepted + total_rejected
-        reject_rate = (total_rejected / total_shares * 100) if total_shares > 0 else 0
-        
-        if reject_rate < 1:
+        else:
             insights.append({
-                "type": "success",
-                "icon": "✅",
-                "title": "Hashrate Stable",
-                "description": f"Excellent share quality - {reject_rate:.2f}% rejection rate ({total_accepted:,} accepted)",
-                "recommendation": "Pool connectivity is excellent - maintain current network configuration"
+                "type": "warning",
+                "icon": "⚠️",
+                "title": "Power Efficiency",
+                "description": f"Below target - fleet average {fleet_efficiency:.1f} W/TH, {total_power:.0f}W total",
+                "recommendation": "Consider staging rigs into low-power mode or upgrading to more efficient hardware"
             })
-        elif reject_rate < 2:
+    else:
+        insights.append({
+            "type": "info",
+            "icon": "ℹ️",
+            "title": "Power Efficiency",
+            "description": f"Drawing {total_power:.0f}W total - efficiency calculation pending",
+            "recommendation": "Wait for hashrate stabilization to calculate accurate efficiency metrics"
+        })
+    
+    # 5. Share Quality
+    total_accepted = sum(m.get("sharesAccepted", 0) for m in online)
+    total_rejected = sum(m.get("sharesRejected", 0) for m in online)
+    total_shares = total_accepted + total_rejected
+    reject_rate = (total_rejected / total_shares * 100) if total_shares > 0 else 0
+    
+    if reject_rate < 1:
+        insights.append({
+            "type": "success",
+            "icon": "✅",
+            "title": "Hashrate Stable",
+            "description": f"Excellent share quality - {reject_rate:.2f}% rejection rate ({total_accepted:,} accepted)",
+            "recommendation": "Pool connectivity is excellent - maintain current network configuration"
+        })
+    elif reject_rate < 2:
+        insights.append({
+            "type": "success",
+            "icon": "✅",
+            "title": "Hashrate Stable",
+            "description": f"Good share quality - {reject_rate:.2f}% rejection rate ({total_accepted:,} accepted)",
+            "recommendation": "Rejection rate is within normal range - continue monitoring"
+        })
+    elif reject_rate < 5:
+        insights.append({
+            "type": "warning",
+            "icon": "⚠️",
+            "title": "Elevated Rejections",
+            "description": f"Elevated rejections at {reject_rate:.2f}% ({total_rejected:,}/{total_shares:,} shares)",
+            "recommendation": "Check network latency to pool; consider switching to closer server"
+        })
+    else:
+        insights.append({
+            "type": "critical",
+            "icon": "🔴",
+            "title": "High Rejection Rate",
+            "description": f"Critical rejection rate at {reject_rate:.2f}% - pool connection issues detected",
+            "recommendation": "Immediate action: check network, switch pools, or verify miner configurations"
+        })
+    
+    # 6. Stability & Volatility
+    if history_summary and history_summary.get("total_hash_series") and len(history_summary["total_hash_series"]) >= 5:
+        series = history_summary["total_hash_series"]
+        recent = series[-5:]
+        volatility = max(recent) - min(recent)
+        avg_recent = sum(recent) / len(recent)
+        volatility_pct = (volatility / avg_recent * 100) if avg_recent > 0 else 0
+        
+        if volatility_pct < 5:
             insights.append({
                 "type": "success",
                 "icon": "✅",
-                "title": "Hashrate Stable",
-                "description": f"Good share quality - {reject_rate:.2f}% rejection rate ({total_accepted:,} accepted)",
-                "recommendation": "Rejection rate is within normal range - continue monitoring"
+                "title": "Stability",
+                "description": f"Highly stable - {volatility_pct:.1f}% variance over last {len(recent)} samples",
+                "recommendation": "Fleet is running consistently - no tuning required"
             })
-        elif reject_rate < 5:
+        elif volatility_pct < 10:
             insights.append({
-                "type": "warning",
-                "icon": "⚠️",
-                "title": "Elevated Rejections",
-                "description": f"Elevated rejections at {reject_rate:.2f}% ({total_rejected:,}/{total_shares:,} shares)",
-                "recommendation": "Check network latency to pool; consider switching to closer server"
+                "type": "info",
+                "icon": "📊",
+                "title": "Stability",
+                "description": f"Moderate fluctuation - {volatility_pct:.1f}% variance ({volatility:.2f} TH/s range)",
+                "recommendation": "Monitor for patterns; investigate if variance increases further"
             })
         else:
             insights.append({
-                "type": "critical",
-                "icon": "🔴",
-                "title": "High Rejection Rate",
-                "description": f"Critical rejection rate at {reject_rate:.2f}% - pool connection issues detected",
-                "recommendation": "Immediate action: check network, switch pools, or verify miner configurations"
+                "type": "warning",
+                "icon": "⚠️",
+                "title": "High Volatility",
+                "description": f"High volatility detected - {volatility_pct:.1f}% variance ({volatility:.2f} TH/s range)",
+                "recommendation": "Investigate unstable miners causing hashrate swings; check for thermal throttling"
             })
+    else:
+        insights.append({
+            "type": "info",
+            "icon": "📊",
+            "title": "Stability Analysis",
+            "description": f"Collecting stability metrics - {history_summary.get('samples', 0)} samples so far",
+            "recommendation": "Allow more time for historical data collection to establish stability baseline"
+        })
+    
+    # 7. Fan Speed & Cooling System
+    fan_speeds = [m.get("fanrpm", 0) for m in online if m.get("fanrpm")]
+    if fan_speeds:
+        avg_fan = sum(fan_speeds) / len(fan_speeds)
+        min_fan = min(fan_speeds)
+        max_fan = max(fan_speeds)
         
-        # 6. Stability & Volatility
-        if history_summary and history_summary.get("total_hash_series") and len(history_summary["total_hash_series"]) >= 5:
-            series = history_summary["total_hash_series"]
-            recent = series[-5:]
-            volatility = max(recent) - min(recent)
-            avg_recent = sum(recent) / len(recent)
-            volatility_pct = (volatility / avg_recent * 100) if avg_recent > 0 else 0
-            
-            if volatility_pct < 5:
-                insights.append({
-                    "type": "success",
-                    "icon": "✅",
-                    "title": "Stability",
-                    "description": f"Highly stable - {volatility_pct:.1f}% variance over last {len(recent)} samples",
-                    "recommendation": "Fleet is running consistently - no tuning required"
-                })
-            elif volatility_pct < 10:
-                insights.append({
-                    "type": "info",
-                    "icon": "📊",
-                    "title": "Stability",
-                    "description": f"Moderate fluctuation - {volatility_pct:.1f}% variance ({volatility:.2f} TH/s range)",
-                    "recommendation": "Monitor for patterns; investigate if variance increases further"
-                })
-            else:
-                insights.append({
-                    "type": "warning",
-                    "icon": "⚠️",
-                    "title": "High Volatility",
-                    "description": f"High volatility detected - {volatility_pct:.1f}% variance ({volatility:.2f} TH/s range)",
-                    "recommendation": "Investigate unstable miners causing hashrate swings; check for thermal throttling"
-                })
-        else:
+        # Fan speed health assessment (typical range: 3000-6000 RPM for mining ASICs)
+        if avg_fan >= 4000:
             insights.append({
-                "type": "info",
-                "icon": "📊",
-                "title": "Stability Analysis",
-                "description": f"Collecting stability metrics - {history_summary.get('samples', 0)} samples so far",
-                "recommendation": "Allow more time for historical data collection to establish stability baseline"
+                "type": "success",
+                "icon": "💨",
+                "title": "Cooling System",
+                "description": f"Strong airflow - average {avg_fan:.0f} RPM (range: {min_fan:.0f}-{max_fan:.0f} RPM)",
+                "recommendation": "Fan speeds are healthy; cooling system operating normally"
             })
-        
-        # 7. Fan Speed & Cooling System
-        fan_speeds = [m.get("fanrpm", 0) for m in online if m.get("fanrpm")]
-        if fan_speeds:
-            avg_fan = sum(fan_speeds) / len(fan_speeds)
-            min_fan = min(fan_speeds)
-            max_fan = max(fan_speeds)
-            
-            # Fan speed health assessment (typical range: 3000-6000 RPM for mining ASICs)
-            if avg_fan >= 4000:
-                insights.append({
-                    "type": "success",
-                    "icon": "💨",
-                    "title": "Cooling System",
-                    "description": f"Strong airflow - average {avg_fan:.0f} RPM (range: {min_fan:.0f}-{max_fan:.0f} RPM)",
-                    "recommendation": "Fan speeds are healthy; cooling system operating normally"
-                })
-            elif avg_fan >= 2500:
-                insights.append({
-                    "type": "info",
-                    "icon": "💨",
-                    "title": "Cooling System",
-                    "description": f"Moderate airflow - average {avg_fan:.0f} RPM (range: {min_fan:.0f}-{max_fan:.0f} RPM)",
-                    "recommendation": "Fan speeds adequate; monitor during high ambient temperatures"
-                })
-            elif avg_fan >= 1500:
-                insights.append({
-                    "type": "warning",
-                    "icon": "⚠️",
-                    "title": "Low Fan Speed",
-                    "description": f"Reduced airflow - average {avg_fan:.0f} RPM (range: {min_fan:.0f}-{max_fan:.0f} RPM)",
-                    "recommendation": "Check for fan failures or auto-tuning reducing speeds too much"
-                })
-            else:
-                insights.append({
-                    "type": "critical",
-                    "icon": "🔴",
-                    "title": "Critical Fan Speed",
-                    "description": f"Insufficient airflow - average {avg_fan:.0f} RPM (range: {min_fan:.0f}-{max_fan:.0f} RPM)",
-                    "recommendation": "Immediate action: verify fans are operational, replace failed units"
-                })
-        else:
+        elif avg_fan >= 2500:
             insights.append({
                 "type": "info",
                 "icon": "💨",
                 "title": "Cooling System",
-                "description": "No fan speed data available from miners",
-                "recommendation": "Verify fan speed reporting is enabled on miner firmware"
+                "description": f"Moderate airflow - average {avg_fan:.0f} RPM (range: {min_fan:.0f}-{max_fan:.0f} RPM)",
+                "recommendation": "Fan speeds adequate; monitor during high ambient temperatures"
             })
-        
-        return JSONResponse({"success": True, "source": "fleet-analysis", "insights": insights})
+        elif avg_fan >= 1500:
+            insights.append({
+                "type": "warning",
+                "icon": "⚠️",
+                "title": "Low Fan Speed",
+                "description": f"Reduced airflow - average {avg_fan:.0f} RPM (range: {min_fan:.0f}-{max_fan:.0f} RPM)",
+                "recommendation": "Check for fan failures or auto-tuning reducing speeds too much"
+            })
+        else:
+            insights.append({
+                "type": "critical",
+                "icon": "🔴",
+                "title": "Critical Fan Speed",
+                "description": f"Insufficient airflow - average {avg_fan:.0f} RPM (range: {min_fan:.0f}-{max_fan:.0f} RPM)",
+                "recommendation": "Immediate action: verify fans are operational, replace failed units"
+            })
+    else:
+        insights.append({
+            "type": "info",
+            "icon": "💨",
+            "title": "Cooling System",
+            "description": "No fan speed data available from miners",
+            "recommendation": "Verify fan speed reporting is enabled on miner firmware"
+        })
+    return insights
+
+
+async def _claude_insights_request(mining_data: Any) -> Optional[Tuple[str, Dict[str, str], Dict[str, Any]]]:
+    """Return (url, headers, body) for the Messages API, or None without a key."""
+    claude_key = os.getenv("CLAUDE_API_KEY")
+    if not claude_key:
+        return None
+    claude_model = os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
+    claude_version = os.getenv("CLAUDE_API_VERSION", "2023-06-01")
+    claude_url = os.getenv("CLAUDE_API_URL", "https://api.anthropic.com/v1/messages")
 
+    # Read the log version first: a write racing the load only costs a rebuild.
+    history_source = ("history", history_version())
+    history_rows = await asyncio.to_thread(load_recent_metrics, AI_HISTORY_LIMIT)
+    history_summary = summarize_history_with_forecast(history_rows)
+    context = AI_CONTEXT.build(
+        latest_snapshot(history_rows), history_summary, mining_data, source=history_source
+    )
     body = {
         "model": claude_model,
         "max_tokens": 800,
         "messages": [
-            {"role": "user", "content": _build_claude_prompt(mining_data)}
+            {"role": "user", "content": _build_claude_prompt(context["text"])}
         ],
     }
     headers = {
@@ -1245,20 +1551,38 @@ async def analytics_claude_insights(request: Request):
         "x-api-key": claude_key,
         "anthropic-version": claude_version,
     }
+    return claude_url, headers, body
+
+
+async def _read_mining_data(request: Request):
+    """Parse the widget payload; returns (mining_data, error_response)."""
+    if not is_authenticated(request):
+        return None, JSONResponse({"success": False, "error": "Unauthorized"}, status_code=401)
+    try:
+        payload = await request.json()
+    except Exception:
+        return None, JSONResponse({"success": False, "error": "Invalid JSON payload"}, status_code=400)
+    mining_data = payload.get("mining_data")
+    if mining_data is None:
+        return None, JSONResponse({"success": False, "error": "Missing mining_data"}, status_code=400)
+    return mining_data, None
+
+
+@app.post("/analytics/claude-insights")
+async def analytics_claude_insights(request: Request):
+    mining_data, error = await _read_mining_data(request)
+    if error:
+        return error
+
+    claude_request = await _claude_insights_request(mining_data)
+    if claude_request is None:
+        logger.info("CLAUDE_API_KEY not found. Generating insights from fleet analysis.")
+        insights = await build_fleet_analysis_insights()
+        return JSONResponse({"success": True, "source": "fleet-analysis", "insights": insights})
 
     try:
-        async with httpx.AsyncClient(timeout=20) as client:
-            resp = await client.post(claude_url, headers=headers, json=body)
-            resp.raise_for_status()
-            payload = resp.json()
-        content = payload.get("content") or []
-        analysis_text = ""
-        if content and isinstance(content, list):
-            chunk = content[0]
-            if isinstance(chunk, dict):
-                analysis_text = chunk.get("text") or ""
-            elif isinstance(chunk, str):
-                analysis_text = chunk
+        payload = await CLAUDE_CLIENT.create_message(*claude_request)
+        analysis_text = message_text(payload)
         clean_json = analysis_text.replace("```json", "").replace("```", "").strip()
         insights = json.loads(clean_json) if clean_json else SAMPLE_CLAUDE_INSIGHTS
         return JSONResponse({"success": True, "source": "claude", "insights": insights})
@@ -1266,46 +1590,110 @@ async def analytics_claude_insights(request: Request):
         logger.warning("Claude insights request failed: %s", exc)
         return JSONResponse({"success": True, "source": "sample", "insights": SAMPLE_CLAUDE_INSIGHTS})
 
-@app.get("/miner-data")
-async def miner_data(request: Request):
-    if not is_authenticated(request):
-        return JSONResponse({"error": "Unauthorized"}, status_code=401)
-    stats = await gather_stats()
-    try:
-        await log_miner_metrics(stats)
-    except Exception as e:
-        logger.warning(f"Failed to log metrics: {e}")
-    return stats
 
-@app.get("/api/pool-comparison")
-async def pool_comparison_data(request: Request):
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@app.post("/analytics/claude-insights/stream")
+async def analytics_claude_insights_stream(request: Request):
+    """Server-sent events: one ``insight`` event per object as soon as it completes."""
+    mining_data, error = await _read_mining_data(request)
+    if error:
+        return error
+    claude_request = await _claude_insights_request(mining_data)
+
+    async def events():
+        if claude_request is None:
+            insights = await build_fleet_analysis_insights()
+            for insight in insights:
+                yield _sse("insight", insight)
+            yield _sse("done", {"source": "fleet-analysis", "count": len(insights)})
+            return
+        parser = InsightStreamParser()
+        count = 0
+        try:
+            async for text in CLAUDE_CLIENT.stream_text(*claude_request):
+                for insight in parser.feed(text):
+                    count += 1
+                    yield _sse("insight", insight)
+        except Exception as exc:
+            logger.warning("Claude insights stream failed: %s", exc)
+            if not count:
+                for insight in SAMPLE_CLAUDE_INSIGHTS:
+                    yield _sse("insight", insight)
+                yield _sse("done", {"source": "sample", "count": len(SAMPLE_CLAUDE_INSIGHTS)})
+                return
+            yield _sse("error", {"error": "stream interrupted", "count": count})
+        yield _sse("done", {"source": "claude", "count": count})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Status/type/temperature-rank indexes over the current fleet snapshot, for
+# /miner-data queries (fields=, status=, type=, sort=, limit/offset).
+FLEET_INDEXES = FleetIndexCache()
+# Encoded full-fleet /miner-data body for the current snapshot version, so
+# every request for an unchanged snapshot reuses its serialised/compressed bytes.
+_fleet_payload: Dict[str, Any] = {"version": None, "payload": None}
+
+
+@app.get("/miner-data")
+async def miner_data(
+    request: Request,
+    fields: Optional[str] = None,
+    status: Optional[str] = None,
+    miner_type: Optional[str] = Query(None, alias="type"),
+    sort: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    offset: int = Query(0, ge=0)
+):
     if not is_authenticated(request):
         return JSONResponse({"error": "Unauthorized"}, status_code=401)
-    
-    # Fetch local data
-    local_data = await gather_stats()
-    
-    # Fetch pool data
-    pool_data_raw = await get_luxor_data()
-    
-    # Load miner-to-worker mapping
-    worker_mapping = {}
-    mapping_file = Path("pool_worker_mapping.json")
-    if mapping_file.exists():
+    version, stats = await fleet_snapshot()
+    if not CLOUD_MODE and SHARED_STATE is None and version != _local_fleet["logged"]:
+        # Cloud snapshots are logged once per source update by CLOUD_HISTORY,
+        # shared snapshots once per poll by the fleet leader, local polls once here.
+        _local_fleet["logged"] = version
         try:
-            with open(mapping_file, 'r') as f:
-                worker_mapping = json.load(f)
-                logger.debug("Loaded pool worker mapping: %s", list(worker_mapping.keys()))
+            await log_miner_metrics(stats)
         except Exception as e:
-            logger.warning("Failed to load pool worker mapping: %s", e)
-    
-    # Create reverse mapping: pool_worker_name -> local_miner_key
-    reverse_mapping = {v: k for k, v in worker_mapping.items()}
-    
+            logger.warning(f"Failed to log metrics: {e}")
+        await log_pool_alongside()
+    if not (fields or status or miner_type or sort or limit or offset):
+        payload = _fleet_payload["payload"]
+        if version is None or version != _fleet_payload["version"]:
+            # Cloud snapshots carry no version and are encoded per request.
+            payload = EncodedPayload(stats, columnar=columnar_fleet)
+            if version is not None:
+                _fleet_payload.update(version=version, payload=payload)
+        return telemetry_response(request, payload)
+    index = FLEET_INDEXES.index_for(stats, version)
+    try:
+        names, total = index.query(split_param(status), split_param(miner_type), sort, offset, limit)
+    except FleetQueryError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    payload = EncodedPayload(index.project(names, split_param(fields)), columnar=columnar_fleet)
+    response = telemetry_response(request, payload)
+    response.headers["X-Total-Count"] = str(total)
+    return response
+
+# Parsed once; re-read only when pool_worker_mapping.json changes on disk
+# (checked at most every WORKER_MAPPING_CHECK_INTERVAL seconds).
+WORKER_MAPPING = WorkerMappingRegistry()
+
+
+def pool_miners_from_workers(pool_data_raw: Optional[List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Key Luxor workers by local miner name via pool_worker_mapping.json."""
     # Process pool data (REST API v2 format)
     # Key by local miner name for easy matching in frontend
     pool_miners = {}
+    unmapped = []
     if pool_data_raw:
+        miner_for = WORKER_MAPPING.reverse().get
         for worker in pool_data_raw:
             # Only process ACTIVE workers
             worker_status = worker.get("status", "unknown").upper()
@@ -1317,8 +1705,8 @@ async def pool_comparison_data(request: Request):
             pool_worker_name = worker.get("name") or worker.get("workerName", "Unknown")
             
             # Look up corresponding local miner key using reverse mapping
-            if pool_worker_name in reverse_mapping:
-                local_miner_key = reverse_mapping[pool_worker_name]
+            local_miner_key = miner_for(pool_worker_name)
+            if local_miner_key is not None:
                 # Normalize hashrate from H/s (raw) to TH/s (display)
                 hashrate_raw = worker.get("hashrate", 0)
                 hashrate_ths = hashrate_raw / 1e12
@@ -1331,43 +1719,186 @@ async def pool_comparison_data(request: Request):
                     "updatedAt": worker.get("updatedAt") or worker.get("updated_at"),
                     "pool_name": pool_worker_name
                 }
-                logger.debug("Added pool worker %s -> local miner %s with %.2f TH/s", pool_worker_name, local_miner_key, hashrate_ths)
             else:
-                # Log unmapped workers but don't include them to avoid duplicates
-                logger.warning("Pool worker '%s' has no mapping in pool_worker_mapping.json", pool_worker_name)
+                # Unmapped workers are left out to avoid duplicates
+                unmapped.append(pool_worker_name)
+    if unmapped:
+        WORKER_MAPPING.note_unmapped(unmapped)
+    return pool_miners
+
+
+# Local and pool hashrate folded into per-miner time buckets; refreshed only
+# when either log has changed since the last read.
+RECONCILIATION = ReconciliationEngine()
+RECONCILE_HISTORY_LIMIT = int(os.getenv("RECONCILE_HISTORY_LIMIT", "5000"))
+_reconcile_versions: Dict[str, Any] = {}
+
+
+async def refresh_reconciliation() -> None:
+    versions = {"local": history_version(), "pool": history_version(POOL_FILE)}
+    if versions == _reconcile_versions:
+        return
+    local_rows, pool_rows = await asyncio.gather(
+        asyncio.to_thread(load_recent_metrics, RECONCILE_HISTORY_LIMIT),
+        asyncio.to_thread(load_recent_pool_metrics, RECONCILE_HISTORY_LIMIT),
+    )
+    RECONCILIATION.observe_local(local_rows)
+    RECONCILIATION.observe_pool(pool_rows)
+    _reconcile_versions.update(versions)
+
+
+@app.get("/api/pool-comparison")
+async def pool_comparison_data(request: Request):
+    if not is_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    
+    # Fetch local and pool data
+    local_data, pool_data_raw = await asyncio.gather(gather_stats(), get_luxor_data())
+    pool_miners = pool_miners_from_workers(pool_data_raw)
+    await refresh_reconciliation()
             
-    return {
+    return json_response(request, {
         "local": local_data,
         "pool": pool_miners,
+        "reconciliation": RECONCILIATION.summary(),
+        "unmapped_workers": WORKER_MAPPING.unmapped(),
         "timestamp": time()
+    })
+
+
+@app.get("/api/pool-mapping")
+async def pool_mapping(request: Request):
+    if not is_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    refresh_miners()
+    local_names = list(MINERS.keys())
+    return {
+        "mapping": WORKER_MAPPING.forward(),
+        "unmapped_workers": WORKER_MAPPING.unmapped(),
+        "suggestions": WORKER_MAPPING.suggestions(local_names)
+    }
+
+
+@app.get("/api/pool-comparison/history")
+async def pool_comparison_history(
+    request: Request,
+    miner: Optional[str] = None,
+    buckets: int = Query(96, ge=1, le=2016)
+):
+    if not is_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    await refresh_reconciliation()
+    names = [miner] if miner else RECONCILIATION.names()
+    return {
+        "bucket_seconds": RECONCILIATION.bucket_seconds,
+        "fleet": RECONCILIATION.fleet_series(buckets),
+        "miners": {name: RECONCILIATION.series(name, buckets) for name in names},
+        "rolling": {name: RECONCILIATION.rolling(name) for name in names}
     }
 
 
+# Chart payloads keyed by (limit, points, method, history version); the log's
+# mtime/size changes on every write, so entries never outlive their data.
+# Entries keep their encoded/compressed bodies, so cache hits skip serialising.
+HISTORY_CACHE_SIZE = int(os.getenv("HISTORY_CACHE_SIZE", "16"))
+_history_cache: "OrderedDict[tuple, EncodedPayload]" = OrderedDict()
+
+
 @app.get("/historical-metrics")
 async def historical_metrics(
     request: Request,
-    limit: int = Query(288, ge=10, le=2000)
+    limit: int = Query(288, ge=10, le=2000),
+    points: Optional[int] = Query(None, ge=16, le=2000),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$")
 ):
     if not is_authenticated(request):
         return JSONResponse({"error": "Unauthorized"}, status_code=401)
-    rows = await asyncio.to_thread(load_recent_metrics, limit)
-    summary = summarize_history(rows)
+    key = (limit, points, method, history_version())
+    payload = _history_cache.get(key)
+    if payload is None:
+        rows = await asyncio.to_thread(load_recent_metrics, limit)
+        summary = summarize_history_with_forecast(rows)
+        data = rows
+        if points:
+            data, summary = decimate_history(rows, summary, points, method)
+        payload = EncodedPayload({
+            "success": True,
+            "samples": len(rows),
+            "limit": limit,
+            "points": points,
+            "data": data,
+            "summary": summary
+        }, columnar=columnar_history)
+        _history_cache[key] = payload
+        while len(_history_cache) > HISTORY_CACHE_SIZE:
+            _history_cache.popitem(last=False)
+    else:
+        _history_cache.move_to_end(key)
+    return telemetry_response(request, payload)
+
+
+@app.get("/historical-metrics/forecast")
+async def historical_forecast(
+    request: Request,
+    horizon: int = Query(FORECAST_HORIZON, ge=1, le=288)
+):
+    if not is_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    rows = await asyncio.to_thread(load_recent_metrics, AI_HISTORY_LIMIT)
+    FORECASTS.observe_rows(rows)
     return JSONResponse({
         "success": True,
-        "samples": len(rows),
-        "limit": limit,
-        "data": rows,
-        "summary": summary
+        "horizon": horizon,
+        "fleet": FORECASTS.fleet_forecast(horizon),
+        "miners": FORECASTS.miner_forecasts(horizon)
     })
 
 
+# Revenue/power-cost ledgers; log rows are integrated once as they appear and
+# priced from the BTC price service's in-memory history.
+PROFITABILITY = ProfitabilityEngine(PRICE_SERVICE.history)
+_profit_cursor: Dict[str, Any] = {"cursor": None}
+
+
+async def integrate_profitability() -> None:
+    """Feed every log row appended since the last call (not just a recent window) to PROFITABILITY."""
+    while True:
+        rows, cursor = await asyncio.to_thread(read_metrics_after, _profit_cursor["cursor"])
+        _profit_cursor["cursor"] = cursor
+        if not rows:
+            return
+        PROFITABILITY.observe_rows(rows)
+
+
+@app.get("/profitability")
+async def profitability(
+    request: Request,
+    power_cost_kwh: Optional[float] = Query(None, ge=0, le=10)
+):
+    if not is_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    await PRICE_SERVICE.tick()
+    await integrate_profitability()
+    return {"success": True, **PROFITABILITY.snapshot(power_cost_kwh)}
+
+
+# Per-miner efficiency curves; new log rows are folded into the running fits.
+EFFICIENCY_MODELS = EfficiencyModelRegistry()
+
+
+async def refresh_efficiency_models() -> None:
+    rows = await asyncio.to_thread(load_recent_metrics, TUNING_HISTORY_LIMIT)
+    EFFICIENCY_MODELS.observe_rows(rows)
+
+
 @app.get("/tuning/recommendations")
 async def tuning_recommendations(request: Request):
     if not is_authenticated(request):
         return JSONResponse({"error": "Unauthorized"}, status_code=401)
     stats = await gather_stats()
     payload = stats_to_tuning_payload(stats)
-    recommendations = auto_tune_miners(payload)
+    await refresh_efficiency_models()
+    recommendations = auto_tune_miners(payload, EFFICIENCY_MODELS)
     return JSONResponse({
         "success": True,
         "source": "live",
@@ -1390,7 +1921,8 @@ async def tuning_recommendations_from_payload(request: Request):
         miners = payload
     if not isinstance(miners, list):
         return JSONResponse({"error": "Expected a list of miner objects or {'miners': [...]}."}, status_code=400)
-    recommendations = auto_tune_miners(miners)
+    await refresh_efficiency_models()
+    recommendations = auto_tune_miners(miners, EFFICIENCY_MODELS)
     return JSONResponse({
         "success": True,
         "source": "payload",
@@ -1398,6 +1930,30 @@ async def tuning_recommendations_from_payload(request: Request):
         "data": recommendations
     })
 
+@app.get("/tuning/power-budget")
+async def tuning_power_budget(
+    request: Request,
+    watts: float = Query(..., gt=0),
+    allow_shutdown: bool = Query(True)
+):
+    if not is_authenticated(request):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    stats = await gather_stats()
+    await refresh_efficiency_models()
+    curves = curves_from_models(EFFICIENCY_MODELS, stats)
+    started = time()
+    plan = optimize_power_budget(watts, curves, allow_shutdown=allow_shutdown)
+    elapsed_ms = (time() - started) * 1000
+    current_power = sum(m.get("power", 0) or 0 for m in stats.values() if m.get("alive"))
+    current_hash = sum(m.get("hashrate_1m", 0) or 0 for m in stats.values() if m.get("alive"))
+    return JSONResponse({
+        "success": True,
+        "count": len(plan["assignments"]),
+        "solve_ms": round(elapsed_ms, 3),
+        "current": {"power_w": current_power, "hashrate_ths": current_hash},
+        **plan
+    })
+
 @app.post("/ai-assist")
 async def ai_assist(request: Request):
     if not is_authenticated(request):
@@ -1425,9 +1981,11 @@ async def ai_assist(request: Request):
 
     provider_label = AI_PROVIDERS.get(provider_key, AI_PROVIDERS["smart"])
     selected_tasks = select_json_tasks(question)
-    stats_snapshot = await gather_stats()
+    fleet_version, stats_snapshot = await fleet_snapshot()
+    # Cloud snapshots carry no version; the context builder then hashes the stats.
+    context_source = (fleet_version, history_version()) if fleet_version is not None else None
     history_rows = await asyncio.to_thread(load_recent_metrics, AI_HISTORY_LIMIT)
-    history_summary = summarize_history(history_rows)
+    history_summary = summarize_history_with_forecast(history_rows)
     recommendation_payloads = []
     for idx, task in enumerate(selected_tasks, start=1):
         handler = TASK_HANDLERS.get(task["id"], analyze_fleet_overview)
@@ -1456,10 +2014,43 @@ async def ai_assist(request: Request):
         "provider": provider_label,
         "response": response,
         "recommendations": recommendation_payloads,
-        "history_meta": history_summary,
+        "history_meta": AI_CONTEXT.build(
+            stats_snapshot, history_summary, source=context_source
+        )["data"].get("hist", {}),
         "rules": GPT_RULES
     })
 
+@app.post("/ingest")
+async def ingest(request: Request):
+    """Accept a (gzip) batch of timestamped fleet snapshots from the sync agent."""
+    if not token_matches(request.headers.get("authorization")):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > INGEST_MAX_BYTES:
+        return JSONResponse({"success": False, "error": "Batch too large"}, status_code=413)
+    try:
+        samples = decode_batch(await request.body(), request.headers.get("content-encoding", "identity"))
+    except IngestError as exc:
+        return JSONResponse({"success": False, "error": str(exc)}, status_code=exc.status_code)
+    accepted, duplicates = INGEST_STORE.add(samples)
+    latest = INGEST_STORE.latest()
+    if SHARED_STATE is not None and CLOUD_MODE:
+        # Only the fleet leader writes the metric log; it drains this queue every poll.
+        queued = [(sample_epoch(s), s) for s in samples]
+        await asyncio.to_thread(SHARED_STATE.queue_ingested, [q for q in queued if q[0] is not None])
+        if latest is not None and accepted:
+            # In local mode the leader's LAN polls own the "fleet" snapshot.
+            await publish_cloud_payload(latest)
+    elif CLOUD_MODE:
+        await CLOUD_HISTORY.record_many(samples)
+        await log_pool_alongside()
+    return JSONResponse({
+        "success": True,
+        "accepted": accepted,
+        "duplicates": duplicates,
+        "latest": latest["last_updated"] if latest else None,
+    })
+
 @app.post("/add-miner")
 async def add_miner(request: Request):
     if not is_authenticated(request):
@@ -1472,6 +2063,7 @@ async def add_miner(request: Request):
         if not name or not ip:
             return JSONResponse({"success": False, "error": "Name and IP are required"}, status_code=400)
         
+        refresh_miners()
         if name in MINERS:
             return JSONResponse({"success": False, "error": f"Miner '{name}' already exists"}, status_code=400)
         if not (is_valid_ipv4(ip) or is_valid_hostname(ip)):
@@ -1480,7 +2072,12 @@ async def add_miner(request: Request):
                 status_code=400
             )
         
-        MINERS[name] = ip
+        if SHARED_STATE is not None:
+            if not await asyncio.to_thread(SHARED_STATE.add_miner, name, ip):
+                return JSONResponse({"success": False, "error": f"Miner '{name}' already exists"}, status_code=400)
+            refresh_miners()
+        else:
+            MINERS[name] = ip
         save_miners()
         
         return JSONResponse({"success": True, "message": f"Miner '{name}' added successfully"})
@@ -1496,9 +2093,15 @@ async def delete_miner(request: Request):
         name = data.get("name", "").strip()
         if not name:
             return JSONResponse({"success": False, "error": "Name is required"}, status_code=400)
+        refresh_miners()
         if name not in MINERS:
             return JSONResponse({"success": False, "error": f"Miner '{name}' not found"}, status_code=404)
-        del MINERS[name]
+        if SHARED_STATE is not None:
+            await asyncio.to_thread(SHARED_STATE.remove_miner, name)
+            refresh_miners()
+        else:
+            del MINERS[name]
+        PRUNED_MINERS.discard(name)
         save_miners()
         return JSONResponse({"success": True, "message": f"Miner '{name}' deleted"})
     except Exception as e:
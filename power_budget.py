@@ -0,0 +1,144 @@
+"""
+Fleet power-budget optimizer.
+
+Given a hard watt budget and, per miner, a set of candidate operating points
+(predicted power/hashrate per frequency from ``efficiency_model``), pick one
+point per miner so that fleet TH/s is maximised without exceeding the budget.
+
+This is a multiple-choice knapsack. We use the classic greedy on the upper
+convex hull of each miner's (watts, TH/s) curve: every hull edge is an
+upgrade step with a marginal TH-per-watt slope, steps are taken fleet-wide
+in descending slope order while they fit. Hull slopes are decreasing per
+miner, so a miner's steps are always consumed in order. Runtime is
+O(N·K log(N·K)) for N miners with K candidates each.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Any, Dict, List, Sequence
+
+OFF_POINT = {"power_w": 0.0, "hashrate_ths": 0.0, "state": "off"}
+
+
+def _upper_hull(points: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Upper-left convex hull of (power, hashrate), starting at the cheapest point."""
+    ordered = sorted(points, key=lambda p: (p["power_w"], -p["hashrate_ths"]))
+    hull: List[Dict[str, Any]] = []
+    for point in ordered:
+        # Dominated: costs more power but delivers no extra hashrate.
+        if hull and point["hashrate_ths"] <= hull[-1]["hashrate_ths"]:
+            continue
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            cross = (
+                (b["power_w"] - a["power_w"]) * (point["hashrate_ths"] - a["hashrate_ths"])
+                - (b["hashrate_ths"] - a["hashrate_ths"]) * (point["power_w"] - a["power_w"])
+            )
+            if cross >= 0:  # b lies on or under the chord a -> point
+                hull.pop()
+            else:
+                break
+        hull.append(point)
+    return hull
+
+
+def optimize_power_budget(
+    budget_w: float,
+    curves: Dict[str, Sequence[Dict[str, Any]]],
+    allow_shutdown: bool = True,
+) -> Dict[str, Any]:
+    """
+    ``curves`` maps miner name -> candidate points carrying at least
+    ``power_w`` and ``hashrate_ths`` (extra keys such as ``frequency_mhz``
+    and ``voltage_mv`` are passed through). Without ``allow_shutdown`` every
+    miner starts at its lowest-power point, and the result is marked
+    infeasible if those floors alone exceed the budget.
+    """
+    hulls: Dict[str, List[Dict[str, Any]]] = {}
+    for name, points in curves.items():
+        valid = [p for p in points if p.get("power_w", 0) > 0 and p.get("hashrate_ths", 0) > 0]
+        if not valid:
+            continue
+        if allow_shutdown:
+            valid = [dict(OFF_POINT)] + list(valid)
+        hulls[name] = _upper_hull(valid)
+
+    chosen = {name: 0 for name in hulls}
+    used = sum(hull[0]["power_w"] for hull in hulls.values())
+    feasible = used <= budget_w
+
+    heap: List[tuple] = []
+
+    def push_next(name: str) -> None:
+        hull = hulls[name]
+        idx = chosen[name]
+        if idx + 1 < len(hull):
+            d_power = hull[idx + 1]["power_w"] - hull[idx]["power_w"]
+            d_hash = hull[idx + 1]["hashrate_ths"] - hull[idx]["hashrate_ths"]
+            heapq.heappush(heap, (-d_hash / d_power, d_power, name))
+
+    for name in hulls:
+        push_next(name)
+
+    while heap and feasible:
+        _, d_power, name = heapq.heappop(heap)
+        if used + d_power > budget_w:
+            # Hull power only rises, so every further point for this miner
+            # needs at least this step's watts: drop the chain. Steps of
+            # other miners may still fit, so keep scanning them. Once a step
+            # is skipped the greedy is no longer exactly optimal (the leftover
+            # watts are filled with flatter steps, knapsack-style).
+            continue
+        used += d_power
+        chosen[name] += 1
+        push_next(name)
+
+    assignments: Dict[str, Dict[str, Any]] = {}
+    total_hash = 0.0
+    for name, hull in hulls.items():
+        point = dict(hull[chosen[name]])
+        point.setdefault("state", "on")
+        assignments[name] = point
+        total_hash += point["hashrate_ths"]
+
+    return {
+        "budget_w": budget_w,
+        "feasible": feasible,
+        "total_power_w": used,
+        "total_hashrate_ths": total_hash,
+        "headroom_w": budget_w - used,
+        "fleet_efficiency_w_th": (used / total_hash) if total_hash else None,
+        "assignments": assignments,
+    }
+
+
+def curves_from_models(
+    models: Any,
+    stats: Dict[str, Dict[str, Any]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Build optimizer inputs from an ``EfficiencyModelRegistry`` for the live
+    miners in ``stats``. Live miners without a fitted curve contribute their
+    current (fixed) operating point; offline or deleted miners get nothing,
+    even when a model was fitted for them earlier.
+    """
+    curves: Dict[str, List[Dict[str, Any]]] = {}
+    for name, miner in stats.items():
+        if not miner.get("alive"):
+            continue
+        model = models.model_for(name)
+        points = model.candidates() if model else []
+        if points:
+            curves[name] = points
+            continue
+        power = float(miner.get("power", 0) or 0)
+        hashrate = float(miner.get("hashrate_1m", 0) or 0)
+        if power > 0 and hashrate > 0:
+            curves[name] = [{
+                "power_w": power,
+                "hashrate_ths": hashrate,
+                "frequency_mhz": float(miner.get("frequency", 0) or 0),
+                "voltage_mv": float(miner.get("voltage", 0) or 0),
+                "fixed": True,
+            }]
+    return curves
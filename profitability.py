@@ -0,0 +1,302 @@
+"""
+Incremental revenue and power-cost estimates per miner and for the fleet.
+
+Each new ``(timestamp, hashrate_1m, power)`` sample is integrated against
+the previous one with the trapezoid rule into running totals of TH·s, kWh,
+BTC and USD (priced from the in-memory ``PriceHistory``), per UTC day and
+overall. Reading profitability is then a sum over a few accumulators rather
+than a pass over raw history. TH·s integrated while no USD rate is known
+(e.g. before the first price arrives) is kept per day and priced once one
+is; miners whose last sample falls ``max_gap_seconds`` behind the fleet are
+retired from the per-miner view and the current rate, and their totals are
+folded into the fleet's.
+
+Revenue comes from either a hashprice (USD per TH/s per day) or the expected
+block-reward share ``hashrate * reward / (difficulty * 2^32)``. Difficulty,
+hashprice, block reward and price history are all injectable, so the engine
+runs without network access.
+"""
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Union
+
+NETWORK_DIFFICULTY = float(os.getenv("NETWORK_DIFFICULTY", "1.2e14"))
+BLOCK_REWARD_BTC = float(os.getenv("BLOCK_REWARD_BTC", "3.125"))
+HASHPRICE_USD_TH_DAY = os.getenv("HASHPRICE_USD_TH_DAY")
+POWER_COST_KWH = float(os.getenv("POWER_COST_KWH", "0.13"))
+POOL_FEE_PCT = float(os.getenv("POOL_FEE_PCT", "0"))
+PROFIT_MAX_GAP_SECONDS = float(os.getenv("PROFIT_MAX_GAP_SECONDS", "900"))
+PROFIT_DAYS_KEPT = 7
+
+Input = Union[float, Callable[[], Optional[float]], None]
+
+
+def _value(source: Input) -> Optional[float]:
+    value = source() if callable(source) else source
+    return float(value) if value is not None else None
+
+
+def btc_per_th_second(difficulty: float, block_reward: float) -> float:
+    """Expected BTC earned by 1 TH/s in one second at ``difficulty``."""
+    return 1e12 * block_reward / (difficulty * 2 ** 32)
+
+
+def _epoch(value: Any) -> Optional[float]:
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class _Totals:
+    __slots__ = ("seconds", "th_seconds", "kwh", "btc", "usd")
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.th_seconds = 0.0
+        self.kwh = 0.0
+        self.btc = 0.0
+        self.usd = 0.0
+
+    def add(self, other: "_Totals") -> None:
+        for slot in self.__slots__:
+            setattr(self, slot, getattr(self, slot) + getattr(other, slot))
+
+    def as_dict(self, power_cost_kwh: float) -> Dict[str, Any]:
+        cost = self.kwh * power_cost_kwh
+        return {
+            "hours": round(self.seconds / 3600, 3),
+            "th_hours": round(self.th_seconds / 3600, 4),
+            "kwh": round(self.kwh, 4),
+            "revenue_btc": self.btc,
+            "revenue_usd": round(self.usd, 4),
+            "cost_usd": round(cost, 4),
+            "profit_usd": round(self.usd - cost, 4),
+        }
+
+
+class _MinerLedger:
+    __slots__ = ("last", "total", "days", "unpriced")
+
+    def __init__(self) -> None:
+        self.last: Optional[tuple] = None  # (epoch, th, watts)
+        self.total = _Totals()
+        self.days: "OrderedDict[str, _Totals]" = OrderedDict()
+        # day -> [TH·s, TH·s-weighted sum of step midpoints] still without a USD value
+        self.unpriced: Dict[str, List[float]] = {}
+
+    def day(self, day: str) -> _Totals:
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = _Totals()
+            while len(self.days) > PROFIT_DAYS_KEPT:
+                self.days.popitem(last=False)
+        return bucket
+
+    def absorb(self, other: "_MinerLedger") -> None:
+        """Fold another ledger's totals (not its rate) into this one."""
+        self.total.add(other.total)
+        for day, totals in other.days.items():
+            self.day(day).add(totals)
+        for day, (th_seconds, weighted) in other.unpriced.items():
+            pending = self.unpriced.setdefault(day, [0.0, 0.0])
+            pending[0] += th_seconds
+            pending[1] += weighted
+
+
+class ProfitabilityEngine:
+    def __init__(
+        self,
+        prices=None,
+        difficulty: Input = NETWORK_DIFFICULTY,
+        hashprice: Input = float(HASHPRICE_USD_TH_DAY) if HASHPRICE_USD_TH_DAY else None,
+        block_reward: Input = BLOCK_REWARD_BTC,
+        pool_fee_pct: float = POOL_FEE_PCT,
+        power_cost_kwh: float = POWER_COST_KWH,
+        max_gap_seconds: float = PROFIT_MAX_GAP_SECONDS,
+    ):
+        self.prices = prices
+        self.difficulty = difficulty
+        self.hashprice = hashprice
+        self.block_reward = block_reward
+        self.pool_fee_pct = pool_fee_pct
+        self.power_cost_kwh = power_cost_kwh
+        self.max_gap_seconds = max_gap_seconds
+        self._ledgers: Dict[str, _MinerLedger] = {}
+        self._retired = _MinerLedger()  # totals of miners that stopped reporting
+        self._retired_at: Dict[str, float] = {}  # name -> last epoch when retired
+
+    # Rates -------------------------------------------------------------
+    def _keep(self) -> float:
+        return 1 - self.pool_fee_pct / 100
+
+    def btc_rate(self) -> Optional[float]:
+        """BTC per TH/s per second after pool fee."""
+        difficulty, reward = _value(self.difficulty), _value(self.block_reward)
+        if not difficulty or reward is None:
+            return None
+        return btc_per_th_second(difficulty, reward) * self._keep()
+
+    def price_at(self, epoch: float) -> Optional[float]:
+        return self.prices.price_at(epoch) if self.prices is not None else None
+
+    def usd_rate(self, epoch: float) -> Optional[float]:
+        """USD per TH/s per second at ``epoch``."""
+        hashprice = _value(self.hashprice)
+        if hashprice is not None:
+            return hashprice / 86400 * self._keep()
+        btc_rate, price = self.btc_rate(), self.price_at(epoch)
+        if btc_rate is None or price is None:
+            return None
+        return btc_rate * price
+
+    # Ingestion ---------------------------------------------------------
+    def observe(self, name: str, epoch: float, hashrate_ths: float, power_w: float) -> None:
+        ledger = self._ledgers.get(name)
+        if ledger is None:
+            if epoch <= self._retired_at.get(name, float("-inf")):
+                return
+            self._retired_at.pop(name, None)
+            ledger = self._ledgers[name] = _MinerLedger()
+        last = ledger.last
+        if last is not None and epoch <= last[0]:
+            return
+        ledger.last = (epoch, hashrate_ths, power_w)
+        if last is None:
+            return
+        dt = epoch - last[0]
+        if dt > self.max_gap_seconds:
+            return  # log gap: do not invent output for unobserved time
+        avg_th = (last[1] + hashrate_ths) / 2
+        avg_w = (last[2] + power_w) / 2
+        mid = last[0] + dt / 2
+        step = _Totals()
+        step.seconds = dt
+        step.th_seconds = avg_th * dt
+        step.kwh = avg_w * dt / 3.6e6
+        btc_rate = self.btc_rate()
+        step.btc = step.th_seconds * btc_rate if btc_rate is not None else 0.0
+        day = datetime.fromtimestamp(epoch, tz=timezone.utc).date().isoformat()
+        usd_rate = self.usd_rate(mid)
+        if usd_rate is not None:
+            step.usd = step.th_seconds * usd_rate
+        elif step.th_seconds:
+            pending = ledger.unpriced.setdefault(day, [0.0, 0.0])
+            pending[0] += step.th_seconds
+            pending[1] += step.th_seconds * mid
+        ledger.total.add(step)
+        ledger.day(day).add(step)
+
+    def _price_unpriced(self, ledger: _MinerLedger) -> None:
+        """Value TH·s integrated while no USD rate was known, once one is."""
+        for day, (th_seconds, weighted) in list(ledger.unpriced.items()):
+            usd_rate = self.usd_rate(weighted / th_seconds)
+            if usd_rate is None:
+                return
+            usd = th_seconds * usd_rate
+            ledger.total.usd += usd
+            if day in ledger.days:
+                ledger.days[day].usd += usd
+            del ledger.unpriced[day]
+
+    def _retire_stale(self) -> None:
+        """Move miners whose samples stopped (deleted rigs) out of the live ledgers."""
+        latest = max((entry.last[0] for entry in self._ledgers.values() if entry.last is not None), default=None)
+        if latest is None:
+            return
+        for name, ledger in list(self._ledgers.items()):
+            if ledger.last is not None and latest - ledger.last[0] > self.max_gap_seconds:
+                self._retired.absorb(ledger)
+                self._retired_at[name] = ledger.last[0]
+                del self._ledgers[name]
+
+    def observe_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """Integrate log rows newer than each miner's last sample."""
+        applied = 0
+        for row in rows:
+            name = row.get("name")
+            epoch = _epoch(row.get("timestamp"))
+            if not name or epoch is None:
+                continue
+            ledger = self._ledgers.get(name)
+            last = ledger.last[0] if ledger is not None and ledger.last is not None else self._retired_at.get(name)
+            if last is not None and epoch <= last:
+                continue
+            alive = row.get("alive", True)
+            hashrate = float(row.get("hashrate_1m", 0) or 0) if alive else 0.0
+            power = float(row.get("power", 0) or 0) if alive else 0.0
+            self.observe(name, epoch, hashrate, power)
+            applied += 1
+        return applied
+
+    # Read side ---------------------------------------------------------
+    def _rates(self, hashrate_ths: float, power_w: float, epoch: float, power_cost_kwh: float) -> Dict[str, Any]:
+        btc_rate, usd_rate = self.btc_rate(), self.usd_rate(epoch)
+        revenue_h = hashrate_ths * usd_rate * 3600 if usd_rate is not None else None
+        cost_h = power_w / 1000 * power_cost_kwh
+        return {
+            "hashrate_ths": hashrate_ths,
+            "power_w": power_w,
+            "revenue_btc_hour": hashrate_ths * btc_rate * 3600 if btc_rate is not None else None,
+            "revenue_usd_hour": revenue_h,
+            "cost_usd_hour": cost_h,
+            "profit_usd_hour": revenue_h - cost_h if revenue_h is not None else None,
+            "revenue_usd_day": revenue_h * 24 if revenue_h is not None else None,
+            "cost_usd_day": cost_h * 24,
+            "profit_usd_day": (revenue_h - cost_h) * 24 if revenue_h is not None else None,
+        }
+
+    def snapshot(self, power_cost_kwh: Optional[float] = None) -> Dict[str, Any]:
+        """Current rates plus integrated today/total figures per miner and fleet."""
+        cost_kwh = self.power_cost_kwh if power_cost_kwh is None else power_cost_kwh
+        today = datetime.now(timezone.utc).date().isoformat()
+        self._retire_stale()
+        self._price_unpriced(self._retired)
+        miners: Dict[str, Any] = {}
+        fleet_today, fleet_total = _Totals(), _Totals()
+        fleet_today.add(self._retired.days.get(today) or _Totals())
+        fleet_total.add(self._retired.total)
+        fleet_th = fleet_w = 0.0
+        latest_epoch = 0.0
+        for name, ledger in sorted(self._ledgers.items()):
+            if ledger.last is None:
+                continue
+            self._price_unpriced(ledger)
+            epoch, th, watts = ledger.last
+            latest_epoch = max(latest_epoch, epoch)
+            fleet_th += th
+            fleet_w += watts
+            day_totals = ledger.days.get(today) or _Totals()
+            fleet_today.add(day_totals)
+            fleet_total.add(ledger.total)
+            miners[name] = {
+                "as_of": datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat(),
+                "rate": self._rates(th, watts, epoch, cost_kwh),
+                "today": day_totals.as_dict(cost_kwh),
+                "total": ledger.total.as_dict(cost_kwh),
+            }
+        price = self.price_at(latest_epoch) if latest_epoch else None
+        usd_rate = self.usd_rate(latest_epoch) if latest_epoch else None
+        return {
+            "inputs": {
+                "btc_price_usd": price,
+                "network_difficulty": _value(self.difficulty),
+                "hashprice_usd_th_day": _value(self.hashprice),
+                "net_usd_per_th_day": usd_rate * 86400 if usd_rate is not None else None,
+                "block_reward_btc": _value(self.block_reward),
+                "pool_fee_pct": self.pool_fee_pct,
+                "power_cost_kwh": cost_kwh,
+            },
+            "fleet": {
+                "rate": self._rates(fleet_th, fleet_w, latest_epoch, cost_kwh),
+                "today": fleet_today.as_dict(cost_kwh),
+                "total": fleet_total.as_dict(cost_kwh),
+            },
+            "miners": miners,
+        }
@@ -0,0 +1,207 @@
+"""
+Pool-vs-local hashrate reconciliation.
+
+Local rows (``hashrate_1m`` from the miner log) and pool rows (pool-credited
+hashrate from ``pool_metrics.csv``) are folded into fixed time buckets per
+miner as they arrive. Each bucket keeps running sums, so the comparison
+charts and the rolling discrepancy are read straight from the precomputed
+buckets instead of rescanning either log.
+
+A miner whose pool-credited hashrate sits well below what it reports
+locally points at stale/rejected shares or connectivity trouble; one
+credited well above its local figure usually means firmware under-reports.
+"""
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+RECONCILE_BUCKET_SECONDS = int(os.getenv("RECONCILE_BUCKET_SECONDS", "300"))
+RECONCILE_WINDOW_BUCKETS = int(os.getenv("RECONCILE_WINDOW_BUCKETS", "12"))
+RECONCILE_MAX_BUCKETS = int(os.getenv("RECONCILE_MAX_BUCKETS", "2016"))  # 7 days of 5-minute buckets
+RECONCILE_THRESHOLD_PCT = float(os.getenv("RECONCILE_THRESHOLD_PCT", "10"))
+
+
+def _epoch(value: Any) -> Optional[float]:
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class _Bucket:
+    __slots__ = ("local_sum", "local_n", "pool_sum", "pool_n")
+
+    def __init__(self) -> None:
+        self.local_sum = 0.0
+        self.local_n = 0
+        self.pool_sum = 0.0
+        self.pool_n = 0
+
+    def local(self) -> Optional[float]:
+        return self.local_sum / self.local_n if self.local_n else None
+
+    def pool(self) -> Optional[float]:
+        return self.pool_sum / self.pool_n if self.pool_n else None
+
+
+def discrepancy_pct(local: Optional[float], pool: Optional[float]) -> Optional[float]:
+    """Share of locally reported hashrate the pool did not credit (negative = over-credited)."""
+    if local is None or pool is None or local <= 0:
+        return None
+    return (local - pool) / local * 100
+
+
+def classify(discrepancy: Optional[float], threshold: float = RECONCILE_THRESHOLD_PCT) -> str:
+    if discrepancy is None:
+        return "unknown"
+    if discrepancy > threshold:
+        return "pool_low"
+    if discrepancy < -threshold:
+        return "pool_high"
+    return "ok"
+
+
+class ReconciliationEngine:
+    def __init__(
+        self,
+        bucket_seconds: int = RECONCILE_BUCKET_SECONDS,
+        window: int = RECONCILE_WINDOW_BUCKETS,
+        max_buckets: int = RECONCILE_MAX_BUCKETS,
+        threshold_pct: float = RECONCILE_THRESHOLD_PCT,
+    ):
+        self.bucket_seconds = max(int(bucket_seconds), 1)
+        self.window = max(int(window), 1)
+        self.max_buckets = max_buckets
+        self.threshold_pct = threshold_pct
+        self._buckets: Dict[str, "OrderedDict[int, _Bucket]"] = {}
+        self._last_local: Optional[str] = None
+        self._last_pool: Optional[str] = None
+
+    def _bucket(self, name: str, epoch: float) -> _Bucket:
+        series = self._buckets.get(name)
+        if series is None:
+            series = self._buckets[name] = OrderedDict()
+        key = int(epoch // self.bucket_seconds) * self.bucket_seconds
+        bucket = series.get(key)
+        if bucket is None:
+            bucket = series[key] = _Bucket()
+            if len(series) > 1 and key < next(reversed(series)):
+                # Out-of-order bucket (pool and local logs interleave); keep keys sorted.
+                self._buckets[name] = OrderedDict(sorted(series.items()))
+            while len(self._buckets[name]) > self.max_buckets:
+                self._buckets[name].popitem(last=False)
+        return bucket
+
+    def observe_local(self, rows: List[Dict[str, Any]]) -> int:
+        """Fold miner-log rows newer than the last seen timestamp into buckets."""
+        applied = 0
+        newest = self._last_local
+        for row in rows:
+            ts, name = row.get("timestamp"), row.get("name")
+            if not ts or not name or (self._last_local is not None and ts <= self._last_local):
+                continue
+            epoch = _epoch(ts)
+            if epoch is None:
+                continue
+            bucket = self._bucket(name, epoch)
+            bucket.local_sum += float(row.get("hashrate_1m", 0) or 0)
+            bucket.local_n += 1
+            applied += 1
+            newest = ts if newest is None or ts > newest else newest
+        self._last_local = newest
+        return applied
+
+    def observe_pool(self, rows: List[Dict[str, Any]]) -> int:
+        """Fold pool-log rows newer than the last seen timestamp into buckets."""
+        applied = 0
+        newest = self._last_pool
+        for row in rows:
+            ts, name = row.get("timestamp"), row.get("name")
+            if not ts or not name or (self._last_pool is not None and ts <= self._last_pool):
+                continue
+            epoch = _epoch(ts)
+            if epoch is None:
+                continue
+            bucket = self._bucket(name, epoch)
+            bucket.pool_sum += float(row.get("pool_hashrate", 0) or 0)
+            bucket.pool_n += 1
+            applied += 1
+            newest = ts if newest is None or ts > newest else newest
+        self._last_pool = newest
+        return applied
+
+    def names(self) -> List[str]:
+        return sorted(self._buckets)
+
+    def series(self, name: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Bucketed local/pool averages for one miner, oldest first."""
+        items = list((self._buckets.get(name) or {}).items())
+        if limit:
+            items = items[-limit:]
+        out = []
+        for start, bucket in items:
+            local, pool = bucket.local(), bucket.pool()
+            out.append({
+                "bucket": datetime.fromtimestamp(start, tz=timezone.utc).isoformat(),
+                "local": local,
+                "pool": pool,
+                "discrepancy_pct": discrepancy_pct(local, pool),
+            })
+        return out
+
+    def rolling(self, name: str) -> Dict[str, Any]:
+        """Discrepancy over the last ``window`` buckets that have both readings."""
+        local_total = pool_total = 0.0
+        used = 0
+        for bucket in reversed(list((self._buckets.get(name) or {}).values())):
+            local, pool = bucket.local(), bucket.pool()
+            if local is None or pool is None:
+                continue
+            local_total += local
+            pool_total += pool
+            used += 1
+            if used >= self.window:
+                break
+        if not used:
+            return {"buckets": 0, "local": None, "pool": None, "discrepancy_pct": None, "status": "unknown"}
+        pct = discrepancy_pct(local_total / used, pool_total / used)
+        return {
+            "buckets": used,
+            "local": local_total / used,
+            "pool": pool_total / used,
+            "discrepancy_pct": pct,
+            "status": classify(pct, self.threshold_pct),
+        }
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {name: self.rolling(name) for name in self.names()}
+
+    def fleet_series(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fleet totals per bucket (only miners with both readings count toward either side)."""
+        totals: Dict[int, List[float]] = {}
+        for series in self._buckets.values():
+            for start, bucket in series.items():
+                local, pool = bucket.local(), bucket.pool()
+                if local is None or pool is None:
+                    continue
+                entry = totals.setdefault(start, [0.0, 0.0])
+                entry[0] += local
+                entry[1] += pool
+        keys = sorted(totals)
+        if limit:
+            keys = keys[-limit:]
+        return [
+            {
+                "bucket": datetime.fromtimestamp(k, tz=timezone.utc).isoformat(),
+                "local": totals[k][0],
+                "pool": totals[k][1],
+                "discrepancy_pct": discrepancy_pct(totals[k][0], totals[k][1]),
+            }
+            for k in keys
+        ]
@@ -0,0 +1,337 @@
+"""
+JSON encoding and per-response compression for the large dashboard payloads
+(``/miner-data``, ``/historical-metrics``, ``/api/pool-comparison``).
+
+Bodies are serialised with ``orjson`` when it is installed (several times
+faster than the stdlib and already compact), falling back to ``json.dumps``
+with compact separators. Bodies of at least ``RESPONSE_COMPRESS_MIN_BYTES``
+are compressed with the best encoding the client's ``Accept-Encoding``
+allows: brotli when the ``brotli`` package is installed, else gzip. Smaller
+bodies are sent as-is, since compressing them would cost more than it saves.
+
+``EncodedPayload`` memoises the serialised and compressed bodies, so a
+payload that is cached between requests is encoded once per encoding
+rather than once per request.
+
+``/miner-data`` and ``/historical-metrics`` also negotiate the wire format
+on ``Accept`` (``telemetry_response``):
+
+* ``application/json`` (default): the usual objects.
+* ``application/vnd.hashlab.columnar+json``: row lists sent as one array
+  per field, ``{"length": n, "columns": {"temp": [...], ...}}`` (plus
+  ``"index"``, the miner names, for the fleet map), so field names are not
+  repeated per miner/row. A ``null`` in a column means the row lacked that
+  field.
+* ``application/msgpack`` (or ``application/x-msgpack``): the JSON payload
+  as MessagePack, via the ``msgpack`` package when installed or the small
+  pure-Python encoder below.
+
+``static/wire-format.js`` holds the matching browser decoders, and
+``rows_from_columns``/``fleet_from_columns`` the Python ones.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import struct
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json fallback
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # optional: pure-Python encoder below
+    msgpack = None
+
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.hashlab.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MEDIA_TYPES = {"json": JSON_MEDIA_TYPE, "columnar": COLUMNAR_MEDIA_TYPE, "msgpack": MSGPACK_MEDIA_TYPE}
+ACCEPT_ALIASES = {
+    JSON_MEDIA_TYPE: "json",
+    COLUMNAR_MEDIA_TYPE: "columnar",
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    "application/x-msgpack": "msgpack",
+}
+TELEMETRY_FORMATS = ("json", "columnar", "msgpack")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def _pack_into(obj: Any, out: List[bytes]) -> None:
+    if obj is None:
+        out.append(b"\xc0")
+    elif obj is True:
+        out.append(b"\xc3")
+    elif obj is False:
+        out.append(b"\xc2")
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(struct.pack("B", obj))
+        elif -32 <= obj < 0:
+            out.append(struct.pack("b", obj))
+        elif 0 <= obj <= 0xFF:
+            out.append(struct.pack(">BB", 0xCC, obj))
+        elif 0 <= obj <= 0xFFFF:
+            out.append(struct.pack(">BH", 0xCD, obj))
+        elif 0 <= obj <= 0xFFFFFFFF:
+            out.append(struct.pack(">BI", 0xCE, obj))
+        elif 0 <= obj <= 0xFFFFFFFFFFFFFFFF:
+            out.append(struct.pack(">BQ", 0xCF, obj))
+        elif -0x80 <= obj < 0:
+            out.append(struct.pack(">Bb", 0xD0, obj))
+        elif -0x8000 <= obj < 0:
+            out.append(struct.pack(">Bh", 0xD1, obj))
+        elif -0x80000000 <= obj < 0:
+            out.append(struct.pack(">Bi", 0xD2, obj))
+        elif -0x8000000000000000 <= obj < 0:
+            out.append(struct.pack(">Bq", 0xD3, obj))
+        else:
+            _pack_into(str(obj), out)
+    elif isinstance(obj, float):
+        out.append(struct.pack(">Bd", 0xCB, obj))
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        size = len(data)
+        if size < 32:
+            out.append(struct.pack("B", 0xA0 | size))
+        elif size <= 0xFF:
+            out.append(struct.pack(">BB", 0xD9, size))
+        elif size <= 0xFFFF:
+            out.append(struct.pack(">BH", 0xDA, size))
+        else:
+            out.append(struct.pack(">BI", 0xDB, size))
+        out.append(data)
+    elif isinstance(obj, (bytes, bytearray)):
+        size = len(obj)
+        if size <= 0xFF:
+            out.append(struct.pack(">BB", 0xC4, size))
+        elif size <= 0xFFFF:
+            out.append(struct.pack(">BH", 0xC5, size))
+        else:
+            out.append(struct.pack(">BI", 0xC6, size))
+        out.append(bytes(obj))
+    elif isinstance(obj, (list, tuple)):
+        size = len(obj)
+        if size < 16:
+            out.append(struct.pack("B", 0x90 | size))
+        elif size <= 0xFFFF:
+            out.append(struct.pack(">BH", 0xDC, size))
+        else:
+            out.append(struct.pack(">BI", 0xDD, size))
+        for item in obj:
+            _pack_into(item, out)
+    elif isinstance(obj, dict):
+        size = len(obj)
+        if size < 16:
+            out.append(struct.pack("B", 0x80 | size))
+        elif size <= 0xFFFF:
+            out.append(struct.pack(">BH", 0xDE, size))
+        else:
+            out.append(struct.pack(">BI", 0xDF, size))
+        for key, value in obj.items():
+            _pack_into(key, out)
+            _pack_into(value, out)
+    else:
+        _pack_into(_default(obj), out)
+
+
+def packb(obj: Any) -> bytes:
+    """MessagePack encoding (the ``msgpack`` package when available)."""
+    if msgpack is not None:
+        return msgpack.packb(obj, default=_default, use_bin_type=True)
+    out: List[bytes] = []
+    _pack_into(obj, out)
+    return b"".join(out)
+
+
+def columns_of(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Rows as ``{"length": n, "columns": {field: [values]}}``; fields in first-seen order."""
+    fields: Dict[str, None] = {}
+    for row in rows:
+        for field in row:
+            if field not in fields:
+                fields[field] = None
+    return {"length": len(rows), "columns": {field: [row.get(field) for row in rows] for field in fields}}
+
+
+def rows_from_columns(block: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Inverse of ``columns_of`` (``null`` cells are left out of the rows)."""
+    columns = block.get("columns") or {}
+    rows: List[Dict[str, Any]] = [{} for _ in range(block.get("length", 0))]
+    for field, values in columns.items():
+        for row, value in zip(rows, values):
+            if value is not None:
+                row[field] = value
+    return rows
+
+
+def columnar_fleet(miners: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """``/miner-data`` map in columnar form: miner names under ``index``."""
+    names = list(miners)
+    return {"index": names, **columns_of([miners[name] or {} for name in names])}
+
+
+def fleet_from_columns(block: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return dict(zip(block.get("index") or [], rows_from_columns(block)))
+
+
+def columnar_history(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """``/historical-metrics`` payload with its ``data`` rows in columnar form."""
+    return {**payload, "data": columns_of(payload.get("data") or [])}
+
+
+def choose_format(header: Optional[str], offered: Sequence[str] = TELEMETRY_FORMATS) -> str:
+    """Wire format named in ``Accept`` with the highest q (ties: most compact); JSON otherwise."""
+    best, best_q = "json", 0.0
+    explicit: Dict[str, float] = {}
+    for part in (header or "").lower().split(","):
+        media, _, params = part.strip().partition(";")
+        fmt = ACCEPT_ALIASES.get(media.strip())
+        if fmt is None or fmt not in offered:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        explicit[fmt] = max(q, explicit.get(fmt, 0.0))
+    for fmt in ("msgpack", "columnar", "json"):
+        q = explicit.get(fmt, 0.0)
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    """``Accept-Encoding`` as {coding: q}."""
+    offers: Dict[str, float] = {}
+    for part in (header or "").lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offers[coding.strip()] = q
+    return offers
+
+
+def choose_encoding(header: Optional[str]) -> Optional[str]:
+    """Best supported content coding for a request, or None for identity."""
+    offers = accepted_encodings(header)
+    wildcard = offers.get("*", 0.0)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = offers.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class EncodedPayload:
+    """A response payload with its serialised/compressed bodies memoised per format."""
+
+    __slots__ = ("data", "min_bytes", "columnar", "_bodies")
+
+    def __init__(
+        self,
+        data: Any,
+        min_bytes: Optional[int] = None,
+        columnar: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.data = data
+        self.min_bytes = RESPONSE_COMPRESS_MIN_BYTES if min_bytes is None else min_bytes
+        self.columnar = columnar
+        self._bodies: Dict[Tuple[str, Optional[str]], bytes] = {}
+
+    def raw(self, fmt: str = "json") -> bytes:
+        body = self._bodies.get((fmt, None))
+        if body is None:
+            if fmt == "msgpack":
+                body = packb(self.data)
+            elif fmt == "columnar":
+                if self.columnar is None:
+                    raise ValueError("Payload has no columnar form")
+                body = dumps(self.columnar(self.data))
+            else:
+                body = dumps(self.data)
+            self._bodies[(fmt, None)] = body
+        return body
+
+    def body(self, encoding: Optional[str], fmt: str = "json") -> Tuple[bytes, Optional[str]]:
+        """(body, applied encoding); identity below the size threshold."""
+        raw = self.raw(fmt)
+        if encoding is None or len(raw) < self.min_bytes:
+            return raw, None
+        body = self._bodies.get((fmt, encoding))
+        if body is None:
+            body = self._bodies[(fmt, encoding)] = compress(raw, encoding)
+        return body, encoding
+
+
+def _encoded_response(request: Request, payload: EncodedPayload, fmt: str, vary: str, status_code: int) -> Response:
+    body, encoding = payload.body(choose_encoding(request.headers.get("accept-encoding")), fmt)
+    headers = {"Vary": vary}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(body, status_code=status_code, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+def json_response(request: Request, payload: Any, status_code: int = 200) -> Response:
+    """JSON response compressed for the client when large enough."""
+    if not isinstance(payload, EncodedPayload):
+        payload = EncodedPayload(payload)
+    return _encoded_response(request, payload, "json", "Accept-Encoding", status_code)
+
+
+def telemetry_response(request: Request, payload: EncodedPayload, status_code: int = 200) -> Response:
+    """Like ``json_response``, with the wire format negotiated on ``Accept``."""
+    offered = TELEMETRY_FORMATS if payload.columnar is not None else ("json", "msgpack")
+    fmt = choose_format(request.headers.get("accept"), offered)
+    return _encoded_response(request, payload, fmt, "Accept, Accept-Encoding", status_code)
@@ -0,0 +1,350 @@
+"""
+Cross-process fleet state for ``uvicorn --workers N``.
+
+Workers share one SQLite database (WAL mode, ``SHARED_STATE_DB``) with:
+
+* ``leases``: a leader lease. The worker holding it renews it every poll;
+  once it lapses (``FLEET_LEASE_TTL``) another worker takes over. Only the
+  leader polls the miners (or runs the Gist relay in cloud mode) and writes
+  the metric logs.
+* ``snapshots``: the latest fleet snapshot, versioned, which every worker
+  serves. A publish can carry the source timestamp and is ignored when it
+  is older than the stored one, so pushes racing through different workers
+  never move the snapshot backwards.
+* ``miners``: the miner registry (name -> IP) plus a version counter, so
+  ``/add-miner`` and ``/delete-miner`` on any worker reach all of them.
+* ``ingested``: snapshots pushed to ``/ingest`` on any worker, keyed on their
+  source timestamp (so a retried batch is stored once) until the leader
+  writes them to the metric log.
+
+Readers keep the decoded snapshot and registry per version; an unchanged
+snapshot costs one primary-key SELECT and returns the same dict object.
+Reads use their own connection and never wait on the write lock: in WAL
+mode they see the last committed state while a writer holds the database.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import suppress
+from pathlib import Path
+from time import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json fallback
+    orjson = None
+
+logger = logging.getLogger("shared_state")
+
+SHARED_STATE_DB = Path(os.getenv("SHARED_STATE_DB", "fleet_state.db"))
+FLEET_POLL_INTERVAL = float(os.getenv("FLEET_POLL_INTERVAL", "10"))
+FLEET_LEASE_TTL = float(os.getenv("FLEET_LEASE_TTL", "30"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS snapshots (
+    name TEXT PRIMARY KEY, version INTEGER NOT NULL, source_ts REAL, updated REAL NOT NULL, body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS miners (name TEXT PRIMARY KEY, ip TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS ingested (source_ts REAL PRIMARY KEY, body BLOB NOT NULL);
+"""
+
+
+def _dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _loads(body: bytes) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+class SharedState:
+    def __init__(self, path: Path = SHARED_STATE_DB, owner: Optional[str] = None):
+        self.path = Path(path)
+        self.owner = owner or f"{os.getpid()}-{id(self):x}"
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()  # write connection, used from worker threads
+        self._reader: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()  # read connection; never held across a write
+        self._snapshots: Dict[str, Tuple[int, Any]] = {}
+        self._registry: Tuple[int, Dict[str, str]] = (-1, {})
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``fn`` in one IMMEDIATE transaction (serialised across processes)."""
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    def _read_db(self) -> sqlite3.Connection:
+        if self._reader is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            conn.execute("PRAGMA query_only=ON")
+            self._reader = conn
+        return self._reader
+
+    def _read(self, sql: str, params: Tuple = ()) -> Optional[Tuple]:
+        with self._read_lock:
+            return self._read_db().execute(sql, params).fetchone()
+
+    def _read_all(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._read_lock:
+            return self._read_db().execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    # Leader lease ------------------------------------------------------
+    def try_lead(self, name: str = "fleet", ttl: float = FLEET_LEASE_TTL, now: Optional[float] = None) -> bool:
+        """Take or renew the lease; True while this process holds it."""
+        now = time() if now is None else now
+
+        def acquire(conn: sqlite3.Connection) -> bool:
+            row = conn.execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is not None and row[0] != self.owner and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires",
+                (name, self.owner, now + ttl),
+            )
+            return True
+
+        return self._write(acquire)
+
+    def release(self, name: str = "fleet") -> None:
+        self._write(lambda conn: conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner)))
+
+    # Snapshots ---------------------------------------------------------
+    def publish(self, name: str, data: Any, source_ts: Optional[float] = None) -> bool:
+        """Store a new snapshot; False when ``source_ts`` is older than the stored one."""
+        body = _dumps(data)
+
+        def upsert(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
+                "INSERT INTO snapshots (name, version, source_ts, updated, body) VALUES (?, 1, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET version = snapshots.version + 1, source_ts = excluded.source_ts, "
+                "updated = excluded.updated, body = excluded.body "
+                "WHERE excluded.source_ts IS NULL OR snapshots.source_ts IS NULL "
+                "OR excluded.source_ts >= snapshots.source_ts",
+                (name, source_ts, time(), body),
+            )
+            return cursor.rowcount > 0
+
+        return self._write(upsert)
+
+    def versioned_snapshot(self, name: str = "fleet", max_age: Optional[float] = None) -> Optional[Tuple[int, Any]]:
+        """
+        (version, data) of the latest snapshot, or None when there is none or
+        it was published more than ``max_age`` seconds ago. ``data`` is reused
+        while the version is unchanged.
+        """
+        row = self._read("SELECT version, updated FROM snapshots WHERE name = ?", (name,))
+        if row is None or (max_age is not None and time() - row[1] > max_age):
+            return None
+        cached = self._snapshots.get(name)
+        if cached is not None and cached[0] == row[0]:
+            return cached
+        row = self._read("SELECT version, body FROM snapshots WHERE name = ?", (name,))
+        if row is None:
+            return None
+        cached = self._snapshots[name] = (row[0], _loads(row[1]))
+        return cached
+
+    def snapshot(self, name: str = "fleet", max_age: Optional[float] = None) -> Optional[Any]:
+        versioned = self.versioned_snapshot(name, max_age)
+        return versioned[1] if versioned is not None else None
+
+    # Ingest queue ------------------------------------------------------
+    def queue_ingested(self, samples: List[Tuple[float, Any]]) -> int:
+        """Store pushed ``(source_ts, snapshot)`` pairs for the leader; returns how many were new."""
+        rows = [(source_ts, _dumps(data)) for source_ts, data in samples]
+
+        def insert(conn: sqlite3.Connection) -> int:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO ingested (source_ts, body) VALUES (?, ?)", rows)
+            return conn.total_changes - before
+
+        return self._write(insert) if rows else 0
+
+    def ingested(self, limit: int = 500) -> List[Tuple[float, Any]]:
+        """Queued snapshots, oldest first."""
+        rows = self._read_all("SELECT source_ts, body FROM ingested ORDER BY source_ts LIMIT ?", (limit,))
+        return [(source_ts, _loads(body)) for source_ts, body in rows]
+
+    def ack_ingested(self, upto: float) -> None:
+        self._write(lambda conn: conn.execute("DELETE FROM ingested WHERE source_ts <= ?", (upto,)))
+
+    # Miner registry ----------------------------------------------------
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, key: str = "miners_version") -> None:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, 1) ON CONFLICT(key) DO UPDATE SET value = meta.value + 1", (key,)
+        )
+
+    def seed_registry(self, miners: Dict[str, str], file_version: int) -> bool:
+        """Load ``miners`` when the registry is empty or the config file is newer; True if loaded."""
+
+        def seed(conn: sqlite3.Connection) -> bool:
+            count = conn.execute("SELECT COUNT(*) FROM miners").fetchone()[0]
+            row = conn.execute("SELECT value FROM meta WHERE key = 'miners_file_version'").fetchone()
+            if count and row is not None and row[0] >= file_version:
+                return False
+            conn.execute("DELETE FROM miners")
+            conn.executemany("INSERT INTO miners (name, ip) VALUES (?, ?)", list(miners.items()))
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('miners_file_version', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (file_version,),
+            )
+            self._bump(conn)
+            return True
+
+        return self._write(seed)
+
+    def note_file_version(self, file_version: int) -> None:
+        """Record that the config file was rewritten from the registry (so it is not re-seeded)."""
+        self._write(lambda conn: conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('miners_file_version', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (file_version,),
+        ))
+
+    def add_miner(self, name: str, ip: str) -> bool:
+        def add(conn: sqlite3.Connection) -> bool:
+            if conn.execute("INSERT OR IGNORE INTO miners (name, ip) VALUES (?, ?)", (name, ip)).rowcount == 0:
+                return False
+            self._bump(conn)
+            return True
+
+        return self._write(add)
+
+    def remove_miner(self, name: str) -> bool:
+        """Drop ``name`` from the registry and from the served fleet snapshot."""
+
+        def remove(conn: sqlite3.Connection) -> bool:
+            if conn.execute("DELETE FROM miners WHERE name = ?", (name,)).rowcount == 0:
+                return False
+            self._bump(conn)
+            row = conn.execute("SELECT body FROM snapshots WHERE name = 'fleet'").fetchone()
+            fleet = _loads(row[0]) if row is not None else None
+            if isinstance(fleet, dict) and fleet.pop(name, None) is not None:
+                conn.execute(
+                    "UPDATE snapshots SET version = version + 1, body = ? WHERE name = 'fleet'", (_dumps(fleet),)
+                )
+            return True
+
+        return self._write(remove)
+
+    def registry(self) -> Tuple[int, Dict[str, str]]:
+        """(version, {name: ip}); the dict is reused while the version is unchanged."""
+        row = self._read("SELECT value FROM meta WHERE key = 'miners_version'")
+        version = row[0] if row is not None else 0
+        if version != self._registry[0]:
+            self._registry = (version, dict(self._read_all("SELECT name, ip FROM miners ORDER BY rowid")))
+        return self._registry
+
+
+class Leadership:
+    """
+    Per-worker loop: try to take/renew the lease every ``interval`` seconds,
+    call ``on_elected``/``on_demoted`` on changes and ``on_tick`` while leading.
+    """
+
+    def __init__(self, state: SharedState, name: str = "fleet", interval: float = FLEET_POLL_INTERVAL,
+                 ttl: float = FLEET_LEASE_TTL):
+        self.state = state
+        self.name = name
+        self.interval = interval
+        self.ttl = max(ttl, interval * 2)
+        self.is_leader = False
+        self._runner: Optional[asyncio.Task] = None
+        self.counters = {"terms": 0, "ticks": 0, "errors": 0}
+
+    async def step(
+        self,
+        on_elected: Callable[[], Awaitable[Any]],
+        on_tick: Callable[[], Awaitable[Any]],
+        on_demoted: Callable[[], Awaitable[Any]],
+    ) -> None:
+        try:
+            leader = await asyncio.to_thread(self.state.try_lead, self.name, self.ttl)
+        except sqlite3.Error as exc:
+            logger.warning("Leader lease check failed: %s", exc)
+            leader = False
+        if leader and not self.is_leader:
+            self.is_leader = True
+            self.counters["terms"] += 1
+            logger.info("Worker %s is now the fleet leader", os.getpid())
+            await on_elected()
+        elif not leader and self.is_leader:
+            self.is_leader = False
+            logger.info("Worker %s lost the fleet lease", os.getpid())
+            await on_demoted()
+        if leader:
+            self.counters["ticks"] += 1
+            await on_tick()
+
+    async def run(self, on_elected, on_tick, on_demoted) -> None:
+        while True:
+            try:
+                await self.step(on_elected, on_tick, on_demoted)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.counters["errors"] += 1
+                logger.exception("Fleet leader step failed: %s", exc)
+            await asyncio.sleep(self.interval)
+
+    def start(self, on_elected, on_tick, on_demoted) -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.ensure_future(self.run(on_elected, on_tick, on_demoted))
+
+    async def aclose(self) -> None:
+        if self._runner is not None and not self._runner.done():
+            self._runner.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await self._runner
+        self._runner = None
+        if self.is_leader:
+            self.is_leader = False
+            with suppress(sqlite3.Error):
+                await asyncio.to_thread(self.state.release, self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "leader": self.is_leader, "owner": self.state.owner}
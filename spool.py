@@ -0,0 +1,204 @@
+"""
+Append-only, size-bounded disk spool for the sync agent.
+
+Records are JSON lines appended to numbered segment files in a directory;
+nothing is rewritten in place. A small cursor file records how far the
+consumer has been acknowledged (segment + byte offset) and is replaced
+atomically, and segments are deleted once fully acknowledged. When the
+spool grows beyond ``max_bytes`` the oldest segments are discarded whole,
+so an outage longer than the budget loses the oldest samples, not the
+newest.
+
+A crash mid-append can leave a partial last line; it is cut off when the
+spool is reopened. Reads never consume: ``read_batch`` returns records plus
+the position to ``ack`` once they are delivered, so a failed delivery is
+simply read again.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("spool")
+
+SYNC_SPOOL_DIR = Path(os.getenv("SYNC_SPOOL_DIR", "sync_spool"))
+SYNC_SPOOL_MAX_BYTES = int(os.getenv("SYNC_SPOOL_MAX_BYTES", str(64 * 1024 * 1024)))
+SYNC_SPOOL_SEGMENT_BYTES = int(os.getenv("SYNC_SPOOL_SEGMENT_BYTES", str(1024 * 1024)))
+SYNC_SPOOL_FSYNC = os.getenv("SYNC_SPOOL_FSYNC", "false").strip().lower() in {"1", "true", "yes", "on"}
+
+Position = Tuple[int, int]  # (segment number, byte offset)
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class Spool:
+    def __init__(
+        self,
+        directory: Path = SYNC_SPOOL_DIR,
+        max_bytes: int = SYNC_SPOOL_MAX_BYTES,
+        segment_bytes: int = SYNC_SPOOL_SEGMENT_BYTES,
+        fsync: bool = SYNC_SPOOL_FSYNC,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.segment_bytes = max(segment_bytes, 1)
+        self.fsync = fsync
+        self.counters = {"appended": 0, "acked": 0, "dropped_segments": 0}
+        self._cursor_path = self.directory / "cursor.json"
+        self._segments = self._scan()
+        self._cursor = self._load_cursor()
+        self._repair_tail()
+        self._pending = self._count_pending()
+        self._bytes = sum(self._segment_path(n).stat().st_size for n in self._segments)
+
+    # Files -------------------------------------------------------------
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"{number:08d}{SEGMENT_SUFFIX}"
+
+    def _scan(self) -> List[int]:
+        numbers = []
+        for path in self.directory.glob(f"*{SEGMENT_SUFFIX}"):
+            try:
+                numbers.append(int(path.stem))
+            except ValueError:
+                continue
+        return sorted(numbers)
+
+    def _load_cursor(self) -> Position:
+        try:
+            data = json.loads(self._cursor_path.read_text())
+            cursor = (int(data["segment"]), int(data["offset"]))
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            cursor = (self._segments[0], 0) if self._segments else (1, 0)
+        if self._segments and cursor[0] < self._segments[0]:
+            cursor = (self._segments[0], 0)  # the acknowledged segment was trimmed away
+        return cursor
+
+    def _save_cursor(self) -> None:
+        tmp = self._cursor_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"segment": self._cursor[0], "offset": self._cursor[1]}))
+        os.replace(tmp, self._cursor_path)
+
+    def _repair_tail(self) -> None:
+        if not self._segments:
+            return
+        path = self._segment_path(self._segments[-1])
+        with path.open("rb+") as handle:
+            data = handle.read()
+            if data and not data.endswith(b"\n"):
+                keep = data.rfind(b"\n") + 1
+                handle.truncate(keep)
+                logger.warning("Dropped a partial record at the end of %s", path.name)
+
+    def _count_pending(self) -> int:
+        count = 0
+        for number in self._segments:
+            if number < self._cursor[0]:
+                continue
+            with self._segment_path(number).open("rb") as handle:
+                if number == self._cursor[0]:
+                    handle.seek(self._cursor[1])
+                count += sum(1 for _ in handle)
+        return count
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    # Producer ----------------------------------------------------------
+    def append(self, record: Dict[str, Any]) -> None:
+        line = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+        if not self._segments:
+            self._segments.append(self._cursor[0])
+        path = self._segment_path(self._segments[-1])
+        if path.exists() and path.stat().st_size + len(line) > self.segment_bytes:
+            self._segments.append(self._segments[-1] + 1)
+            path = self._segment_path(self._segments[-1])
+        with path.open("ab") as handle:
+            handle.write(line)
+            if self.fsync:
+                handle.flush()
+                os.fsync(handle.fileno())
+        self._bytes += len(line)
+        self._pending += 1
+        self.counters["appended"] += 1
+        self._enforce_limit()
+
+    def _enforce_limit(self) -> None:
+        while len(self._segments) > 1 and self._bytes > self.max_bytes:
+            oldest = self._segments.pop(0)
+            path = self._segment_path(oldest)
+            self._bytes -= path.stat().st_size
+            if oldest >= self._cursor[0]:
+                with path.open("rb") as handle:
+                    if oldest == self._cursor[0]:
+                        handle.seek(self._cursor[1])
+                    lost = sum(1 for _ in handle)
+                self._pending -= lost
+                logger.warning("Spool over %d bytes; dropped %d unsent record(s) from %s", self.max_bytes, lost, path.name)
+                self._cursor = (self._segments[0], 0)
+                self._save_cursor()
+            path.unlink(missing_ok=True)
+            self.counters["dropped_segments"] += 1
+
+    # Consumer ----------------------------------------------------------
+    def read_batch(self, max_records: int, max_bytes: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Position]:
+        """Oldest unacknowledged records (at least one if any) and the position after them."""
+        records: List[Dict[str, Any]] = []
+        used = 0
+        segment, offset = self._cursor
+        for number in self._segments:
+            if number < segment:
+                continue
+            start = offset if number == segment else 0
+            with self._segment_path(number).open("rb") as handle:
+                handle.seek(start)
+                position = start
+                for line in handle:
+                    if records and (len(records) >= max_records or (max_bytes and used + len(line) > max_bytes)):
+                        return records, (number, position)
+                    position += len(line)
+                    used += len(line)
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        logger.warning("Skipping unreadable spool record in %s", number)
+            segment, offset = number, position
+        return records, (segment, offset)
+
+    def ack(self, position: Position) -> None:
+        """Mark everything before ``position`` delivered and delete finished segments."""
+        segment, offset = position
+        acked = 0
+        for number in self._segments:
+            if number < self._cursor[0] or number > segment:
+                continue
+            start = self._cursor[1] if number == self._cursor[0] else 0
+            with self._segment_path(number).open("rb") as handle:
+                handle.seek(start)
+                chunk = handle.read(max(offset - start, 0)) if number == segment else handle.read()
+            acked += chunk.count(b"\n")
+        self._cursor = position
+        self._pending = max(self._pending - acked, 0)
+        self.counters["acked"] += acked
+        # Segments before the cursor (and the cursor's own, once fully read and superseded) can go.
+        while len(self._segments) > 1:
+            first = self._segments[0]
+            path = self._segment_path(first)
+            done = first < segment or (first == segment and offset >= path.stat().st_size)
+            if not done:
+                break
+            self._segments.pop(0)
+            self._bytes -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            if first == segment:
+                self._cursor = (self._segments[0], 0)
+        self._save_cursor()
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "pending": self._pending, "segments": len(self._segments), "bytes": self.size_bytes()}
@@ -6,6 +6,9 @@ cd "$PROJECT_ROOT"
 
 HOST="${HOST:-0.0.0.0}"
 PORT="${PORT:-8100}"
+# WEB_CONCURRENCY > 1 also turns on SHARED_STATE (unless set to false), so
+# the workers share one fleet snapshot and poller through SHARED_STATE_DB.
+WORKERS="${WEB_CONCURRENCY:-1}"
 
 if [[ -x "$PROJECT_ROOT/.venv/bin/uvicorn" ]]; then
     UVICORN_CMD="$PROJECT_ROOT/.venv/bin/uvicorn"
@@ -14,4 +17,4 @@ else
 fi
 
 export PYTHONPATH="$PROJECT_ROOT:${PYTHONPATH:-}"
-exec $UVICORN_CMD main:app --host "$HOST" --port "$PORT"
+exec $UVICORN_CMD main:app --host "$HOST" --port "$PORT" --workers "$WORKERS"
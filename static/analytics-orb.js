@@ -154,11 +154,14 @@
             return;
         }
         try {
-            const response = await fetch('/historical-metrics?limit=120', { credentials: 'same-origin' });
+            const response = await fetch('/historical-metrics?limit=120&points=32', {
+                credentials: 'same-origin',
+                headers: { Accept: HashlabWire.ACCEPT }
+            });
             if (!response.ok) {
                 throw new Error(`HTTP ${response.status}`);
             }
-            const payload = await response.json();
+            const payload = await HashlabWire.decodeResponse(response);
             const summary = payload.summary || {};
             const fleetHash = summary.fleet_avg_hash || 0;
             hashEl.textContent = `Fleet Hash: ${fleetHash.toFixed(1)} TH/s`;
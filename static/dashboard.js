@@ -43,11 +43,11 @@ function minerTriggersOrbSpin(name, miner) {
 async function updateMiners() {
     const minersRoot = document.getElementById("miners");
     try {
-        const res = await fetch("/miner-data", { credentials: "include" });
+        const res = await fetch("/miner-data", { credentials: "include", headers: { Accept: HashlabWire.ACCEPT } });
         if (!res.ok) {
             throw new Error(`Miner data request failed with status ${res.status}`);
         }
-        const data = await res.json();
+        const data = await HashlabWire.decodeResponse(res);
 
         const entries = Object.entries(data || {});
         const activeEntries = entries.filter(([, miner]) => miner && miner.alive);
@@ -369,10 +369,33 @@ function setDeloreanBlock(id, val) {
     }
 }
 
+// Revenue vs power cost per day, integrated server-side from logged samples.
+async function updateProfitability() {
+    const costInput = document.getElementById('costPerKwh');
+    const costPerKwh = costInput ? (parseFloat(costInput.value) || 0.13) : 0.13;
+    try {
+        const res = await fetch(`/profitability?power_cost_kwh=${costPerKwh}`, { credentials: 'include' });
+        if (!res.ok) return;
+        const payload = await res.json();
+        const rate = payload.fleet?.rate || {};
+        if (rate.revenue_usd_day == null) return;
+        setDeloreanBlock('profit-revenue', `$${rate.revenue_usd_day.toFixed(2)}`);
+        setDeloreanBlock('profit-net', `${rate.profit_usd_day < 0 ? '-' : ''}$${Math.abs(rate.profit_usd_day).toFixed(2)}`);
+    } catch (err) {
+        console.warn('Profitability unavailable:', err);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    updateProfitability();
+    setInterval(updateProfitability, 60000);
+});
+
 // Listen for cost input changes
 document.addEventListener('DOMContentLoaded', function() {
     const costInput = document.getElementById('costPerKwh');
     if (costInput) {
+        costInput.addEventListener('change', updateProfitability);
         costInput.addEventListener('input', function() {
             let totalWatts = 0;
             if (window.latestMinerData) {
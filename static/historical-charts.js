@@ -116,11 +116,46 @@
         const totalHashSeries = ordered.map((item) => Number(item.totalHash.toFixed(2)));
         const avgTempSeries = ordered.map((item) => Number(average(item.temps).toFixed(2)));
 
+        // Forecast points (served precomputed in summary.forecast) extend the
+        // x-axis; the band is drawn as upper/lower lines filled between.
+        const forecastPoints = (metric) => summary?.forecast?.[metric]?.points || [];
+        const horizon = Math.max(forecastPoints('hashrate').length, forecastPoints('temp').length);
+        const forecastLabels = forecastPoints(forecastPoints('hashrate').length ? 'hashrate' : 'temp')
+            .map((p) => (p.timestamp ? formatTimeLabel(p.timestamp) : `+${p.step}`));
+        const chartLabels = labels.concat(forecastLabels);
+        const forecastDatasets = (metric, color, fillColor) => {
+            const points = forecastPoints(metric);
+            if (!points.length) return [];
+            const pad = (values, anchor) => {
+                const lead = new Array(labels.length).fill(null);
+                if (lead.length && anchor !== undefined) lead[lead.length - 1] = anchor;
+                return lead.concat(values, new Array(horizon - values.length).fill(null));
+            };
+            const last = metric === 'hashrate' ? totalHashSeries.at(-1) : avgTempSeries.at(-1);
+            const line = { borderWidth: 1, pointRadius: 0, tension: 0.25 };
+            return [
+                { ...line, label: 'Forecast upper', data: pad(points.map((p) => Number(p.upper.toFixed(2))), last), borderColor: 'transparent', fill: false },
+                { ...line, label: 'Forecast lower', data: pad(points.map((p) => Number(p.lower.toFixed(2))), last), borderColor: 'transparent', backgroundColor: fillColor, fill: '-1' },
+                { ...line, label: 'Forecast', data: pad(points.map((p) => Number(p.value.toFixed(2))), last), borderColor: color, borderDash: [6, 4], fill: false }
+            ];
+        };
+        const forecastLegend = {
+            plugins: {
+                legend: {
+                    labels: {
+                        color: '#dffcff',
+                        filter: (item) => !item.text.startsWith('Forecast ')
+                    }
+                },
+                tooltip: { mode: 'nearest', intersect: false }
+            }
+        };
+
         if (fleetCtx) {
             new Chart(fleetCtx, {
                 type: 'line',
                 data: {
-                    labels,
+                    labels: chartLabels,
                     datasets: [{
                         label: 'Total TH/s',
                         data: totalHashSeries,
@@ -130,9 +165,9 @@
                         fill: true,
                         borderWidth: 2,
                         pointRadius: 0
-                    }]
+                    }, ...forecastDatasets('hashrate', '#00fff0', 'rgba(0,255,240,0.18)')]
                 },
-                options: baseOptions()
+                options: baseOptions(forecastLegend)
             });
         }
 
@@ -140,7 +175,7 @@
             new Chart(tempCtx, {
                 type: 'line',
                 data: {
-                    labels,
+                    labels: chartLabels,
                     datasets: [{
                         label: 'Avg °C',
                         data: avgTempSeries,
@@ -150,9 +185,9 @@
                         fill: true,
                         borderWidth: 2,
                         pointRadius: 0
-                    }]
+                    }, ...forecastDatasets('temp', '#ff6b81', 'rgba(255,107,129,0.18)')]
                 },
-                options: baseOptions()
+                options: baseOptions(forecastLegend)
             });
         }
 
@@ -650,15 +685,15 @@
         const statusEl = document.getElementById('history-meta');
         try {
             const [histRes, snapRes] = await Promise.all([
-                fetch('/historical-metrics?limit=720', { credentials: 'include' }),
-                fetch('/miner-data', { credentials: 'include' })
+                fetch('/historical-metrics?limit=720&points=240', { credentials: 'include', headers: { Accept: HashlabWire.ACCEPT } }),
+                fetch('/miner-data', { credentials: 'include', headers: { Accept: HashlabWire.ACCEPT } })
             ]);
             if (!histRes.ok) throw new Error(`Historical metrics returned ${histRes.status}`);
-            const payload = await histRes.json();
+            const payload = await HashlabWire.decodeResponse(histRes);
             if (!payload.success) {
                 throw new Error(payload.error || 'Unable to load historical metrics.');
             }
-            const snapshot = snapRes.ok ? await snapRes.json().catch(() => ({})) : {};
+            const snapshot = snapRes.ok ? await HashlabWire.decodeResponse(snapRes).catch(() => ({})) : {};
             const nowTs = new Date().toISOString();
             const snapshotRows = Object.entries(snapshot || {}).map(([name, miner]) => ({
                 ...(miner || {}),
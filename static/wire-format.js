@@ -0,0 +1,127 @@
+// Decoders for the compact telemetry wire formats served by /miner-data and
+// /historical-metrics (see response_encoding.py): columnar JSON and MessagePack.
+(function () {
+    const COLUMNAR = 'application/vnd.hashlab.columnar+json';
+    const MSGPACK = 'application/msgpack';
+    const utf8 = new TextDecoder();
+
+    function decodeMsgpack(buffer) {
+        const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        let pos = 0;
+
+        const str = (size) => {
+            const value = utf8.decode(bytes.subarray(pos, pos + size));
+            pos += size;
+            return value;
+        };
+        const bin = (size) => {
+            const value = bytes.slice(pos, pos + size);
+            pos += size;
+            return value;
+        };
+        const array = (size) => {
+            const out = new Array(size);
+            for (let i = 0; i < size; i++) out[i] = read();
+            return out;
+        };
+        const map = (size) => {
+            const out = {};
+            for (let i = 0; i < size; i++) {
+                const key = read();
+                out[key] = read();
+            }
+            return out;
+        };
+
+        function read() {
+            const type = view.getUint8(pos++);
+            if (type < 0x80) return type;
+            if (type < 0x90) return map(type & 0x0f);
+            if (type < 0xa0) return array(type & 0x0f);
+            if (type < 0xc0) return str(type & 0x1f);
+            if (type >= 0xe0) return type - 0x100;
+            let value;
+            switch (type) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: value = view.getUint8(pos); pos += 1; return bin(value);
+                case 0xc5: value = view.getUint16(pos); pos += 2; return bin(value);
+                case 0xc6: value = view.getUint32(pos); pos += 4; return bin(value);
+                case 0xca: value = view.getFloat32(pos); pos += 4; return value;
+                case 0xcb: value = view.getFloat64(pos); pos += 8; return value;
+                case 0xcc: value = view.getUint8(pos); pos += 1; return value;
+                case 0xcd: value = view.getUint16(pos); pos += 2; return value;
+                case 0xce: value = view.getUint32(pos); pos += 4; return value;
+                case 0xcf: value = Number(view.getBigUint64(pos)); pos += 8; return value;
+                case 0xd0: value = view.getInt8(pos); pos += 1; return value;
+                case 0xd1: value = view.getInt16(pos); pos += 2; return value;
+                case 0xd2: value = view.getInt32(pos); pos += 4; return value;
+                case 0xd3: value = Number(view.getBigInt64(pos)); pos += 8; return value;
+                case 0xd9: value = view.getUint8(pos); pos += 1; return str(value);
+                case 0xda: value = view.getUint16(pos); pos += 2; return str(value);
+                case 0xdb: value = view.getUint32(pos); pos += 4; return str(value);
+                case 0xdc: value = view.getUint16(pos); pos += 2; return array(value);
+                case 0xdd: value = view.getUint32(pos); pos += 4; return array(value);
+                case 0xde: value = view.getUint16(pos); pos += 2; return map(value);
+                case 0xdf: value = view.getUint32(pos); pos += 4; return map(value);
+                default: throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+            }
+        }
+
+        return read();
+    }
+
+    // {length, columns: {field: [...]}} -> [{field: value}, ...]; null cells are omitted.
+    function rowsFromColumns(block) {
+        const length = (block && block.length) || 0;
+        const rows = Array.from({ length }, () => ({}));
+        Object.entries((block && block.columns) || {}).forEach(([field, values]) => {
+            for (let i = 0; i < length; i++) {
+                if (values[i] !== null && values[i] !== undefined) rows[i][field] = values[i];
+            }
+        });
+        return rows;
+    }
+
+    function fleetFromColumns(block) {
+        const rows = rowsFromColumns(block);
+        const fleet = {};
+        ((block && block.index) || []).forEach((name, i) => { fleet[name] = rows[i]; });
+        return fleet;
+    }
+
+    // Columnar payloads are either the fleet map (has `index`) or a history
+    // payload whose `data` is a columnar block.
+    function expandColumnar(payload) {
+        if (payload && Array.isArray(payload.index)) return fleetFromColumns(payload);
+        if (payload && payload.data && payload.data.columns) {
+            return { ...payload, data: rowsFromColumns(payload.data) };
+        }
+        return payload;
+    }
+
+    async function decodeResponse(response) {
+        const type = (response.headers.get('Content-Type') || '').split(';')[0].trim();
+        if (type === MSGPACK || type === 'application/x-msgpack') {
+            return decodeMsgpack(await response.arrayBuffer());
+        }
+        if (type === COLUMNAR) {
+            return expandColumnar(await response.json());
+        }
+        return response.json();
+    }
+
+    window.HashlabWire = {
+        COLUMNAR,
+        MSGPACK,
+        // Accept header for telemetry fetches; servers without the columnar form answer JSON.
+        ACCEPT: `${COLUMNAR}, application/json;q=0.9`,
+        decodeMsgpack,
+        rowsFromColumns,
+        fleetFromColumns,
+        expandColumnar,
+        decodeResponse,
+    };
+})();
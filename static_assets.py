@@ -0,0 +1,185 @@
+"""
+Production static asset pipeline.
+
+``build_assets`` copies every file under ``static/`` into ``static/dist/``
+under a content-hashed name (``dashboard.js`` -> ``dashboard.3f9c2a1b7d.js``)
+and writes gzip and, when the ``brotli`` package is installed, brotli
+variants of text assets next to it, plus a ``manifest.json`` mapping
+original names to hashed ones. Building is idempotent: unchanged files keep
+their names and are not rewritten. It runs as a deploy step
+(``tools/build_static.py``); at startup each worker only reads the existing
+``manifest.json`` and builds (without pruning) only when there is none, so
+no worker can delete files another worker's manifest still points at.
+
+Templates call ``static_url('dashboard.js')``. With the pipeline enabled
+that returns the fingerprinted URL, which ``PrecompressedStaticFiles``
+serves with a one-year ``immutable`` Cache-Control and the best encoding
+the client accepts. Without it (development), URLs stay ``/static/<name>``
+and the no-cache middleware keeps edits live.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants only
+    brotli = None
+
+logger = logging.getLogger("static_assets")
+
+STATIC_DIR = Path("static")
+BUILD_DIRNAME = "dist"
+STATIC_URL_PREFIX = "/static"
+COMPRESSIBLE_SUFFIXES = {".js", ".css", ".html", ".svg", ".json", ".txt", ".map"}
+COMPRESS_MIN_BYTES = 512
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "3600"))  # un-fingerprinted files in production
+
+
+def _production() -> bool:
+    return bool(os.getenv("RENDER")) or os.getenv("ENVIRONMENT") == "production"
+
+
+def static_pipeline_enabled() -> bool:
+    raw = os.getenv("STATIC_PIPELINE")
+    if raw is None:
+        return _production()
+    return raw.strip().lower() not in {"0", "false", "off", "no"}
+
+
+def hashed_name(relative: str, digest: str) -> str:
+    path = Path(relative)
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}")).replace(os.sep, "/")
+
+
+def _write_if_missing(path: Path, data: bytes) -> bool:
+    if path.exists():
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique temp name: several workers may build at the same time.
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+
+def build_assets(
+    source: Path = STATIC_DIR,
+    build_dirname: str = BUILD_DIRNAME,
+    prune: bool = True,
+) -> Dict[str, str]:
+    """
+    Fingerprint and precompress ``source`` into ``source/<build_dirname>``;
+    returns the manifest. ``prune`` removes build files the new manifest no
+    longer lists.
+    """
+    source = Path(source)
+    out = source / build_dirname
+    manifest: Dict[str, str] = {}
+    keep = {"manifest.json"}
+    written = 0
+    for path in sorted(source.rglob("*")):
+        if not path.is_file() or out in path.parents or path.name.startswith("."):
+            continue
+        relative = path.relative_to(source).as_posix()
+        data = path.read_bytes()
+        target = hashed_name(relative, hashlib.sha256(data).hexdigest()[:10])
+        manifest[relative] = f"{build_dirname}/{target}"
+        keep.add(target)
+        written += _write_if_missing(out / target, data)
+        if path.suffix.lower() in COMPRESSIBLE_SUFFIXES and len(data) >= COMPRESS_MIN_BYTES:
+            keep.add(target + ".gz")
+            written += _write_if_missing(out / (target + ".gz"), gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                keep.add(target + ".br")
+                written += _write_if_missing(out / (target + ".br"), brotli.compress(data, quality=11))
+    if prune and out.exists():
+        for stale in out.rglob("*"):
+            if stale.is_file() and stale.suffix != ".tmp" and stale.relative_to(out).as_posix() not in keep:
+                stale.unlink(missing_ok=True)
+    out.mkdir(parents=True, exist_ok=True)
+    tmp = out / f"manifest.json.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, out / "manifest.json")
+    logger.info("Static assets: %d files fingerprinted, %d new build files in %s", len(manifest), written, out)
+    return manifest
+
+
+class StaticAssets:
+    """Template-facing URL lookup for static files."""
+
+    def __init__(self, source: Path = STATIC_DIR, enabled: Optional[bool] = None):
+        self.source = Path(source)
+        self.enabled = static_pipeline_enabled() if enabled is None else enabled
+        self.manifest: Dict[str, str] = {}
+
+    def load(self) -> None:
+        """Read the built manifest; build one (without pruning) only if it is missing."""
+        if not self.enabled:
+            return
+        manifest = self.source / BUILD_DIRNAME / "manifest.json"
+        try:
+            self.manifest = json.loads(manifest.read_text())
+        except FileNotFoundError:
+            logger.warning("No %s; building static assets at startup", manifest)
+            self.manifest = build_assets(self.source, prune=False)
+
+    def url(self, name: str) -> str:
+        name = name.lstrip("/")
+        return f"{STATIC_URL_PREFIX}/{self.manifest.get(name, name)}"
+
+
+def _accepted(scope, encoding: str) -> bool:
+    for key, value in scope.get("headers", []):
+        if key == b"accept-encoding":
+            offers = [part.split(";")[0].strip() for part in value.decode("latin-1").lower().split(",")]
+            return encoding in offers
+    return False
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves fingerprinted build files as immutable, picking
+    a ``.br``/``.gz`` sibling when the client accepts it. Other files get
+    ``cache_control`` when one is given (production) and are otherwise left
+    to the development no-cache middleware.
+    """
+
+    def __init__(self, *args, build_dirname: str = BUILD_DIRNAME, cache_control: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.build_prefix = build_dirname + "/"
+        self.cache_control = cache_control
+
+    async def get_response(self, path: str, scope):
+        if not path.replace(os.sep, "/").startswith(self.build_prefix):
+            response = await super().get_response(path, scope)
+            if self.cache_control and response.status_code in (200, 304):
+                response.headers["Cache-Control"] = self.cache_control
+            return response
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if not _accepted(scope, encoding):
+                continue
+            full_path, stat_result = self.lookup_path(path + suffix)
+            if stat_result is None:
+                continue
+            response = self.file_response(full_path, stat_result, scope)
+            if response.status_code == 200:
+                response.headers["Content-Type"] = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                response.headers["Content-Encoding"] = encoding
+            break
+        else:
+            response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
@@ -10,6 +10,19 @@ Environment Variables Required:
 - GIST_TOKEN: GitHub personal access token with gist scope
 - GIST_ID: The GitHub Gist ID to update (default: 9e0d60bcc84c808f505f9a4bfea0bc2f)
 
+Optional change detection:
+- SYNC_TOLERANCES: per-field absolute tolerances, e.g. "temp=1,power=0.5"
+- SYNC_REL_TOLERANCE: relative tolerance applied to every numeric field (default 0.01)
+- SYNC_IGNORE_FIELDS: fields that never trigger an upload on their own
+- SYNC_HEARTBEAT: upload at least this often even when nothing changed (seconds)
+
+Direct ingest (SYNC_TRANSPORT=ingest) instead of the Gist relay:
+- INGEST_URL: the dashboard's ingest endpoint, e.g. https://dashboard.example/ingest
+- INGEST_TOKEN: bearer token matching the dashboard's INGEST_TOKEN
+Every polled snapshot is appended to a bounded disk spool (SYNC_SPOOL_DIR) and
+delivered oldest first in gzip batches of INGEST_BATCH_SIZE; snapshots polled
+while the uplink is down survive restarts and are sent once it returns.
+
 Usage:
     export GIST_TOKEN="your_github_token_here"
     export GIST_ID="9e0d60bcc84c808f505f9a4bfea0bc2f"
@@ -17,24 +30,71 @@ Usage:
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import os
 import sys
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from time import monotonic
+from typing import Any, Dict, NamedTuple, Optional, Tuple
 
 import httpx
 
 # Import the existing miner API functions
 from miner_api import fetch_miner_stats
+from ingest import encode_batch
+from spool import Spool
 
 # Configuration
 SYNC_INTERVAL = int(os.getenv("SYNC_INTERVAL", "60"))  # Poll every 60 seconds
 GIST_TOKEN = os.getenv("GIST_TOKEN")
 GIST_ID = os.getenv("GIST_ID", "9e0d60bcc84c808f505f9a4bfea0bc2f")
 GIST_FILENAME = "miner_data.json"
+SYNC_TRANSPORT = os.getenv("SYNC_TRANSPORT", "gist").strip().lower()  # gist | ingest
+INGEST_URL = os.getenv("INGEST_URL")
+INGEST_TOKEN = os.getenv("INGEST_TOKEN")
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "60"))
+INGEST_BATCH_BYTES = int(os.getenv("INGEST_BATCH_BYTES", str(1024 * 1024)))  # before compression
+SYNC_DRAIN_MAX_BATCHES = int(os.getenv("SYNC_DRAIN_MAX_BATCHES", "20"))  # per sync cycle
+SYNC_DRAIN_PAUSE = float(os.getenv("SYNC_DRAIN_PAUSE", "0.5"))
+SYNC_MAX_BACKOFF = float(os.getenv("SYNC_MAX_BACKOFF", "900"))
+SYNC_HEARTBEAT = int(os.getenv("SYNC_HEARTBEAT", "600"))
+SYNC_REL_TOLERANCE = float(os.getenv("SYNC_REL_TOLERANCE", "0.01"))
+SYNC_IGNORE_FIELDS = frozenset(
+    f.strip() for f in os.getenv("SYNC_IGNORE_FIELDS", "uptime,sharesAccepted,sharesRejected").split(",") if f.strip()
+)
+DEFAULT_TOLERANCES = {
+    "hashrate_1m": 0.02,   # TH/s
+    "hashrate_24h": 0.01,
+    "efficiency": 0.5,     # J/TH
+    "temp": 1.0,           # degrees Celsius
+    "chipTemp": 1.0,
+    "asicTemps": 1.0,
+    "power": 0.5,          # watts
+    "fanrpm": 100,
+    "voltage": 10,         # mV
+    "frequency": 5,        # MHz
+    "wifiRSSI": 3,         # dBm
+}
+
+
+def _parse_tolerances(raw: Optional[str]) -> Dict[str, float]:
+    tolerances = dict(DEFAULT_TOLERANCES)
+    for item in (raw or "").split(","):
+        field, sep, value = item.partition("=")
+        if not sep:
+            continue
+        try:
+            tolerances[field.strip()] = float(value)
+        except ValueError:
+            continue
+    return tolerances
+
+
+SYNC_TOLERANCES = _parse_tolerances(os.getenv("SYNC_TOLERANCES"))
 
 # Setup logging
 logging.basicConfig(
@@ -80,60 +140,295 @@ async def gather_miner_stats(miners: Dict[str, str]) -> Dict[str, Any]:
     return stats
 
 
-async def update_gist(data: Dict[str, Any]) -> bool:
-    """Update the GitHub Gist with new miner data"""
+def canonicalize(data: Dict[str, Any], ignore=SYNC_IGNORE_FIELDS) -> Dict[str, Any]:
+    """Miner data without ignored fields, with floats rounded so noise below 1e-6 hashes the same."""
+    def clean(value: Any) -> Any:
+        if isinstance(value, float):
+            return round(value, 6)
+        if isinstance(value, dict):
+            return {k: clean(v) for k, v in value.items() if k not in ignore}
+        if isinstance(value, (list, tuple)):
+            return [clean(v) for v in value]
+        return value
+
+    return clean(data)
+
+
+def content_hash(data: Dict[str, Any], ignore=SYNC_IGNORE_FIELDS) -> str:
+    """SHA-256 of the canonical JSON form (sorted keys, compact separators)."""
+    blob = json.dumps(canonicalize(data, ignore), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _differs(field: str, old: Any, new: Any, tolerances: Dict[str, float], rel_tolerance: float) -> bool:
+    if isinstance(old, bool) or isinstance(new, bool):
+        return old != new
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        allowed = max(tolerances.get(field, 0.0), rel_tolerance * max(abs(old), abs(new)))
+        return abs(new - old) > allowed
+    if isinstance(old, list) and isinstance(new, list):
+        return len(old) != len(new) or any(
+            _differs(field, a, b, tolerances, rel_tolerance) for a, b in zip(old, new)
+        )
+    return old != new
+
+
+def meaningful_change(
+    previous: Optional[Dict[str, Any]],
+    current: Dict[str, Any],
+    tolerances: Optional[Dict[str, float]] = None,
+    rel_tolerance: float = SYNC_REL_TOLERANCE,
+    ignore=SYNC_IGNORE_FIELDS,
+) -> Optional[str]:
+    """Describe the first change beyond tolerance between two miner maps, or None."""
+    if previous is None:
+        return "first upload"
+    tolerances = SYNC_TOLERANCES if tolerances is None else tolerances
+    if set(previous) != set(current):
+        return "miner set changed"
+    for name, miner in current.items():
+        old = previous[name]
+        for field in set(old) | set(miner):
+            if field in ignore:
+                continue
+            if field not in old or field not in miner:
+                return f"{name}.{field} added/removed"
+            if _differs(field, old[field], miner[field], tolerances, rel_tolerance):
+                return f"{name}.{field}: {old[field]!r} -> {miner[field]!r}"
+    return None
+
+
+class ChangeDetector:
+    """Decides whether a polled snapshot is worth uploading.
+
+    Uploads happen on the first cycle, when the canonical content hash differs
+    *and* some field moved beyond its tolerance, or when ``heartbeat`` seconds
+    passed since the last upload (so ``last_updated`` on the cloud side keeps
+    advancing while the fleet is steady). The comparison is always against the
+    last *uploaded* snapshot, so slow drift still gets published once it adds
+    up past the tolerance.
+    """
+
+    def __init__(
+        self,
+        tolerances: Optional[Dict[str, float]] = None,
+        rel_tolerance: float = SYNC_REL_TOLERANCE,
+        heartbeat: float = SYNC_HEARTBEAT,
+        ignore=SYNC_IGNORE_FIELDS,
+    ):
+        self.tolerances = SYNC_TOLERANCES if tolerances is None else tolerances
+        self.rel_tolerance = rel_tolerance
+        self.heartbeat = heartbeat
+        self.ignore = ignore
+        self._uploaded: Optional[Dict[str, Any]] = None
+        self._uploaded_hash: Optional[str] = None
+        self._uploaded_at: Optional[float] = None
+
+    def check(self, data: Dict[str, Any], now: Optional[float] = None) -> Tuple[bool, str]:
+        now = monotonic() if now is None else now
+        if self._uploaded is None:
+            return True, "first upload"
+        if content_hash(data, self.ignore) != self._uploaded_hash:
+            reason = meaningful_change(self._uploaded, data, self.tolerances, self.rel_tolerance, self.ignore)
+            if reason:
+                return True, reason
+        if self.heartbeat and now - (self._uploaded_at or 0) >= self.heartbeat:
+            return True, "heartbeat"
+        return False, "no change beyond tolerance"
+
+    def mark_uploaded(self, data: Dict[str, Any], now: Optional[float] = None) -> None:
+        self._uploaded = json.loads(json.dumps(data, default=str))
+        self._uploaded_hash = content_hash(data, self.ignore)
+        self._uploaded_at = monotonic() if now is None else now
+
+
+SYNC_STATS: Dict[str, Any] = {
+    "cycles": 0,
+    "uploads": 0,
+    "skipped": 0,  # no meaningful change since the last upload
+    "failed": 0,  # upload/delivery failed or backing off
+    "bytes_sent": 0,
+    "cycle_bytes": deque(maxlen=1440),  # bytes sent per cycle (0 for skipped/failed cycles)
+}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=10)
+    return _client
+
+
+def build_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "last_updated": datetime.utcnow().isoformat() + "Z",
+        "sync_interval": SYNC_INTERVAL,
+        "miner_count": len(data),
+        "miners": data,
+    }
+
+
+def encode_gist_body(payload: Dict[str, Any]) -> bytes:
+    """Gist PATCH body with the miner JSON serialized compactly."""
+    content = json.dumps(payload, separators=(",", ":"), default=str)
+    body = {"files": {GIST_FILENAME: {"content": content}}}
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def record_cycle(bytes_sent: int, outcome: str) -> None:
+    """Count one sync cycle; ``outcome`` is ``"uploaded"``, ``"skipped"`` or ``"failed"``."""
+    SYNC_STATS["cycles"] += 1
+    SYNC_STATS["cycle_bytes"].append(bytes_sent)
+    SYNC_STATS["bytes_sent"] += bytes_sent
+    SYNC_STATS["uploads" if outcome == "uploaded" else outcome] += 1
+
+
+async def update_gist(data: Dict[str, Any]) -> int:
+    """Update the GitHub Gist with new miner data; returns bytes sent (0 on failure)."""
     if not GIST_TOKEN:
         logger.error("GIST_TOKEN environment variable not set!")
-        return False
+        return 0
     
     if not GIST_ID:
         logger.error("GIST_ID environment variable not set!")
-        return False
+        return 0
     
-    # Add metadata
-    payload = {
-        "last_updated": datetime.utcnow().isoformat() + "Z",
-        "sync_interval": SYNC_INTERVAL,
-        "miner_count": len(data),
-        "miners": data
-    }
-    
-    # Prepare Gist update request
-    gist_data = {
-        "files": {
-            GIST_FILENAME: {
-                "content": json.dumps(payload, indent=2)
-            }
-        }
-    }
+    body = encode_gist_body(build_payload(data))
     
     url = f"https://api.github.com/gists/{GIST_ID}"
     headers = {
         "Authorization": f"Bearer {GIST_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
+        "Accept": "application/vnd.github.v3+json",
+        "Content-Type": "application/json",
     }
     
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.patch(url, headers=headers, json=gist_data)
-            response.raise_for_status()
+        response = await _http().patch(url, headers=headers, content=body)
+        response.raise_for_status()
         
-        logger.info(f"Successfully updated Gist {GIST_ID} with {len(data)} miner(s)")
-        return True
+        logger.info(f"Successfully updated Gist {GIST_ID} with {len(data)} miner(s) ({len(body)} bytes)")
+        return len(body)
     
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error updating Gist: {e.response.status_code} - {e.response.text}")
-        return False
+        return 0
     except Exception as e:
         logger.error(f"Error updating Gist: {e}")
-        return False
+        return 0
+
+
+class PushResult(NamedTuple):
+    sent: int                      # bytes sent, 0 when the batch was not accepted
+    status: Optional[int] = None   # HTTP status, None for connection errors
+    retry_after: Optional[float] = None
+
+
+async def push_ingest(samples: list) -> PushResult:
+    """POST a gzip batch of snapshots to INGEST_URL."""
+    if not INGEST_URL or not INGEST_TOKEN:
+        logger.error("INGEST_URL and INGEST_TOKEN must be set for SYNC_TRANSPORT=ingest")
+        return PushResult(0)
+    body = encode_batch(samples)
+    headers = {
+        "Authorization": f"Bearer {INGEST_TOKEN}",
+        "Content-Type": "application/json",
+        "Content-Encoding": "gzip",
+    }
+    try:
+        response = await _http().post(INGEST_URL, headers=headers, content=body)
+        response.raise_for_status()
+        return PushResult(len(body), response.status_code)
+    except httpx.HTTPStatusError as e:
+        logger.error(f"HTTP error pushing to ingest endpoint: {e.response.status_code} - {e.response.text}")
+        retry_after = e.response.headers.get("Retry-After")
+        try:
+            delay = float(retry_after) if retry_after else None
+        except ValueError:
+            delay = None
+        return PushResult(0, e.response.status_code, delay)
+    except Exception as e:
+        logger.error(f"Error pushing to ingest endpoint: {e}")
+        return PushResult(0)
+
+
+class SpoolDrainer:
+    """Delivers the spool to the ingest endpoint oldest first, with backpressure.
+
+    Records are acknowledged only after the endpoint accepts their batch, so
+    order is preserved and nothing is skipped. Each call sends at most
+    ``max_batches`` batches, pausing ``pause`` seconds between them, so a long
+    backlog drains over several cycles without starving polling or saturating
+    the uplink. A 413 halves the batch size (it grows back after successes);
+    429/503 honour ``Retry-After``; other failures back off exponentially.
+    """
+
+    def __init__(
+        self,
+        spool: Spool,
+        batch_size: int = INGEST_BATCH_SIZE,
+        batch_bytes: int = INGEST_BATCH_BYTES,
+        max_batches: int = SYNC_DRAIN_MAX_BATCHES,
+        pause: float = SYNC_DRAIN_PAUSE,
+        max_backoff: float = SYNC_MAX_BACKOFF,
+    ):
+        self.spool = spool
+        self.max_batch_size = max(batch_size, 1)
+        self.batch_size = self.max_batch_size
+        self.batch_bytes = batch_bytes
+        self.max_batches = max(max_batches, 1)
+        self.pause = pause
+        self.max_backoff = max_backoff
+        self._resume_at = 0.0
+        self._failures = 0
+
+    def backoff_remaining(self) -> float:
+        return max(self._resume_at - monotonic(), 0.0)
+
+    def _back_off(self, delay: Optional[float]) -> None:
+        self._failures += 1
+        if delay is None:
+            delay = min(SYNC_INTERVAL * 2 ** (self._failures - 1), self.max_backoff)
+        self._resume_at = monotonic() + delay
+
+    async def drain(self) -> int:
+        """Send up to ``max_batches`` batches; returns bytes sent."""
+        if self.backoff_remaining() > 0:
+            return 0
+        total = 0
+        for index in range(self.max_batches):
+            records, position = self.spool.read_batch(self.batch_size, self.batch_bytes)
+            if not records:
+                break
+            if index and self.pause:
+                await asyncio.sleep(self.pause)
+            result = await push_ingest(records)
+            if result.sent:
+                self.spool.ack(position)
+                total += result.sent
+                self._failures = 0
+                self.batch_size = min(self.batch_size * 2, self.max_batch_size)
+                continue
+            if result.status == 413 and self.batch_size > 1:
+                self.batch_size = max(self.batch_size // 2, 1)
+                logger.warning(f"Ingest batch too large; retrying with {self.batch_size} snapshot(s) per batch")
+                continue
+            self._back_off(result.retry_after if result.status in (429, 503) else None)
+            logger.warning(f"Ingest delivery paused for {self.backoff_remaining():.0f}s")
+            break
+        return total
 
 
 async def sync_loop():
     """Main sync loop - continuously poll miners and update Gist"""
-    logger.info("Starting miner data sync to GitHub Gist")
-    logger.info(f"Sync interval: {SYNC_INTERVAL} seconds")
-    logger.info(f"Gist ID: {GIST_ID}")
+    if SYNC_TRANSPORT == "ingest":
+        logger.info(f"Starting miner data sync to ingest endpoint {INGEST_URL}")
+        logger.info(f"Sync interval: {SYNC_INTERVAL} seconds (batches of up to {INGEST_BATCH_SIZE})")
+    else:
+        logger.info("Starting miner data sync to GitHub Gist")
+        logger.info(f"Sync interval: {SYNC_INTERVAL} seconds (heartbeat every {SYNC_HEARTBEAT} seconds)")
+        logger.info(f"Gist ID: {GIST_ID}")
     
     # Load miner configuration
     miners = load_miners_config()
@@ -143,6 +438,8 @@ async def sync_loop():
     
     iteration = 0
     consecutive_failures = 0
+    detector = ChangeDetector()
+    drainer = SpoolDrainer(Spool()) if SYNC_TRANSPORT == "ingest" else None
     
     while True:
         try:
@@ -157,13 +454,47 @@ async def sync_loop():
             online_count = sum(1 for m in stats.values() if m.get("alive"))
             logger.info(f"Polled {len(stats)} miners, {online_count} online")
             
+            if drainer is not None:
+                # Spool first so the snapshot survives an outage or restart, then deliver the backlog.
+                drainer.spool.append(build_payload(stats))
+                sent = await drainer.drain()
+                pending = len(drainer.spool)
+                record_cycle(sent, "uploaded" if sent else "failed")
+                if not pending:
+                    consecutive_failures = 0
+                    logger.info(f"Pushed {sent} bytes to ingest endpoint. Next sync in {SYNC_INTERVAL} seconds.")
+                elif sent:
+                    consecutive_failures = 0
+                    logger.info(f"Pushed {sent} bytes; {pending} spooled snapshot(s) still to send")
+                else:
+                    consecutive_failures += 1
+                    logger.warning(
+                        f"Ingest delivery failed ({consecutive_failures} consecutive failures); "
+                        f"{pending} snapshot(s) spooled for retry"
+                    )
+                await asyncio.sleep(SYNC_INTERVAL)
+                continue
+            
+            upload, reason = detector.check(stats)
+            if not upload:
+                record_cycle(0, "skipped")
+                logger.info(f"Skipping upload ({reason}). Next sync in {SYNC_INTERVAL} seconds.")
+                await asyncio.sleep(SYNC_INTERVAL)
+                continue
+            
             # Update Gist
-            logger.info("Updating Gist...")
-            success = await update_gist(stats)
+            logger.info(f"Updating Gist ({reason})...")
+            sent = await update_gist(stats)
+            record_cycle(sent, "uploaded" if sent else "failed")
             
-            if success:
+            if sent:
+                detector.mark_uploaded(stats)
                 consecutive_failures = 0
-                logger.info(f"Sync complete. Next sync in {SYNC_INTERVAL} seconds.")
+                logger.info(
+                    f"Sync complete: {sent} bytes this cycle, {SYNC_STATS['bytes_sent']} total "
+                    f"({SYNC_STATS['uploads']} uploads, {SYNC_STATS['skipped']} skipped, {SYNC_STATS['failed']} failed). "
+                    f"Next sync in {SYNC_INTERVAL} seconds."
+                )
             else:
                 consecutive_failures += 1
                 logger.warning(f"Sync failed ({consecutive_failures} consecutive failures)")
@@ -185,12 +516,19 @@ async def sync_loop():
 def main():
     """Entry point"""
     # Validate configuration
-    if not GIST_TOKEN:
+    if SYNC_TRANSPORT == "ingest":
+        if not INGEST_URL or not INGEST_TOKEN:
+            logger.error("SYNC_TRANSPORT=ingest requires INGEST_URL and INGEST_TOKEN!")
+            sys.exit(1)
+    elif SYNC_TRANSPORT != "gist":
+        logger.error(f"Unknown SYNC_TRANSPORT '{SYNC_TRANSPORT}' (expected 'gist' or 'ingest')")
+        sys.exit(1)
+    elif not GIST_TOKEN:
         logger.error("GIST_TOKEN environment variable is required!")
         logger.error("Set it with: export GIST_TOKEN='your_github_token_here'")
         sys.exit(1)
     
-    if not GIST_ID:
+    if SYNC_TRANSPORT == "gist" and not GIST_ID:
         logger.error("GIST_ID environment variable is required!")
         logger.error("Set it with: export GIST_ID='9e0d60bcc84c808f505f9a4bfea0bc2f'")
         sys.exit(1)
@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+import pytest
+
+# main.py opens the shared fleet-state database lazily; keep test runs out of the working tree.
+os.environ.setdefault("SHARED_STATE_DB", os.path.join(tempfile.mkdtemp(prefix="hashlab-tests-"), "fleet_state.db"))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,69 @@
+import json
+
+from ai_context import SHRINK_LADDER, ContextBuilder, downsample, encode_deltas
+
+
+def _fleet(count):
+    return {
+        f"m{i:03d}": {
+            "alive": i % 10 != 0,
+            "hashrate_1m": 1.0 + i / 1000,
+            "power": 18.0,
+            "efficiency": 18.0 / (1.0 + i / 1000),
+            "temp": 80.0 if i == 5 else 55.0,
+            "sharesAccepted": 1000,
+            "sharesRejected": 1,
+        }
+        for i in range(count)
+    }
+
+
+def _summary(points):
+    return {
+        "samples": points * 10,
+        "timestamps": [f"t{i}" for i in range(points)],
+        "total_hash_series": [100 + (i % 7) for i in range(points)],
+        "avg_temp_series": [55.0 + (i % 3) for i in range(points)],
+        "fleet_avg_hash": 103.0,
+        "fleet_hash_trend": "stable",
+        "latest_timestamp": f"t{points - 1}",
+    }
+
+
+def test_context_respects_budget_and_keeps_worst_miners():
+    builder = ContextBuilder(budget_bytes=2000)
+    context = builder.build(_fleet(500), _summary(2000), {"series": list(range(1000))})
+    assert context["bytes"] <= 2000
+    data = json.loads(context["text"])
+    assert data["fleet"]["miners"] == 500
+    # The first rung (every miner) is too big; the second one fits.
+    points, miner_limit = SHRINK_LADDER[1]
+    assert len(data["miners"]) == miner_limit
+    assert data["miners_omitted"] == 500 - miner_limit
+    assert len(data["hist"]["th"]["d"]) == points - 1
+    # Offline rigs sort first, so the 50 of them fill every kept row.
+    assert {row[1] for row in data["miners"]} == {"off"}
+
+
+def test_context_is_cached_per_snapshot_version():
+    builder = ContextBuilder()
+    fleet, summary = _fleet(8), _summary(50)
+    first = builder.build(fleet, summary)
+    assert builder.build(fleet, summary) is first
+    summary["latest_timestamp"] = "t-next"
+    assert builder.build(fleet, summary) is not first
+
+
+def test_source_version_skips_hashing_the_fleet():
+    builder = ContextBuilder()
+    fleet, summary = _fleet(8), _summary(50)
+    first = builder.build(fleet, summary, source=("local", 1))
+    fleet["m001"]["temp"] = 90.0  # unchanged source version: still the cached context
+    assert builder.build(fleet, summary, source=("local", 1)) is first
+    assert builder.build(fleet, summary, source=("local", 2)) is not first
+
+
+def test_downsample_and_deltas():
+    assert len(downsample(list(range(100)), 10)) == 10
+    assert downsample([1, 2, 3], 10) == [1, 2, 3]
+    assert encode_deltas([1.0, 1.5, 1.25]) == {"first": 1, "d": [0.5, -0.25]}
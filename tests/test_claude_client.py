@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from claude_client import ClaudeClient, InsightStreamParser, TTLCache
+
+CLAUDE_URL = "http://claude.local/v1/messages"
+
+
+def _stand_in_messages_api(calls):
+    fake = FastAPI()
+
+    @fake.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        calls.append(body)
+        await asyncio.sleep(0.05)
+        return {"content": [{"type": "text", "text": '[{"title": "ok"}]'}]}
+
+    return fake
+
+
+@pytest.mark.anyio
+async def test_identical_requests_hit_upstream_once():
+    calls = []
+    client = ClaudeClient(transport=httpx.ASGITransport(app=_stand_in_messages_api(calls)))
+    body = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10}
+    reordered = {"max_tokens": 10, "messages": [{"content": "hi", "role": "user"}], "model": "m"}
+
+    first, second = await asyncio.gather(
+        client.create_message(CLAUDE_URL, {}, body),
+        client.create_message(CLAUDE_URL, {}, reordered),
+    )
+    third = await client.create_message(CLAUDE_URL, {}, body)
+    await client.aclose()
+
+    assert len(calls) == 1
+    assert first == second == third
+    assert client.counters == {"hits": 1, "misses": 1, "coalesced": 1}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(ttl=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def _stand_in_streaming_api(text_chunks):
+    fake = FastAPI()
+
+    @fake.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        assert body["stream"] is True
+
+        async def events():
+            yield 'event: message_start\ndata: {"type": "message_start"}\n\n'
+            for chunk in text_chunks:
+                delta = {"type": "content_block_delta", "delta": {"type": "text_delta", "text": chunk}}
+                yield f"event: content_block_delta\ndata: {json.dumps(delta)}\n\n"
+            yield 'event: message_stop\ndata: {"type": "message_stop"}\n\n'
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return fake
+
+
+@pytest.mark.anyio
+async def test_stream_text_yields_deltas_and_caches_message():
+    chunks = ['```json\n[{"title": "Hot', ' rig", "text": "a}b"},', ' {"title": "ok"}]\n```']
+    client = ClaudeClient(transport=httpx.ASGITransport(app=_stand_in_streaming_api(chunks)))
+    body = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10}
+
+    parser = InsightStreamParser()
+    seen = []
+    async for text in client.stream_text(CLAUDE_URL, {}, body):
+        seen.extend(parser.feed(text))
+    cached = await client.create_message(CLAUDE_URL, {}, body)
+    await client.aclose()
+
+    assert seen == [{"title": "Hot rig", "text": "a}b"}, {"title": "ok"}]
+    assert cached["content"][0]["text"] == "".join(chunks)
+    assert client.counters["hits"] == 1
+
+
+def test_insight_parser_handles_escapes_split_across_chunks():
+    parser = InsightStreamParser()
+    assert parser.feed('[{"title": "say \\') == []
+    assert parser.feed('"hi\\""}') == [{"title": 'say "hi"'}]
@@ -0,0 +1,84 @@
+import csv
+
+import pytest
+
+import data_logger
+
+
+def _point_logger_at(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_logger, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(data_logger, "DATA_FILE", tmp_path / "miner_metrics.csv")
+    monkeypatch.setattr(data_logger, "_schema_checked", False)
+
+
+def test_asic_temps_round_trip():
+    packed = data_logger.pack_asic_temps([61.2, 58.7, 70.0])
+    assert data_logger.unpack_asic_temps(packed) == [61.2, 58.7, 70.0]
+    assert data_logger.pack_asic_temps([]) == ""
+    assert data_logger.unpack_asic_temps("") == []
+
+
+def test_v1_log_is_upgraded_and_still_readable(tmp_path, monkeypatch):
+    _point_logger_at(tmp_path, monkeypatch)
+    with data_logger.DATA_FILE.open("w", newline="") as f:
+        writer = csv.DictWriter(f, data_logger.FIELDNAMES_V1)
+        writer.writeheader()
+        writer.writerow({"timestamp": "t0", "name": "A", "hashrate_1m": 1.1, "alive": True})
+
+    data_logger._write_rows({"B": {
+        "hashrate_1m": 1.0, "alive": True, "frequency": 525, "voltage": 1200,
+        "asicTemps": [60.5], "bestDiff": "4.29G",
+    }})
+
+    with data_logger.DATA_FILE.open(newline="") as f:
+        header = next(csv.reader(f))
+    assert data_logger.detect_schema_version(header) == 2
+
+    old, new = data_logger.load_recent_metrics(10)
+    assert old["hashrate_1m"] == 1.1 and old["alive"] is True and old["asicTemps"] == []
+    assert new["frequency"] == 525 and new["voltage"] == 1200
+    assert new["asicTemps"] == [60.5] and new["bestDiff"] == "4.29G"
+
+
+@pytest.mark.anyio
+async def test_snapshot_recorder_logs_each_source_update_once(tmp_path, monkeypatch):
+    _point_logger_at(tmp_path, monkeypatch)
+    miners = {"rig": {"hashrate_1m": 1.1, "power": 15, "alive": True}}
+    first = {"last_updated": "2026-01-01T00:00:00Z", "miners": miners}
+    second = {"last_updated": "2026-01-01T00:01:00Z", "miners": miners}
+
+    recorder = data_logger.SnapshotRecorder()
+    assert await recorder.record(first)
+    assert not await recorder.record(first)  # unchanged Gist re-fetched
+    assert await recorder.record_many([second, first]) == 1
+
+    rows = data_logger.load_recent_metrics(10)
+    assert [r["timestamp"] for r in rows] == ["2026-01-01T00:00:00+00:00", "2026-01-01T00:01:00+00:00"]
+    assert rows[0]["hashrate_1m"] == 1.1
+
+    # A restarted process picks up where the log ends.
+    restarted = data_logger.SnapshotRecorder()
+    assert not await restarted.record(second)
+    assert await restarted.record({"last_updated": "2026-01-01T00:02:00Z", "miners": miners})
+    assert len(data_logger.load_recent_metrics(10)) == 3
+
+
+def test_read_metrics_after_follows_appends(tmp_path, monkeypatch):
+    _point_logger_at(tmp_path, monkeypatch)
+    assert data_logger.read_metrics_after() == ([], (0, 0))
+    data_logger._write_rows({"A": {"hashrate_1m": 1.0, "alive": True}}, "t0")
+    rows, cursor = data_logger.read_metrics_after()
+    assert [r["timestamp"] for r in rows] == ["t0"]
+    assert data_logger.read_metrics_after(cursor) == ([], cursor)
+
+    data_logger._write_rows({"A": {"hashrate_1m": 1.0}, "B": {"hashrate_1m": 2.0}}, "t1")
+    with data_logger.DATA_FILE.open("a") as f:
+        f.write("t2,A,1.0")  # a row still being appended
+    rows, cursor = data_logger.read_metrics_after(cursor)
+    assert [(r["timestamp"], r["name"]) for r in rows] == [("t1", "A"), ("t1", "B")]
+    assert data_logger.read_metrics_after(cursor)[0] == []
+
+    # A replaced log (schema upgrade) is read again from the top.
+    data_logger.DATA_FILE.unlink()
+    data_logger._write_rows({"C": {"hashrate_1m": 3.0}}, "t3")
+    assert [r["name"] for r in data_logger.read_metrics_after(cursor)[0]] == ["C"]
@@ -0,0 +1,47 @@
+import math
+
+from downsampling import decimate_history, lttb_indices, minmax_indices
+
+
+def test_lttb_keeps_endpoints_and_spike():
+    values = [0.0] * 500
+    values[137] = 50.0
+    picked = lttb_indices(values, 20)
+    assert len(picked) == 20
+    assert picked[0] == 0 and picked[-1] == 499
+    assert 137 in picked
+    assert picked == sorted(picked)
+
+
+def test_minmax_keeps_extremes_per_bucket():
+    values = [math.sin(i / 10) for i in range(1000)]
+    values[400] = -5.0
+    picked = minmax_indices(values, 40)
+    assert len(picked) <= 40
+    assert 400 in picked
+
+
+def _rows(timestamps, miners=3):
+    return [
+        {"timestamp": f"t{t:05d}", "name": f"m{m}", "hashrate_1m": 1.0 + (t % 13) / 10, "temp": 55.0, "power": 15.0}
+        for t in range(timestamps)
+        for m in range(miners)
+    ]
+
+
+def test_decimate_history_is_bounded_by_points():
+    rows = _rows(2000)
+    timestamps = sorted({r["timestamp"] for r in rows})
+    summary = {
+        "samples": len(rows),
+        "timestamps": timestamps,
+        "total_hash_series": [sum(r["hashrate_1m"] for r in rows if r["timestamp"] == ts) for ts in timestamps],
+        "avg_temp_series": [55.0] * len(timestamps),
+    }
+    data, reduced = decimate_history(rows, summary, 120)
+    kept = sorted({r["timestamp"] for r in data})
+    assert len(kept) <= 120
+    assert kept == reduced["timestamps"]
+    assert len(reduced["total_hash_series"]) == len(kept)
+    assert reduced["samples"] == len(rows)
+    assert kept[0] == timestamps[0] and kept[-1] == timestamps[-1]
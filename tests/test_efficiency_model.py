@@ -0,0 +1,45 @@
+from efficiency_model import EfficiencyModelRegistry
+from tuning import auto_tune_miners
+
+
+def _rows(name="A", start=0):
+    rows = []
+    freqs = [400, 450, 500, 550, 600]
+    for i in range(start, start + 40):
+        freq = freqs[i % len(freqs)]
+        volts = 0.6 + 0.0012 * freq
+        rows.append({
+            "timestamp": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}",
+            "name": name,
+            "alive": True,
+            "frequency": freq,
+            "voltage": volts * 1000,
+            "hashrate_1m": 0.002 * freq,
+            "power": 12 + 0.02 * freq * volts * volts,
+            "temp": 50.0,
+        })
+    return rows
+
+
+def test_fit_recovers_interior_optimum():
+    registry = EfficiencyModelRegistry()
+    assert registry.observe_rows(_rows()) == 40
+    optimum = registry.optimal_point("A")
+    assert 450 <= optimum["frequency_mhz"] <= 550
+    assert optimum["fit_r2"]["power"] > 0.999
+    # Re-observing the same window adds nothing; the cached fit is reused.
+    assert registry.observe_rows(_rows()) == 0
+
+
+def test_recommendation_uses_model_and_falls_back():
+    registry = EfficiencyModelRegistry()
+    registry.observe_rows(_rows())
+    miners = [
+        {"miner_id": "A", "hashrate_ths": 1.2, "temp_c": 50, "efficiency_w_th": 27, "frequency_mhz": 600},
+        {"miner_id": "B", "hashrate_ths": 1.0, "temp_c": 80, "efficiency_w_th": 40},
+    ]
+    modelled, heuristic = auto_tune_miners(miners, registry)
+    assert modelled["source"] == "model"
+    assert modelled["recommendation"].startswith("Lower frequency to")
+    assert heuristic["source"] == "heuristic"
+    assert "Reduce voltage" in heuristic["recommendation"]
@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+import pytest
+
+import main
+from fleet_index import FleetIndex, FleetIndexCache, FleetQueryError, status_key
+
+
+def _fleet():
+    return {
+        "A": {"type": "BG02", "chipTemp": 61.0, "hashrate_1m": 1.1, "status": "✅ OK", "asicTemps": [61.0]},
+        "B": {"type": "NERDQ", "chipTemp": 79.5, "hashrate_1m": 5.9, "status": "⚠️ OVERHEATING", "asicTemps": [79.5]},
+        "C": {"type": "BG02", "chipTemp": 0, "temp": 0, "hashrate_1m": 0, "status": "⚠️ Offline", "alive": False},
+        "D": {"type": "NERDQ", "chipTemp": 70.2, "hashrate_1m": 6.2, "status": "✅ OK", "asicTemps": [70.2]},
+        "E": {"type": "BG02", "chipTemp": 66.0, "hashrate_1m": 1.0, "status": "⚠️ High Reject Rate"},
+    }
+
+
+def test_indexes_by_status_type_and_temperature():
+    index = FleetIndex(_fleet())
+    assert status_key("⚠️ High Reject Rate") == "high-reject-rate"
+    assert index.by_status["ok"] == ["A", "D"]
+    assert index.by_type["bg02"] == ["A", "C", "E"]
+    assert index.temperature_rank == ["B", "D", "E", "A", "C"]  # unknown temperature last
+    assert index.order("temp") == ["A", "E", "D", "B", "C"]
+
+
+def test_query_filters_sorts_and_pages():
+    index = FleetIndex(_fleet())
+    assert index.query(statuses=["ok", "overheating"]) == (["A", "B", "D"], 3)
+    assert index.query(statuses=["OK"], types=["nerdq"]) == (["D"], 1)
+    assert index.query(types=["BG02"], sort="-temp", limit=2) == (["E", "A"], 3)
+    assert index.query(sort="-hashrate", offset=1, limit=2) == (["B", "A"], 5)
+    assert index.query(statuses=["missing"]) == ([], 0)
+    assert index.project(["B"], ["chipTemp", "nope"]) == {"B": {"chipTemp": 79.5}}
+    with pytest.raises(FleetQueryError):
+        index.query(sort="asicTemps")
+
+
+def test_index_cache_rebuilds_only_for_a_new_snapshot():
+    cache = FleetIndexCache()
+    snapshot = _fleet()
+    assert cache.index_for(snapshot) is cache.index_for(snapshot)
+    cache.index_for(_fleet())
+    assert cache.counters == {"builds": 2, "hits": 1}
+    assert cache.index_for(_fleet(), version=1) is cache.index_for(_fleet(), version=1)  # equal copies
+    cache.index_for(_fleet(), version=2)
+    assert cache.counters == {"builds": 4, "hits": 2}
+
+
+@pytest.mark.anyio
+async def test_local_polls_are_versioned_and_shared(monkeypatch):
+    polls = []
+
+    async def poll():
+        polls.append(1)
+        return _fleet()
+
+    monkeypatch.setattr(main, "SHARED_STATE", None)
+    monkeypatch.setattr(main, "CLOUD_MODE", False)
+    monkeypatch.setattr(main, "poll_local_miners", poll)
+    monkeypatch.setattr(main, "_local_fleet", {"version": 0, "stats": None, "polled": 0.0, "poll": None, "logged": None})
+    monkeypatch.setattr(main, "FLEET_SNAPSHOT_TTL", 60)
+    first, second = await asyncio.gather(main.fleet_snapshot(), main.fleet_snapshot())
+    third = await main.fleet_snapshot()
+    assert len(polls) == 1
+    assert first[0] == second[0] == third[0] == ("local", 1) and third[1] is first[1]
+    monkeypatch.setattr(main, "FLEET_SNAPSHOT_TTL", 0)
+    assert (await main.fleet_snapshot())[0] == ("local", 2)
+
+
+@pytest.mark.anyio
+async def test_miner_data_query_parameters(monkeypatch):
+    snapshot = _fleet()
+
+    async def fleet():
+        return ("shared", 1), snapshot
+
+    monkeypatch.setattr(main, "CLOUD_MODE", True)  # skip metric logging
+    monkeypatch.setattr(main, "fleet_snapshot", fleet)
+    monkeypatch.setattr(main, "is_authenticated", lambda request: True)
+    monkeypatch.setattr(main, "FLEET_INDEXES", FleetIndexCache())
+    monkeypatch.setattr(main, "_fleet_payload", {"version": None, "payload": None})
+    transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 5000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://dashboard.local") as client:
+        everything = await client.get("/miner-data")
+        cached = main._fleet_payload["payload"]
+        again = await client.get("/miner-data")
+        hottest = await client.get("/miner-data", params={"sort": "-temp", "limit": 2, "fields": "chipTemp,status"})
+        bad = await client.get("/miner-data", params={"sort": "bogus"})
+
+    assert everything.json() == snapshot
+    assert again.content == everything.content
+    assert main._fleet_payload == {"version": ("shared", 1), "payload": cached}  # encoded once per version
+    assert "x-total-count" not in everything.headers
+    assert list(hottest.json()) == ["B", "D"]
+    assert hottest.json()["B"] == {"chipTemp": 79.5, "status": "⚠️ OVERHEATING"}
+    assert hottest.headers["x-total-count"] == "5"
+    assert bad.status_code == 400
+    assert main.FLEET_INDEXES.counters == {"builds": 1, "hits": 1}
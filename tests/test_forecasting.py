@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+from forecasting import FLEET, ForecastRegistry, HoltSeries
+
+
+def _rows(start, count, step_s=60):
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(start, start + count):
+        ts = (base + timedelta(seconds=i * step_s)).isoformat()
+        rows.append({"timestamp": ts, "name": "A", "hashrate_1m": 1.0 + 0.01 * i, "temp": 50.0})
+        rows.append({"timestamp": ts, "name": "B", "hashrate_1m": 1.0, "temp": 60.0})
+    return rows
+
+
+def test_linear_series_extrapolates_trend():
+    series = HoltSeries()
+    for i in range(60):
+        series.update(10.0 + 0.5 * i)
+    points = series.forecast(4)
+    assert abs(points[-1]["value"] - (10.0 + 0.5 * 63)) < 0.5
+    widths = [p["upper"] - p["lower"] for p in points]
+    assert widths == sorted(widths)
+
+
+def test_registry_only_ingests_new_timestamps():
+    registry = ForecastRegistry()
+    assert registry.observe_rows(_rows(0, 30)) == 29  # oldest timestamp may be truncated
+    # Overlapping window: only the 5 unseen timestamps are applied.
+    assert registry.observe_rows(_rows(10, 25)) == 5
+    assert registry._series[(FLEET, "hashrate")].n == 34
+
+
+def test_truncated_first_timestamp_is_not_folded_in():
+    registry = ForecastRegistry()
+    registry.observe_rows(_rows(0, 30)[1:])  # the row limit cut miner A from the first timestamp
+    series = registry._series[(FLEET, "hashrate")]
+    assert series.n == 29
+    # Fleet total grows 0.01 per sample; a half-fleet first point would double the trend.
+    assert abs(series.trend - 0.01) < 1e-4
+
+
+def test_fleet_forecast_has_timestamps_and_trend():
+    registry = ForecastRegistry()
+    registry.observe_rows(_rows(0, 120))
+    forecast = registry.fleet_forecast(6)
+    hashrate = forecast["hashrate"]
+    assert hashrate["step_seconds"] == 60
+    assert len(hashrate["points"]) == 6
+    assert "timestamp" in hashrate["points"][0]
+    assert forecast["temp"]["trend"] == "stable"
+    assert registry.miner_forecasts(3)["B"]["hashrate"]["points"][0]["value"] == 1.0
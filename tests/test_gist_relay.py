@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+
+from gist_relay import GistRelay
+
+
+def _stand_in_gist(state):
+    fake = FastAPI()
+
+    @fake.get("/raw/miner_data.json")
+    async def raw(request: Request):
+        state["calls"].append(request.headers.get("if-none-match"))
+        await asyncio.sleep(state.get("delay", 0))
+        etag = f'"v{state["version"]}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(
+            content=state["body"](),
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
+
+    return fake
+
+
+def _relay(state, **kwargs):
+    transport = httpx.ASGITransport(app=_stand_in_gist(state))
+    return GistRelay(url="http://gist.local/raw/miner_data.json", transport=transport, **kwargs)
+
+
+def _state(version=1):
+    state = {"calls": [], "version": version}
+    state["body"] = lambda: (
+        '{"last_updated":"2026-01-01T00:%02d:00Z","sync_interval":60,'
+        '"miners":{"rig":{"hashrate_1m":%d}}}' % (state["version"], state["version"])
+    )
+    return state
+
+
+@pytest.mark.anyio
+async def test_conditional_get_revalidates_with_etag():
+    state = _state()
+    relay = _relay(state)
+    first = await relay.refresh()
+    assert first["miners"]["rig"]["hashrate_1m"] == 1
+    assert await relay.refresh() is first
+    state["version"] = 2
+    assert (await relay.refresh())["miners"]["rig"]["hashrate_1m"] == 2
+    assert state["calls"] == [None, '"v1"', '"v1"']
+    assert relay.counters["not_modified"] == 1
+    assert relay.counters["updated"] == 2
+    await relay.aclose()
+
+
+@pytest.mark.anyio
+async def test_concurrent_refreshes_share_one_request():
+    state = _state()
+    state["delay"] = 0.05
+    relay = _relay(state)
+    results = await asyncio.gather(*(relay.refresh() for _ in range(10)))
+    assert len(state["calls"]) == 1
+    assert all(r is results[0] for r in results)
+    await relay.aclose()
+
+
+@pytest.mark.anyio
+async def test_reads_never_wait_once_a_snapshot_exists():
+    state = _state()
+    relay = _relay(state, poll_interval=0, min_interval=0)
+    await relay.refresh()
+    state["delay"] = 5
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    miners = await relay.miners()
+    assert loop.time() - started < 0.5
+    assert miners == {"rig": {"hashrate_1m": 1}}
+    assert relay._inflight is not None and not relay._inflight.done()
+    await relay.aclose()
+
+
+@pytest.mark.anyio
+async def test_cold_read_is_bounded():
+    state = _state()
+    state["delay"] = 5
+    relay = _relay(state, cold_wait=0.05)
+    assert await relay.miners() is None
+    await relay.aclose()
+
+
+def test_next_refresh_follows_source_schedule():
+    relay = GistRelay(url="http://unused", poll_interval=30, grace=5, min_interval=5)
+    assert relay.next_delay() == 30
+    updated = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+    relay._payload = {"last_updated": "2026-01-01T00:00:00Z", "sync_interval": 60}
+    assert relay.next_delay(now=updated + 20) == pytest.approx(45)
+    assert relay.next_delay(now=updated + 63) == 5
+    # Past due: the agent skipped an upload, so fall back to polling.
+    assert relay.next_delay(now=updated + 90) == 30
+
+
+@pytest.mark.anyio
+async def test_listeners_see_each_new_snapshot_once():
+    state = _state()
+    relay = _relay(state)
+    seen = []
+
+    async def listener(payload):
+        seen.append(payload["last_updated"])
+
+    relay.add_listener(listener)
+    await relay.refresh()
+    await relay.refresh()  # 304: nothing new
+    state["version"] = 2
+    await relay.refresh()
+    assert seen == ["2026-01-01T00:01:00Z", "2026-01-01T00:02:00Z"]
+    await relay.aclose()
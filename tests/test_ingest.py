@@ -0,0 +1,72 @@
+import gzip
+import json
+
+import httpx
+import pytest
+
+import ingest
+import main
+import sync_to_gist
+from ingest import IngestError, IngestStore, decode_batch, encode_batch, token_matches
+from spool import Spool
+from sync_to_gist import SpoolDrainer
+
+
+def _sample(minute, hashrate=1.0):
+    return {
+        "last_updated": f"2026-01-01T00:{minute:02d}:00Z",
+        "sync_interval": 60,
+        "miner_count": 1,
+        "miners": {"rig": {"hashrate_1m": hashrate, "alive": True}},
+    }
+
+
+def test_batch_round_trip_and_validation():
+    samples = [_sample(0), _sample(1)]
+    assert decode_batch(encode_batch(samples), "gzip") == samples
+    assert decode_batch(json.dumps({"samples": samples}).encode()) == samples
+    with pytest.raises(IngestError):
+        decode_batch(json.dumps({"samples": [{"miners": {}}]}).encode())
+    with pytest.raises(IngestError) as exc:
+        decode_batch(gzip.compress(b" " * 5000), "gzip", max_bytes=1000)
+    assert exc.value.status_code == 413
+    assert token_matches("Bearer s3cret", "s3cret")
+    assert not token_matches("Bearer nope", "s3cret")
+    assert not token_matches("Bearer s3cret", "")
+
+
+def test_store_dedupes_and_orders_by_timestamp():
+    store = IngestStore(max_samples=3)
+    assert store.add([_sample(2), _sample(0)]) == (2, 0)
+    assert store.add([_sample(2), _sample(1), _sample(3)]) == (2, 1)
+    assert [s["last_updated"][14:16] for s in store.samples()] == ["01", "02", "03"]
+    assert store.latest()["last_updated"].endswith("03:00Z")
+    assert len(store.samples(since="2026-01-01T00:01:00Z")) == 2
+
+
+@pytest.mark.anyio
+async def test_sync_agent_drains_spool_into_ingest_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_TOKEN", "s3cret")
+    monkeypatch.setattr(main, "INGEST_STORE", IngestStore())
+    monkeypatch.setattr(sync_to_gist, "INGEST_URL", "http://dashboard.local/ingest")
+    monkeypatch.setattr(sync_to_gist, "INGEST_TOKEN", "wrong")
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app))
+    monkeypatch.setattr(sync_to_gist, "_client", client)
+
+    spool = Spool(tmp_path / "spool")
+    for minute in range(5):
+        spool.append(_sample(minute, hashrate=minute))
+
+    drainer = SpoolDrainer(spool, batch_size=2, pause=0)
+    assert await drainer.drain() == 0
+    assert len(spool) == 5  # rejected batch stays spooled
+    assert drainer.backoff_remaining() > 0
+    assert await drainer.drain() == 0  # still backing off
+
+    monkeypatch.setattr(sync_to_gist, "INGEST_TOKEN", "s3cret")
+    drainer = SpoolDrainer(spool, batch_size=2, pause=0)
+    assert await drainer.drain() > 0
+    assert len(spool) == 0
+    assert len(main.INGEST_STORE) == 5
+    assert await main.fetch_cloud_miners() == {"rig": {"hashrate_1m": 4, "alive": True}}
+    await client.aclose()
@@ -0,0 +1,88 @@
+import ipaddress
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import main
+from main import CacheControlMiddleware, CidrTable, LANOnlyMiddleware
+
+
+def test_cidr_table_merges_and_looks_up_ranges():
+    table = CidrTable([
+        ipaddress.IPv4Network("10.0.0.0/8"),
+        ipaddress.IPv4Network("10.1.0.0/16"),
+        ipaddress.IPv4Network("192.168.0.0/24"),
+        ipaddress.IPv4Network("192.168.1.0/24"),
+    ])
+    assert len(table) == 2
+    for address, expected in [
+        ("10.255.255.255", True), ("11.0.0.0", False), ("9.255.255.255", False),
+        ("192.168.1.200", True), ("192.168.2.1", False), ("0.0.0.0", False),
+    ]:
+        assert (int(ipaddress.IPv4Address(address)) in table) is expected, address
+
+
+def _app(session=None):
+    app = FastAPI()
+
+    @app.get("/api")
+    async def api():
+        return {"ok": True}
+
+    @app.get("/static/app.js")
+    async def asset():
+        return {"asset": True}
+
+    inner = CacheControlMiddleware(LANOnlyMiddleware(app, admin_username="admin"))
+
+    async def with_session(scope, receive, send):
+        if session is not None:
+            scope["session"] = session
+        await inner(scope, receive, send)
+
+    return with_session
+
+
+async def _get(path, host, session=None):
+    transport = httpx.ASGITransport(app=_app(session), client=(host, 5000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://dash") as client:
+        return await client.get(path)
+
+
+@pytest.mark.anyio
+async def test_lan_only_decisions(monkeypatch):
+    monkeypatch.setenv("LAN_ONLY_MODE", "true")
+    monkeypatch.delenv("RENDER", raising=False)
+    monkeypatch.delenv("ENVIRONMENT", raising=False)
+    assert (await _get("/api", "192.168.4.20")).status_code == 200
+    denied = await _get("/api", "8.8.8.8")
+    assert denied.status_code == 403 and "LAN only" in denied.text
+    assert (await _get("/api", "8.8.8.8", session={"user": "admin"})).status_code == 200
+    assert (await _get("/api", "not-an-ip")).status_code == 403
+    assert (await _get("/static/app.js", "8.8.8.8")).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_static_responses_are_marked_no_cache():
+    response = await _get("/static/app.js", "127.0.0.1")
+    assert response.headers["cache-control"].startswith("no-cache")
+    assert "cache-control" not in (await _get("/api", "127.0.0.1")).headers
+
+
+def test_decisions_are_cached_per_ip():
+    middleware = LANOnlyMiddleware(None, admin_username="admin")
+    assert middleware.is_lan("10.1.2.3") is True
+    assert middleware.is_lan("203.0.113.9") is False
+    assert middleware.is_lan("::1") is None
+    assert set(middleware._decisions) == {"10.1.2.3", "203.0.113.9", "::1"}
+
+
+def test_decision_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(main, "LAN_DECISION_CACHE_SIZE", 2)
+    middleware = LANOnlyMiddleware(None, admin_username="admin")
+    middleware.is_lan("10.0.0.1")
+    middleware.is_lan("10.0.0.2")
+    middleware.is_lan("10.0.0.1")  # busy client: refreshed on the hit
+    middleware.is_lan("10.0.0.3")
+    assert list(middleware._decisions) == ["10.0.0.1", "10.0.0.3"]
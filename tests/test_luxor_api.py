@@ -0,0 +1,211 @@
+import asyncio
+from datetime import datetime
+from time import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+import main
+from luxor_api import LuxorClient, fetch_all_workers, get_luxor_data, get_luxor_sample
+
+LUXOR_URL = "http://luxor.local/api/v2"
+
+
+def _mock_luxor(state):
+    fake = FastAPI()
+
+    @fake.get("/api/v2/pool/workers/BTC")
+    async def workers(request: Request):
+        state["calls"] += 1
+        assert request.headers["Authorization"] == "key"
+        if state.get("rate_limited"):
+            return JSONResponse({"error": "slow down"}, status_code=429, headers={"Retry-After": "60"})
+        await asyncio.sleep(0.02)
+        version = state["calls"]
+        return {"data": [{"name": "w1", "status": "ACTIVE", "hashrate": version * 1e12}]}
+
+    return fake
+
+
+def _client(state, **kwargs):
+    transport = httpx.ASGITransport(app=_mock_luxor(state))
+    return LuxorClient(base_url=LUXOR_URL, transport=transport, **kwargs)
+
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_one_request():
+    state = {"calls": 0}
+    client = _client(state)
+    results = await asyncio.gather(*(get_luxor_data("key", "sub", client=client) for _ in range(5)))
+    await client.aclose()
+    assert state["calls"] == 1
+    assert all(r == results[0] for r in results)
+
+
+@pytest.mark.anyio
+async def test_stale_data_is_served_while_refreshing():
+    state = {"calls": 0}
+    client = _client(state, ttl=0.01, stale_ttl=60)
+    first = await get_luxor_data("key", "sub", client=client)
+    await asyncio.sleep(0.03)
+    stale = await get_luxor_data("key", "sub", client=client)
+    assert stale == first
+    await asyncio.sleep(0.1)
+    fresh = await get_luxor_data("key", "sub", client=client)
+    await client.aclose()
+    assert fresh[0]["hashrate"] == 2e12
+    assert client.counters["refreshes"] >= 2
+
+
+@pytest.mark.anyio
+async def test_rate_limit_backs_off_without_retrying():
+    state = {"calls": 0, "rate_limited": True}
+    client = _client(state)
+    assert await get_luxor_data("key", "sub", client=client) is None
+    assert await get_luxor_data("key", "sub", client=client) is None
+    await client.aclose()
+    assert state["calls"] == 1
+    assert client.backoff_remaining() > 50
+
+
+def _paged_luxor(total, page_size, fail_pages=(), report_total=True):
+    fake = FastAPI()
+    state = {"calls": 0, "inflight": 0, "max_inflight": 0}
+
+    @fake.get("/api/v2/pool/workers/BTC")
+    async def workers(page_number: int = 1, page_size: int = page_size):
+        state["calls"] += 1
+        state["inflight"] += 1
+        state["max_inflight"] = max(state["max_inflight"], state["inflight"])
+        await asyncio.sleep(0.01)
+        state["inflight"] -= 1
+        if page_number in fail_pages:
+            return JSONResponse({"error": "boom"}, status_code=500)
+        start = (page_number - 1) * page_size
+        rows = [
+            {"name": f"w{i}", "status": "ACTIVE", "hashrate": 1e12}
+            for i in range(start, min(start + page_size, total))
+        ]
+        body = {"data": rows}
+        if report_total:
+            body["pagination"] = {"page_number": page_number, "page_size": page_size, "item_count": total}
+        return body
+
+    return fake, state
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("report_total", [True, False])
+async def test_all_pages_are_fetched_concurrently_with_cap(report_total):
+    fake, state = _paged_luxor(1234, 100, report_total=report_total)
+    client = LuxorClient(base_url=LUXOR_URL, transport=httpx.ASGITransport(app=fake))
+    result = await fetch_all_workers(client, "key", {"status": "ACTIVE"}, page_size=100, concurrency=3)
+    await client.aclose()
+    assert len(result["workers"]) == 1234
+    assert result["partial"] is False
+    assert state["max_inflight"] <= 3
+
+
+@pytest.mark.anyio
+async def test_failed_page_yields_partial_result():
+    fake, state = _paged_luxor(500, 100, fail_pages=(3,))
+    client = LuxorClient(base_url=LUXOR_URL, transport=httpx.ASGITransport(app=fake))
+    result = await fetch_all_workers(client, "key", {}, page_size=100)
+    await client.aclose()
+    assert result["partial"] is True
+    assert result["failed_pages"] == [3]
+    assert len(result["workers"]) == 400
+
+
+@pytest.mark.anyio
+async def test_pool_rows_are_logged_once_per_fetch_with_fetch_time(monkeypatch):
+    state = {"calls": 0}
+    client = _client(state, ttl=60, stale_ttl=900)
+    logged = []
+
+    async def sample():
+        return await get_luxor_sample("key", "sub", client=client)
+
+    async def log_pool(pool_miners, timestamp=None):
+        logged.append(timestamp)
+
+    monkeypatch.setattr(main, "get_luxor_sample", sample)
+    monkeypatch.setattr(main, "log_pool_metrics", log_pool)
+    monkeypatch.setattr(main, "pool_miners_from_workers", lambda workers: {"rig": {"workers": workers}})
+    monkeypatch.setattr(main, "_pool_logged", {"fetched_at": None})
+    before = time()
+    await main.log_pool_sample()
+    await main.log_pool_sample()  # same cache entry: not logged again
+    await client.aclose()
+
+    assert state["calls"] == 1 and len(logged) == 1
+    assert before <= datetime.fromisoformat(logged[0]).timestamp() <= time()
+
+
+@pytest.mark.anyio
+async def test_prefetch_keeps_a_reference_and_logs_failures(monkeypatch, caplog):
+    import luxor_api
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    monkeypatch.setenv("LUXOR_API_KEY", "key")
+    monkeypatch.setattr(luxor_api, "get_luxor_data", failing)
+    luxor_api.prefetch_luxor_data()
+    (task,) = luxor_api._prefetches
+    await asyncio.wait([task])
+    await asyncio.sleep(0)  # let the done-callback run
+    assert not luxor_api._prefetches
+    assert "Luxor prefetch failed: boom" in caplog.text
+
+
+@pytest.mark.anyio
+async def test_pool_rows_are_logged_without_the_periodic_logger(monkeypatch):
+    samples = {"fetched_at": 1700000000.0}
+    logged, pool_logged = [], []
+
+    async def sample():
+        return {"workers": [{"name": "w1"}], "fetched_at": samples["fetched_at"]}
+
+    async def poll():
+        return {"rig": {"alive": True}}
+
+    async def log_miners(stats):
+        logged.append(stats)
+
+    async def log_pool(pool_miners, timestamp=None):
+        pool_logged.append(timestamp)
+
+    class NothingQueued:
+        def ingested(self):
+            return []
+
+    monkeypatch.setenv("ENVIRONMENT", "production")
+    monkeypatch.setenv("LUXOR_API_KEY", "key")
+    assert not main.periodic_logger_enabled()
+    monkeypatch.setattr(main, "get_luxor_sample", sample)
+    monkeypatch.setattr(main, "log_pool_metrics", log_pool)
+    monkeypatch.setattr(main, "log_miner_metrics", log_miners)
+    monkeypatch.setattr(main, "pool_miners_from_workers", lambda workers: {"rig": {"workers": workers}})
+    monkeypatch.setattr(main, "_pool_logged", {"fetched_at": None})
+    monkeypatch.setattr(main, "SHARED_STATE", None)
+    monkeypatch.setattr(main, "CLOUD_MODE", False)
+    monkeypatch.setattr(main, "poll_local_miners", poll)
+    monkeypatch.setattr(main, "_local_fleet", {"version": 0, "stats": None, "polled": 0.0, "poll": None, "logged": None})
+    monkeypatch.setattr(main, "FLEET_SNAPSHOT_TTL", 0)
+    monkeypatch.setattr(main, "is_authenticated", lambda request: True)
+    transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 5000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://dashboard.local") as client:
+        await client.get("/miner-data")
+        await client.get("/miner-data")  # new poll, same Luxor fetch
+    assert len(logged) == 2 and len(pool_logged) == 1
+
+    # Cloud leader tick: the pool log follows the pushed snapshots.
+    samples["fetched_at"] += 60
+    monkeypatch.setattr(main, "CLOUD_MODE", True)
+    monkeypatch.setattr(main, "SHARED_STATE", NothingQueued())
+    await main.poll_fleet()
+    await main.poll_fleet()
+    assert len(pool_logged) == 2
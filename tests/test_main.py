@@ -4,6 +4,11 @@ from httpx import AsyncClient
 from app.main import app
 
 
+@pytest.fixture(params=["asyncio", "trio"])
+def anyio_backend(request):
+    return request.param
+
+
 @pytest.mark.anyio
 async def test_root_returns_html():
     async with AsyncClient(app=app, base_url="http://testserver") as client:
@@ -0,0 +1,52 @@
+from efficiency_model import EfficiencyModelRegistry
+from power_budget import curves_from_models, optimize_power_budget
+
+
+def _curve(static, th_per_mhz):
+    return [
+        {"frequency_mhz": f, "power_w": static + 0.02 * f, "hashrate_ths": th_per_mhz * f}
+        for f in (400, 500, 600)
+    ]
+
+
+def test_budget_is_respected_and_efficient_rig_is_preferred():
+    curves = {"efficient": _curve(2, 0.003), "hungry": _curve(12, 0.002)}
+    plan = optimize_power_budget(25, curves)
+    assert plan["total_power_w"] <= 25
+    assert plan["assignments"]["efficient"]["frequency_mhz"] == 600
+    assert plan["assignments"]["hungry"]["state"] == "off"
+
+
+def test_generous_budget_runs_everything_flat_out():
+    curves = {"a": _curve(2, 0.003), "b": _curve(12, 0.002)}
+    plan = optimize_power_budget(10_000, curves)
+    assert {p["frequency_mhz"] for p in plan["assignments"].values()} == {600}
+    assert plan["total_hashrate_ths"] == 0.003 * 600 + 0.002 * 600
+
+
+def test_floors_above_budget_are_infeasible_without_shutdown():
+    plan = optimize_power_budget(5, {"a": _curve(2, 0.003)}, allow_shutdown=False)
+    assert plan["feasible"] is False
+    assert plan["assignments"]["a"]["frequency_mhz"] == 400
+
+
+def test_curves_cover_only_live_miners():
+    registry = EfficiencyModelRegistry()
+    rows = []
+    for name in ("live", "offline", "deleted"):
+        for i, freq in enumerate((400, 450, 500, 550, 600) * 4):
+            rows.append({
+                "timestamp": f"2024-01-01T00:00:{i:02d}", "name": name, "alive": True, "frequency": freq,
+                "voltage": 1100, "hashrate_1m": 0.002 * freq, "power": 10 + 0.02 * freq,
+            })
+    registry.observe_rows(rows)
+    stats = {
+        "live": {"alive": True, "power": 20.0, "hashrate_1m": 1.0},
+        "offline": {"alive": False, "power": 0, "hashrate_1m": 0},
+        "unfitted": {"alive": True, "power": 15.0, "hashrate_1m": 0.8, "frequency": 500},
+    }
+    curves = curves_from_models(registry, stats)
+    assert set(curves) == {"live", "unfitted"}
+    assert len(curves["live"]) > 1 and curves["unfitted"][0]["fixed"] is True
+    plan = optimize_power_budget(10_000, curves, allow_shutdown=False)
+    assert set(plan["assignments"]) == {"live", "unfitted"}
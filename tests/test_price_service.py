@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from btcrealtimetracker.price_service import PriceService
+
+
+def _stand_in_exchanges(calls, slow_delay=1.0):
+    fake = FastAPI()
+
+    @fake.get("/fast")
+    async def fast():
+        calls.append("fast")
+        return {"price": 100.0, "change": 1.0}
+
+    @fake.get("/medium")
+    async def medium():
+        calls.append("medium")
+        await asyncio.sleep(0.02)
+        return {"price": 102.0, "change": 3.0}
+
+    @fake.get("/slow")
+    async def slow():
+        calls.append("slow")
+        await asyncio.sleep(slow_delay)
+        return {"price": 500.0, "change": 0.0}
+
+    return fake
+
+
+def _service(calls, **kwargs):
+    parser = lambda j: (j["price"], j["change"])  # noqa: E731
+    sources = [(name, f"http://prices.local/{name}", parser) for name in ("slow", "fast", "medium")]
+    transport = httpx.ASGITransport(app=_stand_in_exchanges(calls))
+    return PriceService(sources=sources, transport=transport, **kwargs)
+
+
+@pytest.mark.anyio
+async def test_quorum_returns_without_waiting_for_slow_source():
+    calls = []
+    service = _service(calls, quorum=2, source_timeout=5, ttl=60)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tick = await service.tick()
+    elapsed = loop.time() - start
+    await service.aclose()
+    assert tick["success"] and tick["sources"] == 2
+    assert tick["price"] == 101.0 and tick["change_24h"] == 2.0
+    assert elapsed < 0.5
+
+
+@pytest.mark.anyio
+async def test_concurrent_callers_share_one_cached_tick():
+    calls = []
+    service = _service(calls, quorum=2, source_timeout=5, ttl=60)
+    ticks = await asyncio.gather(*(service.tick() for _ in range(10)))
+    again = await service.tick()
+    await service.aclose()
+    assert all(t is ticks[0] for t in ticks) and again is ticks[0]
+    assert service.counters["fetches"] == 1
+
+
+@pytest.mark.anyio
+async def test_per_source_timeout_still_answers_with_fewer_sources():
+    calls = []
+    service = _service(calls, quorum=3, source_timeout=0.2, ttl=60)
+    tick = await service.tick()
+    await service.aclose()
+    assert tick["success"] and sorted(tick["source_names"]) == ["fast", "medium"]
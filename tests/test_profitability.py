@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from btcrealtimetracker.price_service import PriceHistory
+from profitability import ProfitabilityEngine, btc_per_th_second
+
+
+START = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def _rows(name, minutes, hashrate=1.0, power=15.0):
+    return [
+        {"timestamp": (START + timedelta(minutes=m)).isoformat(), "name": name, "hashrate_1m": hashrate, "power": power, "alive": True}
+        for m in minutes
+    ]
+
+
+def test_hashprice_revenue_and_cost_are_integrated():
+    engine = ProfitabilityEngine(hashprice=0.05 * 24, power_cost_kwh=0.10, difficulty=None)
+    engine.observe_rows(_rows("A", range(0, 61)))  # one hour at 1 TH/s and 15 W
+    total = engine.snapshot()["miners"]["A"]["total"]
+    assert total["hours"] == 1.0
+    assert total["revenue_usd"] == pytest.approx(0.05)
+    assert total["kwh"] == pytest.approx(0.015)
+    assert total["cost_usd"] == pytest.approx(0.0015)
+
+
+def test_difficulty_and_price_history_drive_revenue_incrementally():
+    prices = PriceHistory()
+    prices.record(60000.0, ts=0)
+    engine = ProfitabilityEngine(prices=prices, difficulty=1e14, block_reward=3.125, hashprice=None)
+    rows = _rows("A", range(0, 31)) + _rows("B", range(0, 31), hashrate=2.0)
+    assert engine.observe_rows(rows) == 62
+    assert engine.observe_rows(rows) == 0
+    snap = engine.snapshot()
+    expected = 1.0 * 1800 * btc_per_th_second(1e14, 3.125)
+    assert snap["miners"]["A"]["total"]["revenue_btc"] == pytest.approx(expected)
+    assert snap["fleet"]["total"]["revenue_btc"] == pytest.approx(3 * expected)
+    assert snap["fleet"]["rate"]["revenue_usd_hour"] == pytest.approx(3 * 3600 * btc_per_th_second(1e14, 3.125) * 60000)
+
+
+def test_gaps_are_not_integrated():
+    engine = ProfitabilityEngine(hashprice=1.0, max_gap_seconds=120)
+    engine.observe_rows(_rows("A", [0, 1, 30, 31]))
+    assert engine.snapshot()["miners"]["A"]["total"]["hours"] == pytest.approx(2 / 60, abs=1e-3)
+
+
+def test_revenue_logged_before_the_first_price_is_valued_later():
+    prices = PriceHistory()
+    engine = ProfitabilityEngine(prices=prices, difficulty=1e14, block_reward=3.125, hashprice=None)
+    engine.observe_rows(_rows("A", range(0, 61), hashrate=1000.0))
+    assert engine.snapshot()["miners"]["A"]["total"]["revenue_usd"] == 0.0
+    prices.record(60000.0, ts=START.timestamp() + 7200)
+    engine.observe_rows(_rows("A", range(61, 62), hashrate=1000.0))
+    expected = 1000.0 * 3660 * btc_per_th_second(1e14, 3.125) * 60000
+    snap = engine.snapshot()
+    assert snap["miners"]["A"]["total"]["revenue_usd"] == pytest.approx(expected, abs=1e-4)
+    assert snap["fleet"]["total"]["revenue_usd"] == pytest.approx(expected, abs=1e-4)
+
+
+def test_rigs_that_stop_reporting_leave_the_fleet_rate():
+    engine = ProfitabilityEngine(hashprice=1.0, max_gap_seconds=120)
+    engine.observe_rows(_rows("A", range(0, 31)) + _rows("gone", range(0, 11), hashrate=5.0))
+    snap = engine.snapshot()
+    assert set(snap["miners"]) == {"A"}
+    assert snap["fleet"]["rate"]["hashrate_ths"] == 1.0
+    assert snap["fleet"]["total"]["hours"] == pytest.approx(40 / 60, abs=1e-3)  # its revenue is still counted
+    assert engine.observe_rows(_rows("gone", range(0, 11))) == 0  # not re-integrated from the log
+    engine.observe_rows(_rows("A", range(31, 42)) + _rows("gone", range(40, 42), hashrate=5.0))  # back again
+    assert engine.snapshot()["fleet"]["rate"]["hashrate_ths"] == 6.0
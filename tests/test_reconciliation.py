@@ -0,0 +1,29 @@
+from reconciliation import ReconciliationEngine
+
+
+def _ts(minute):
+    return f"2024-05-01T00:{minute:02d}:00+00:00"
+
+
+def test_buckets_align_local_and_pool_and_flag_low_credit():
+    engine = ReconciliationEngine(bucket_seconds=300, window=3)
+    local = [{"timestamp": _ts(m), "name": "A", "hashrate_1m": 1.0} for m in range(0, 30)]
+    pool = [{"timestamp": _ts(m), "name": "A", "pool_hashrate": 0.8} for m in range(0, 30, 5)]
+    engine.observe_local(local)
+    engine.observe_pool(pool)
+
+    series = engine.series("A")
+    assert len(series) == 6
+    assert series[0]["local"] == 1.0 and series[0]["pool"] == 0.8
+    rolling = engine.rolling("A")
+    assert rolling["buckets"] == 3
+    assert round(rolling["discrepancy_pct"], 6) == 20.0
+    assert rolling["status"] == "pool_low"
+
+
+def test_observe_is_incremental():
+    engine = ReconciliationEngine(bucket_seconds=300)
+    rows = [{"timestamp": _ts(1), "name": "A", "hashrate_1m": 1.0}]
+    assert engine.observe_local(rows) == 1
+    assert engine.observe_local(rows) == 0
+    assert engine.rolling("A")["status"] == "unknown"
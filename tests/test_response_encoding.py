@@ -0,0 +1,144 @@
+import gzip
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+import response_encoding
+from response_encoding import (
+    COLUMNAR_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    EncodedPayload,
+    choose_encoding,
+    choose_format,
+    columnar_fleet,
+    columnar_history,
+    dumps,
+    fleet_from_columns,
+    json_response,
+    packb,
+    rows_from_columns,
+    telemetry_response,
+)
+
+
+def _fleet(count):
+    return {
+        f"rig-{i:03d}": {"hashrate_1m": 1.2 + i / 1000, "temp": 55.0, "alive": True, "status": "✅ OK"}
+        for i in range(count)
+    }
+
+
+def test_stdlib_fallback_matches_orjson_output(monkeypatch):
+    payload = {"fleet": _fleet(3), "timestamp": 1717000000.5, "tags": ("a", "b")}
+    fast = dumps(payload)
+    monkeypatch.setattr(response_encoding, "orjson", None)
+    assert json.loads(dumps(payload)) == json.loads(fast)
+    assert b": " not in dumps(payload)  # compact separators
+
+
+def test_choose_encoding_honours_q_values(monkeypatch):
+    monkeypatch.setattr(response_encoding, "brotli", None)
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("*") == "gzip"
+    assert choose_encoding(None) is None
+    monkeypatch.setattr(response_encoding, "brotli", object())
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0.5") == "gzip"
+
+
+def test_encoded_payload_compresses_once_above_threshold(monkeypatch):
+    calls = []
+    real = response_encoding.compress
+    monkeypatch.setattr(response_encoding, "compress", lambda body, enc: calls.append(enc) or real(body, enc))
+    payload = EncodedPayload(_fleet(50), min_bytes=256)
+    body, encoding = payload.body("gzip")
+    assert encoding == "gzip" and json.loads(gzip.decompress(body)) == _fleet(50)
+    assert payload.body("gzip") == (body, "gzip") and calls == ["gzip"]
+
+    small = EncodedPayload({"ok": True}, min_bytes=256)
+    assert small.body("gzip") == (b'{"ok":true}', None)
+
+
+@pytest.mark.anyio
+async def test_json_response_negotiates_compression():
+    app = FastAPI()
+
+    @app.get("/fleet")
+    async def fleet(request: Request, count: int = 100):
+        return json_response(request, _fleet(count))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        large = await client.get("/fleet", headers={"Accept-Encoding": "gzip"})
+        identity = await client.get("/fleet", headers={"Accept-Encoding": "identity"})
+        small = await client.get("/fleet", params={"count": 1}, headers={"Accept-Encoding": "gzip"})
+
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert int(large.headers["content-length"]) < len(identity.content)
+    assert large.json() == identity.json() == _fleet(100)
+    assert "content-encoding" not in identity.headers
+    assert "content-encoding" not in small.headers
+
+
+def test_pure_python_msgpack_encoder(monkeypatch):
+    library = response_encoding.msgpack
+    monkeypatch.setattr(response_encoding, "msgpack", None)
+    assert packb({"a": [1, -1, -200, 300, 1.5, None, True, "x"]}) == (
+        b"\x81\xa1a\x98\x01\xff\xd1\xff\x38\xcd\x01\x2c"
+        b"\xcb\x3f\xf8\x00\x00\x00\x00\x00\x00\xc0\xc3\xa1x"
+    )
+    payload = {"fleet": _fleet(20), "asicTemps": [61.5] * 40, "label": "y" * 300}
+    if library is None:
+        pytest.skip("msgpack not installed; cannot cross-check")
+    assert packb(payload) == library.packb(payload, use_bin_type=True)
+
+
+def test_columnar_round_trips():
+    fleet = {**_fleet(3), "rig-off": {"alive": False}}
+    block = columnar_fleet(fleet)
+    assert block["index"] == list(fleet) and block["length"] == 4
+    assert block["columns"]["temp"] == [55.0, 55.0, 55.0, None]
+    assert fleet_from_columns(block) == fleet
+
+    history = {"success": True, "samples": 2, "data": [{"name": "a", "temp": 50.0}, {"name": "b"}]}
+    encoded = columnar_history(history)
+    assert encoded["samples"] == 2 and encoded["data"]["columns"]["name"] == ["a", "b"]
+    assert rows_from_columns(encoded["data"]) == history["data"]
+
+
+def test_choose_format_negotiates_accept():
+    assert choose_format(None) == "json"
+    assert choose_format("text/html, */*") == "json"
+    assert choose_format(MSGPACK_MEDIA_TYPE) == "msgpack"
+    assert choose_format("application/x-msgpack;q=0.5, application/json") == "json"
+    assert choose_format(f"{COLUMNAR_MEDIA_TYPE}, application/json;q=0.9") == "columnar"
+    assert choose_format(COLUMNAR_MEDIA_TYPE, offered=("json", "msgpack")) == "json"
+
+
+@pytest.mark.anyio
+async def test_telemetry_response_serves_each_format():
+    app = FastAPI()
+    fleet = _fleet(30)
+
+    @app.get("/miner-data")
+    async def miner_data(request: Request):
+        return telemetry_response(request, EncodedPayload(fleet, columnar=columnar_fleet))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        plain = await client.get("/miner-data")
+        columnar = await client.get("/miner-data", headers={"Accept": COLUMNAR_MEDIA_TYPE})
+        binary = await client.get("/miner-data", headers={"Accept": MSGPACK_MEDIA_TYPE, "Accept-Encoding": "identity"})
+
+    assert plain.headers["content-type"] == "application/json"
+    assert plain.json() == fleet
+    assert columnar.headers["content-type"] == COLUMNAR_MEDIA_TYPE
+    assert fleet_from_columns(columnar.json()) == fleet
+    assert binary.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert binary.content == packb(fleet)
+    assert len(binary.content) < len(plain.content)
+    assert binary.headers["vary"] == "Accept, Accept-Encoding"
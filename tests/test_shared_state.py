@@ -0,0 +1,178 @@
+import httpx
+import pytest
+
+import ingest
+import main
+from ingest import IngestStore, encode_batch
+from shared_state import Leadership, SharedState
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two handles on one database, standing in for two uvicorn workers."""
+    path = tmp_path / "fleet_state.db"
+    a, b = SharedState(path, owner="worker-a"), SharedState(path, owner="worker-b")
+    yield a, b
+    a.close()
+    b.close()
+
+
+def test_one_leader_until_the_lease_lapses(workers):
+    a, b = workers
+    assert a.try_lead(ttl=30, now=1000)
+    assert not b.try_lead(ttl=30, now=1010)
+    assert a.try_lead(ttl=30, now=1020)  # renewal
+    assert not b.try_lead(ttl=30, now=1049)
+    assert b.try_lead(ttl=30, now=1051)  # a stopped renewing
+    assert not a.try_lead(ttl=30, now=1052)
+    b.release()
+    assert a.try_lead(ttl=30, now=1053)
+
+
+def test_snapshot_is_shared_versioned_and_monotonic(workers):
+    a, b = workers
+    assert b.snapshot() is None
+    assert a.publish("fleet", {"rig": {"temp": 60.0}}, source_ts=100.0)
+    first = b.snapshot()
+    assert first == {"rig": {"temp": 60.0}}
+    with b._lock:  # a write in progress does not hold up reads
+        assert b.snapshot() is first  # unchanged version: cached object, no decode
+    assert b.versioned_snapshot(max_age=30) is not None
+    assert b.versioned_snapshot(max_age=-1) is None  # too old: callers fall back
+    assert not b.publish("fleet", {"rig": {"temp": 1.0}}, source_ts=99.0)  # older source
+    assert a.publish("fleet", {"rig": {"temp": 61.0}}, source_ts=101.0)
+    assert b.snapshot() == {"rig": {"temp": 61.0}}
+
+
+def test_registry_changes_reach_every_worker(workers):
+    a, b = workers
+    assert a.seed_registry({"A": "10.0.0.1"}, file_version=5)
+    assert not b.seed_registry({"A": "10.0.0.1"}, file_version=5)  # already seeded
+    assert b.registry()[1] == {"A": "10.0.0.1"}
+    assert b.add_miner("B", "10.0.0.2")
+    assert not a.add_miner("B", "10.0.0.9")
+    version, miners = a.registry()
+    assert miners == {"A": "10.0.0.1", "B": "10.0.0.2"}
+    a.publish("fleet", {"A": {"alive": True}, "B": {"alive": True}})
+    assert a.remove_miner("A") and not b.remove_miner("A")
+    assert b.snapshot() == {"B": {"alive": True}}  # deleted miners leave the served snapshot at once
+    assert b.registry()[0] > version and b.registry()[1] == {"B": "10.0.0.2"}
+    assert a.seed_registry({"C": "10.0.0.3"}, file_version=6)  # config file edited by hand
+    assert b.registry()[1] == {"C": "10.0.0.3"}
+
+
+@pytest.mark.anyio
+async def test_leadership_hands_over(workers):
+    a, b = workers
+    events = []
+
+    def callbacks(tag):
+        async def elected():
+            events.append((tag, "elected"))
+
+        async def tick():
+            events.append((tag, "tick"))
+
+        async def demoted():
+            events.append((tag, "demoted"))
+
+        return elected, tick, demoted
+
+    leader_a, leader_b = Leadership(a, interval=1, ttl=30), Leadership(b, interval=1, ttl=30)
+    await leader_a.step(*callbacks("a"))
+    await leader_b.step(*callbacks("b"))
+    await leader_a.step(*callbacks("a"))
+    assert events == [("a", "elected"), ("a", "tick"), ("a", "tick")]
+    assert leader_a.is_leader and not leader_b.is_leader
+
+    await leader_a.aclose()  # releases the lease on shutdown
+    await leader_b.step(*callbacks("b"))
+    assert leader_b.is_leader and events[-2:] == [("b", "elected"), ("b", "tick")]
+
+
+@pytest.mark.anyio
+async def test_add_miner_on_one_worker_is_seen_by_another(workers, tmp_path, monkeypatch):
+    a, b = workers
+    a.seed_registry({"A": "192.168.1.10"}, file_version=0)
+    monkeypatch.setattr(main, "SHARED_STATE", a)
+    monkeypatch.setattr(main, "CONFIG_FILE", tmp_path / "miners_config.json")
+    monkeypatch.setattr(main, "MINERS", {})
+    monkeypatch.setattr(main, "_registry_seen", {"version": None})
+    monkeypatch.setattr(main, "is_authenticated", lambda request: True)
+    transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 5000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://dashboard.local") as client:
+        added = await client.post("/add-miner", json={"name": "B", "ip": "192.168.1.11"})
+        again = await client.post("/add-miner", json={"name": "A", "ip": "192.168.1.12"})
+
+    assert added.json()["success"] and again.status_code == 400
+    assert b.registry()[1] == {"A": "192.168.1.10", "B": "192.168.1.11"}
+    assert main.MINERS == {"A": "192.168.1.10", "B": "192.168.1.11"}
+    # The config file was rewritten from the registry and is not re-seeded from.
+    assert not b.seed_registry({}, main.config_file_version())
+
+
+@pytest.mark.anyio
+async def test_pushes_are_logged_once_by_the_leader(workers, monkeypatch):
+    a, b = workers
+    recorded = []
+
+    class Recorder:
+        async def record_many(self, samples):
+            recorded.extend(sample["last_updated"] for sample in samples)
+
+    samples = [
+        {"last_updated": f"2026-01-01T00:0{minute}:00Z", "miners": {"rig": {"alive": True}}} for minute in range(3)
+    ]
+    monkeypatch.setattr(ingest, "INGEST_TOKEN", "s3cret")
+    monkeypatch.setattr(main, "CLOUD_MODE", True)
+    monkeypatch.setattr(main, "CLOUD_HISTORY", Recorder())
+    for worker in (a, b, a):  # the spool retries the batch, landing on another worker
+        monkeypatch.setattr(main, "SHARED_STATE", worker)
+        monkeypatch.setattr(main, "INGEST_STORE", IngestStore())
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://dashboard.local") as client:
+            response = await client.post(
+                "/ingest", content=encode_batch(samples), headers={"Authorization": "Bearer s3cret", "Content-Encoding": "gzip"}
+            )
+        assert response.json()["success"]
+    assert recorded == []  # request handlers never write the log
+
+    await main.poll_fleet()  # leader tick on worker a
+    await main.poll_fleet()
+    assert recorded == [sample["last_updated"] for sample in samples]
+    assert b.ingested() == []
+    assert b.snapshot() == {"rig": {"alive": True}}
+
+
+@pytest.mark.anyio
+async def test_pushes_leave_the_local_leaders_snapshot_alone(workers, monkeypatch):
+    a, b = workers
+    a.publish("fleet", {"lan-rig": {"alive": True}}, source_ts=100.0)  # leader's LAN poll
+    samples = [{"last_updated": "2026-01-01T00:00:00Z", "miners": {"pushed": {"alive": True}}}]
+    monkeypatch.setattr(ingest, "INGEST_TOKEN", "s3cret")
+    monkeypatch.setattr(main, "CLOUD_MODE", False)
+    monkeypatch.setattr(main, "SHARED_STATE", b)
+    monkeypatch.setattr(main, "INGEST_STORE", IngestStore())
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://dashboard.local") as client:
+        response = await client.post(
+            "/ingest", content=encode_batch(samples), headers={"Authorization": "Bearer s3cret", "Content-Encoding": "gzip"}
+        )
+    assert response.json()["accepted"] == 1
+    assert a.snapshot() == {"lan-rig": {"alive": True}}
+    assert b.ingested() == []  # nothing queued for the metric log either
+
+
+def test_shared_state_defaults_on_only_for_several_workers(monkeypatch):
+    monkeypatch.delenv("SHARED_STATE", raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert not main.shared_state_enabled()
+    for workers, expected in (("1", False), ("4", True), ("many", False)):
+        monkeypatch.setenv("WEB_CONCURRENCY", workers)
+        assert main.shared_state_enabled() is expected
+    monkeypatch.setenv("SHARED_STATE", "true")  # explicit opt-in, e.g. uvicorn --workers N
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert main.shared_state_enabled()
+    monkeypatch.setenv("SHARED_STATE", "false")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert not main.shared_state_enabled()
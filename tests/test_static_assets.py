@@ -0,0 +1,81 @@
+import gzip
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from static_assets import IMMUTABLE_CACHE, PrecompressedStaticFiles, StaticAssets, build_assets
+
+
+@pytest.fixture
+def source(tmp_path):
+    (tmp_path / "img").mkdir()
+    (tmp_path / "app.js").write_text("console.log('hashlab');\n" * 100)
+    (tmp_path / "img" / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+    return tmp_path
+
+
+def test_build_assets_fingerprints_and_precompresses(source):
+    manifest = build_assets(source)
+    js = manifest["app.js"]
+    assert js.startswith("dist/app.") and js.endswith(".js")
+    assert manifest["img/logo.png"].startswith("dist/img/logo.")
+    assert gzip.decompress((source / (js + ".gz")).read_bytes()) == (source / "app.js").read_bytes()
+    assert not (source / (manifest["img/logo.png"] + ".gz")).exists()  # binary: not compressed
+    assert json.loads((source / "dist" / "manifest.json").read_text()) == manifest
+
+    # Idempotent, and an edit produces a new name while the old build files are removed.
+    assert build_assets(source) == manifest
+    (source / "app.js").write_text("console.log('v2');\n" * 100)
+    updated = build_assets(source)
+    assert updated["app.js"] != js
+    assert not (source / js).exists() and not (source / (js + ".gz")).exists()
+
+
+def test_static_url_uses_manifest_only_when_enabled(source):
+    enabled = StaticAssets(source, enabled=True)
+    enabled.load()
+    assert enabled.url("app.js") == "/static/" + enabled.manifest["app.js"]
+    assert enabled.url("missing.css") == "/static/missing.css"
+
+    disabled = StaticAssets(source, enabled=False)
+    disabled.load()
+    assert disabled.url("app.js") == "/static/app.js"
+
+
+@pytest.mark.anyio
+async def test_precompressed_static_files_serve_immutable_variants(source):
+    manifest = build_assets(source)
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=source, cache_control="public, max-age=60"))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        hashed = await client.get("/static/" + manifest["app.js"], headers={"Accept-Encoding": "gzip, deflate"})
+        plain = await client.get("/static/" + manifest["app.js"], headers={"Accept-Encoding": "identity"})
+        original = await client.get("/static/app.js")
+
+    assert hashed.headers["content-encoding"] == "gzip"
+    assert hashed.headers["content-type"].startswith(("text/javascript", "application/javascript"))
+    assert hashed.headers["cache-control"] == IMMUTABLE_CACHE
+    assert hashed.headers["vary"] == "Accept-Encoding"
+    assert hashed.text == (source / "app.js").read_text()
+
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["cache-control"] == IMMUTABLE_CACHE
+    assert original.headers["cache-control"] == "public, max-age=60"
+
+
+def test_startup_reads_the_manifest_and_never_prunes(source):
+    manifest = build_assets(source)
+    (source / "app.js").write_text("console.log('v2');\n" * 100)  # edited, not rebuilt
+    assets = StaticAssets(source, enabled=True)
+    assets.load()
+    assert assets.manifest == manifest  # what the other workers serve
+    assert (source / manifest["app.js"]).exists()
+
+    (source / "dist" / "manifest.json").unlink()
+    assets.load()  # no manifest: build, keeping the old build files
+    assert assets.manifest["app.js"] != manifest["app.js"]
+    assert (source / manifest["app.js"]).exists()
+    assert json.loads((source / "dist" / "manifest.json").read_text()) == assets.manifest
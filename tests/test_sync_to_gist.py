@@ -0,0 +1,73 @@
+import json
+
+import sync_to_gist
+from sync_to_gist import ChangeDetector, content_hash, encode_gist_body, meaningful_change, record_cycle
+
+
+def _fleet(**overrides):
+    miner = {
+        "name": "bitaxe-1",
+        "hashrate_1m": 1.2,
+        "temp": 55.0,
+        "power": 15.0,
+        "asicTemps": [60.0, 61.0],
+        "uptime": 1000,
+        "sharesAccepted": 500,
+        "status": "✅ OK",
+        "alive": True,
+    }
+    miner.update(overrides)
+    return {"bitaxe-1": miner}
+
+
+def test_content_hash_is_canonical_and_ignores_counters():
+    a = _fleet()
+    b = {"bitaxe-1": dict(reversed(list(a["bitaxe-1"].items())))}
+    b["bitaxe-1"]["uptime"] = 1060
+    b["bitaxe-1"]["sharesAccepted"] = 512
+    assert content_hash(a) == content_hash(b)
+    assert content_hash(a) != content_hash(_fleet(status="⚠️ OVERHEATING"))
+
+
+def test_meaningful_change_respects_tolerances():
+    base = _fleet()
+    assert meaningful_change(base, _fleet(temp=55.8)) is None
+    assert meaningful_change(base, _fleet(hashrate_1m=1.205)) is None
+    assert "temp" in meaningful_change(base, _fleet(temp=57.5))
+    assert "asicTemps" in meaningful_change(base, _fleet(asicTemps=[60.0, 64.0]))
+    assert "alive" in meaningful_change(base, _fleet(alive=False))
+    assert meaningful_change(base, {}) == "miner set changed"
+    assert meaningful_change(base, _fleet(temp=57.5), tolerances={"temp": 5}) is None
+
+
+def test_detector_skips_until_change_or_heartbeat():
+    detector = ChangeDetector(heartbeat=600)
+    assert detector.check(_fleet(), now=0) == (True, "first upload")
+    detector.mark_uploaded(_fleet(), now=0)
+
+    assert detector.check(_fleet(temp=55.5, uptime=1060), now=60)[0] is False
+    # Drift is measured against the last upload, so it accumulates.
+    assert detector.check(_fleet(temp=56.5), now=120)[0] is True
+    assert detector.check(_fleet(), now=600) == (True, "heartbeat")
+
+
+def test_gist_body_is_compact_and_cycles_are_recorded(monkeypatch):
+    payload = sync_to_gist.build_payload(_fleet())
+    body = encode_gist_body(payload)
+    content = json.loads(body)["files"][sync_to_gist.GIST_FILENAME]["content"]
+    assert json.loads(content)["miners"] == _fleet()
+    assert ": " not in content and "\n" not in content
+    assert len(body) < len(json.dumps(payload, indent=2))
+
+    monkeypatch.setitem(sync_to_gist.SYNC_STATS, "cycles", 0)
+    monkeypatch.setitem(sync_to_gist.SYNC_STATS, "uploads", 0)
+    monkeypatch.setitem(sync_to_gist.SYNC_STATS, "skipped", 0)
+    monkeypatch.setitem(sync_to_gist.SYNC_STATS, "failed", 0)
+    monkeypatch.setitem(sync_to_gist.SYNC_STATS, "bytes_sent", 0)
+    record_cycle(len(body), "uploaded")
+    record_cycle(0, "skipped")
+    record_cycle(0, "failed")
+    stats = sync_to_gist.SYNC_STATS
+    assert (stats["cycles"], stats["uploads"], stats["skipped"], stats["failed"]) == (3, 1, 1, 1)
+    assert stats["bytes_sent"] == len(body)
+    assert list(stats["cycle_bytes"])[-3:] == [len(body), 0, 0]
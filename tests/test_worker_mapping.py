@@ -0,0 +1,60 @@
+import json
+import logging
+import os
+
+from worker_mapping import WorkerMappingRegistry
+
+
+def test_mapping_reloads_only_when_file_changes(tmp_path):
+    path = tmp_path / "mapping.json"
+    path.write_text(json.dumps({"A": "bg02a"}))
+    registry = WorkerMappingRegistry(path, check_interval=0)
+    assert registry.miner_for("bg02a") == "A"
+    assert registry.worker_for("A") == "bg02a"
+
+    path.write_text(json.dumps({"A": "bg02a", "B": "bg02b"}))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert registry.miner_for("bg02b") == "B"
+
+    path.write_text("{not json")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000))
+    assert registry.miner_for("bg02b") == "B"  # a broken file keeps the last good mapping
+
+
+def test_file_is_checked_at_most_once_per_interval(tmp_path, monkeypatch):
+    path = tmp_path / "mapping.json"
+    path.write_text(json.dumps({"A": "bg02a"}))
+    registry = WorkerMappingRegistry(path, check_interval=60)
+    stats = []
+    real_stat = type(path).stat
+
+    def counting_stat(self, *args, **kwargs):
+        stats.append(self)
+        return real_stat(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(path), "stat", counting_stat)
+    assert registry.reverse() == {"bg02a": "A"}
+    for worker in ("bg02a", "bg02b") * 500:
+        registry.miner_for(worker)
+    assert len(stats) == 1
+
+
+def test_unmapped_warnings_are_rate_limited(tmp_path, caplog):
+    registry = WorkerMappingRegistry(tmp_path / "missing.json", warn_interval=600)
+    with caplog.at_level(logging.WARNING, logger="worker_mapping"):
+        for _ in range(5):
+            registry.note_unmapped(["bg02c", "bg02d"])
+        registry.note_unmapped(["bg02e"])
+    assert len(caplog.records) == 2
+    assert registry.unmapped() == ["bg02c", "bg02d", "bg02e"]
+
+
+def test_name_suggestions(tmp_path):
+    path = tmp_path / "mapping.json"
+    path.write_text(json.dumps({"A": "bg02a"}))
+    registry = WorkerMappingRegistry(path)
+    suggestions = registry.suggestions(["A", "C", "H-nerd"], ["bg02c", "acct.hnerd", "zzz"])
+    assert suggestions["bg02c"]["miner"] == "C"
+    assert suggestions["acct.hnerd"]["miner"] == "H-nerd"
+    assert "zzz" not in suggestions
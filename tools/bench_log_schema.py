@@ -0,0 +1,66 @@
+"""Measure per-sample CSV storage cost of each metric log schema.
+
+Usage:
+    python tools/bench_log_schema.py --miners 8
+
+Builds a synthetic fleet shaped like ``miner_api.fetch_miner_stats`` output
+and reports bytes per logged row for every schema in ``data_logger.SCHEMAS``.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_logger import measure_storage_overhead  # noqa: E402
+
+
+def synthetic_fleet(count: int, offline_ratio: float = 0.1) -> dict:
+    rng = random.Random(42)
+    fleet = {}
+    for idx in range(count):
+        name = f"miner-{idx:03d}"
+        if rng.random() < offline_ratio:
+            fleet[name] = {"name": name, "alive": False}
+            continue
+        hashrate = rng.uniform(0.9, 1.3) if idx % 2 else rng.uniform(4.5, 6.5)
+        power = hashrate * rng.uniform(15, 24)
+        asics = 1 if idx % 2 else 4
+        fleet[name] = {
+            "name": name,
+            "hashrate_1m": hashrate,
+            "hashrate_24h": hashrate * rng.uniform(0.97, 1.02),
+            "power": round(power, 2),
+            "efficiency": power / hashrate,
+            "temp": round(rng.uniform(45, 70), 1),
+            "chipTemp": round(rng.uniform(50, 75), 1),
+            "sharesAccepted": rng.randint(1_000, 90_000),
+            "sharesRejected": rng.randint(0, 200),
+            "alive": True,
+            "frequency": rng.choice([490, 525, 550, 575, 600]),
+            "voltage": rng.choice([1150, 1166, 1200, 1250]),
+            "fanrpm": rng.randint(2800, 6200),
+            "asicTemps": [round(rng.uniform(50, 75), 2) for _ in range(asics)],
+            "wifiRSSI": rng.randint(-80, -40),
+            "bestDiff": f"{rng.uniform(1, 999):.2f}M",
+            "poolDifficulty": rng.choice([1024, 2048, 4096]),
+        }
+    return fleet
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure metric log storage per sample.')
+    parser.add_argument('--miners', type=int, default=8, help='Fleet size to simulate')
+    args = parser.parse_args()
+    results = measure_storage_overhead(synthetic_fleet(args.miners))
+    baseline = results['v1']['bytes_per_sample']
+    for version, stats in results.items():
+        delta = stats['bytes_per_sample'] - baseline
+        print(
+            f"{version}: {stats['columns']:2d} columns, "
+            f"{stats['bytes_per_sample']:.1f} B/sample ({delta:+.1f} B vs v1), "
+            f"{stats['bytes_total']} B for {args.miners} miners"
+        )
@@ -0,0 +1,89 @@
+"""Benchmark request throughput through the dashboard's middleware stack.
+
+Usage:
+    python tools/bench_middleware.py --requests 3000 --concurrency 32
+
+Builds a small app with the same middleware order as ``main.app``
+(session, cache-control, LAN-only) around a ``/static`` file mount and a
+JSON route returning a 100-miner snapshot, then drives it in-process over
+``httpx.ASGITransport`` from a LAN client address. In-process numbers
+exclude socket and server overhead, so they isolate what the middleware
+itself costs per request.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+os.environ.setdefault("LAN_ONLY_MODE", "true")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.staticfiles import StaticFiles  # noqa: E402
+
+import main  # noqa: E402
+
+
+def fleet(miners: int = 100) -> dict:
+    return {
+        f"rig-{i:03d}": {
+            "name": f"rig-{i:03d}", "type": "BG02", "hashrate_1m": 1.2 + i / 1000,
+            "hashrate_24h": 1.19, "efficiency": 15.2, "temp": 55.0, "chipTemp": 61.5,
+            "power": 18.4, "sharesAccepted": 12000 + i, "sharesRejected": 3,
+            "asicCount": 1, "asicTemps": [61.5], "uptime": 86400, "alive": True,
+            "status": "✅ OK", "ip": f"192.168.1.{i % 250}",
+        }
+        for i in range(miners)
+    }
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    snapshot = fleet()
+
+    @app.get("/api/fleet")
+    async def fleet_route():
+        return JSONResponse(snapshot)
+
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+    app.user_middleware = list(main.app.user_middleware)
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> float:
+    queue = iter(range(total))
+
+    async def worker() -> None:
+        for _ in queue:
+            response = await client.get(path)
+            assert response.status_code == 200, response.status_code
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (perf_counter() - started)
+
+
+async def run(total: int, concurrency: int, rounds: int) -> None:
+    transport = httpx.ASGITransport(app=build_app(), client=("192.168.1.50", 51000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://dashboard.local") as client:
+        for label, path in (("static", "/static/dashboard.js"), ("json", "/api/fleet")):
+            await measure(client, path, min(total, 200), concurrency)  # warm up
+            best = max([await measure(client, path, total, concurrency) for _ in range(rounds)])
+            print(f"{label:>6} {path:<22} {best:8.0f} req/s (best of {rounds}, {total} requests, concurrency {concurrency})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the middleware stack.")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.rounds))
@@ -0,0 +1,66 @@
+"""Benchmark the fleet power-budget optimizer on a synthetic fleet.
+
+Usage:
+    python tools/bench_power_budget.py --miners 500 --points 25
+
+Each rig gets a convex-ish efficiency curve (static + f*V^2 power, linear
+hashrate) sampled at ``--points`` frequencies, and the optimizer is solved
+for budgets at 40/70/100% of the fleet's maximum draw.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from power_budget import optimize_power_budget  # noqa: E402
+
+
+def synthetic_curves(miners: int, points: int) -> dict:
+    rng = random.Random(7)
+    curves = {}
+    for idx in range(miners):
+        static = rng.uniform(3, 14)
+        scale = rng.uniform(0.016, 0.024)
+        th_per_mhz = rng.uniform(0.0018, 0.0024) * (4 if idx % 3 == 0 else 1)
+        f_lo, f_hi = rng.choice([(400, 600), (450, 650), (485, 625)])
+        curve = []
+        for step in range(points):
+            freq = f_lo + (f_hi - f_lo) * step / (points - 1)
+            volts = 0.6 + 0.0012 * freq
+            curve.append({
+                "frequency_mhz": freq,
+                "voltage_mv": volts * 1000,
+                "hashrate_ths": th_per_mhz * freq,
+                "power_w": static + scale * freq * volts * volts * (4 if idx % 3 == 0 else 1),
+            })
+        curves[f"rig-{idx:04d}"] = curve
+    return curves
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark optimize_power_budget.')
+    parser.add_argument('--miners', type=int, default=500)
+    parser.add_argument('--points', type=int, default=25)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    curves = synthetic_curves(args.miners, args.points)
+    max_draw = sum(max(p["power_w"] for p in c) for c in curves.values())
+    for fraction in (0.4, 0.7, 1.0):
+        budget = max_draw * fraction
+        timings = []
+        for _ in range(args.repeat):
+            started = perf_counter()
+            plan = optimize_power_budget(budget, curves)
+            timings.append((perf_counter() - started) * 1000)
+        print(
+            f"{args.miners} rigs x {args.points} pts, budget {budget:,.0f} W ({fraction:.0%}): "
+            f"median {median(timings):.2f} ms, max {max(timings):.2f} ms -> "
+            f"{plan['total_hashrate_ths']:.1f} TH/s at {plan['total_power_w']:,.0f} W"
+        )
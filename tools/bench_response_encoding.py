@@ -0,0 +1,112 @@
+"""Measure payload size and encode time of the large JSON responses.
+
+Usage:
+    python tools/bench_response_encoding.py --miners 100 --rows 2000
+
+Builds a synthetic ``/miner-data`` snapshot for ``--miners`` miners and a
+``/historical-metrics`` payload of ``--rows`` log rows, then reports the
+body size and median encode time (serialise + compress) for each JSON
+encoder available (stdlib, orjson) and each content coding (identity, gzip,
+and br when the ``brotli`` package is installed), then the same for each
+``Accept``-negotiated wire format (JSON, columnar JSON, MessagePack).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import response_encoding  # noqa: E402
+
+
+def fleet(count: int) -> dict:
+    rng = random.Random(7)
+    miners = {}
+    for i in range(count):
+        chip = round(rng.uniform(55, 72), 2)
+        miners[f"rig-{i:03d}"] = {
+            "name": f"rig-{i:03d}", "type": "BG02" if i % 3 else "NerdQAxe++",
+            "hashrate_1m": round(rng.uniform(1.0, 6.5), 3), "hashrate_24h": round(rng.uniform(1.0, 6.5), 3),
+            "efficiency": round(rng.uniform(14, 24), 2), "temp": round(rng.uniform(45, 65), 2), "chipTemp": chip,
+            "power": round(rng.uniform(15, 90), 2), "sharesAccepted": rng.randint(1000, 90000),
+            "sharesRejected": rng.randint(0, 40), "frequency": 575, "voltage": 1200, "fanrpm": rng.randint(2000, 6000),
+            "asicCount": 4, "asicTemps": [round(chip + rng.uniform(-2, 2), 2) for _ in range(4)],
+            "wifiRSSI": rng.randint(-80, -40), "bestDiff": f"{rng.uniform(1, 900):.2f}M", "uptime": rng.randint(0, 10**6),
+            "alive": True, "status": "✅ OK", "ip": f"192.168.1.{i % 250}", "dashboard_url": f"http://192.168.1.{i % 250}/",
+        }
+    return miners
+
+
+def history(rows: int, miners: int) -> dict:
+    rng = random.Random(11)
+    data = []
+    for i in range(rows):
+        data.append({
+            "timestamp": f"2026-01-01T{(i // miners) // 60 % 24:02d}:{(i // miners) % 60:02d}:00Z", "name": f"rig-{i % miners:03d}",
+            "hashrate_1m": round(rng.uniform(1.0, 6.5), 3), "hashrate_24h": round(rng.uniform(1.0, 6.5), 3),
+            "power": round(rng.uniform(15, 90), 2), "efficiency": round(rng.uniform(14, 24), 2),
+            "temp": round(rng.uniform(45, 65), 2), "chipTemp": round(rng.uniform(55, 72), 2),
+            "sharesAccepted": rng.randint(1000, 90000), "sharesRejected": rng.randint(0, 40), "alive": True,
+            "frequency": 575.0, "voltage": 1200.0, "fanrpm": float(rng.randint(2000, 6000)),
+            "asicTemps": [round(rng.uniform(55, 72), 2) for _ in range(4)], "wifiRSSI": float(rng.randint(-80, -40)),
+            "bestDiff": round(rng.uniform(1e6, 9e8)), "poolDifficulty": 1000.0,
+        })
+    return {"success": True, "samples": rows, "limit": rows, "points": None, "data": data, "summary": {}}
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = perf_counter()
+        fn()
+        samples.append(perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def report(label: str, payload: dict, repeat: int, columnar) -> None:
+    encoders = {"stdlib": None}
+    if response_encoding.orjson is not None:
+        encoders["orjson"] = response_encoding.orjson
+    codings = [None, "gzip"] + (["br"] if response_encoding.brotli is not None else [])
+    # Starlette's JSONResponse renders compact, uncompressed stdlib JSON.
+    baseline = len(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+    print(f"\n{label} (JSONResponse body: {baseline:,} bytes)")
+    print(f"  {'encoder':<8} {'coding':<9} {'bytes':>10} {'ratio':>7} {'encode ms':>10}")
+    for name, module in encoders.items():
+        response_encoding.orjson = module
+        for coding in codings:
+            def encode():
+                body = response_encoding.dumps(payload)
+                return response_encoding.compress(body, coding) if coding else body
+            size = len(encode())
+            print(f"  {name:<8} {coding or 'identity':<9} {size:>10,} {size / baseline:>6.1%} {timed(encode, repeat):>10.2f}")
+    response_encoding.orjson = encoders.get("orjson")
+    packer = "msgpack" if response_encoding.msgpack is not None else "pure-Python"
+    print(f"  {'format':<8} {'coding':<9} {'bytes':>10} {'ratio':>7} {'encode ms':>10}   (msgpack: {packer})")
+    for fmt in response_encoding.TELEMETRY_FORMATS:
+        for coding in codings:
+            def encode():
+                return response_encoding.EncodedPayload(payload, min_bytes=0, columnar=columnar).body(coding, fmt)[0]
+            size = len(encode())
+            print(f"  {fmt:<8} {coding or 'identity':<9} {size:>10,} {size / baseline:>6.1%} {timed(encode, repeat):>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark JSON response encoding and compression.")
+    parser.add_argument("--miners", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=25)
+    args = parser.parse_args()
+    fast = response_encoding.orjson
+    report(f"/miner-data, {args.miners} miners", fleet(args.miners), args.repeat, response_encoding.columnar_fleet)
+    report(
+        f"/historical-metrics, {args.rows} rows", history(args.rows, args.miners), args.repeat,
+        response_encoding.columnar_history,
+    )
+    response_encoding.orjson = fast
@@ -0,0 +1,36 @@
+"""Build fingerprinted, precompressed static assets for production.
+
+Usage:
+    python tools/build_static.py [--source static]
+
+Writes ``static/dist/`` (hashed copies, ``.gz``/``.br`` variants and
+``manifest.json``) via ``static_assets.build_assets`` and removes build
+files from earlier runs. With ``STATIC_PIPELINE`` enabled the server only
+reads the manifest at startup, so rerun this after editing ``static/``.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from static_assets import BUILD_DIRNAME, brotli, build_assets  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static assets.")
+    parser.add_argument("--source", type=Path, default=ROOT / "static")
+    args = parser.parse_args()
+    manifest = build_assets(args.source)
+    out = args.source / BUILD_DIRNAME
+    variants = sum(1 for path in out.rglob("*") if path.suffix in (".gz", ".br"))
+    print(f"{len(manifest)} assets -> {out} ({variants} precompressed variants)")
+    if brotli is None:
+        print("brotli not installed: gzip variants only")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,13 @@ Auto-tuning helper utilities for miner recommendations.
 
 The logic intentionally mirrors the lightweight rules shared in the
 specification so GPT/Claude agents can consume the exact same schema.
+When an ``EfficiencyModelRegistry`` has a fitted curve for a miner, the
+recommendation is the model's predicted optimal operating point and the
+rules below are only used as a fallback.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 TEMP_HOT_C = 75
 TEMP_COOL_C = 60
@@ -21,15 +24,44 @@ def _coerce_float(value: Any, fallback: float = 0.0) -> float:
         return fallback
 
 
-def generate_tuning_recommendation(miner: Dict[str, Any]) -> Dict[str, Any]:
+def _describe_optimum(miner: Dict[str, Any], optimum: Dict[str, Any]) -> str:
+    frequency = _coerce_float(miner.get("frequency_mhz"))
+    target = optimum["frequency_mhz"]
+    if frequency and abs(target - frequency) < 5:
+        action = f"Hold frequency near {target:.0f}MHz"
+    elif frequency:
+        action = f"{'Raise' if target > frequency else 'Lower'} frequency to {target:.0f}MHz"
+    else:
+        action = f"Set frequency to {target:.0f}MHz"
+    return (
+        f"{action} at {optimum['voltage_mv']:.0f}mV "
+        f"(predicted {optimum['efficiency_w_th']:.1f} W/TH, {optimum['hashrate_ths']:.2f} TH/s)"
+    )
+
+
+def generate_tuning_recommendation(miner: Dict[str, Any], models: Optional[Any] = None) -> Dict[str, Any]:
     """
     Auto-tuning logic based on miner temperature and efficiency.
-    Compatible with GPT-style JSON inputs.
+    Compatible with GPT-style JSON inputs. ``models`` is an optional
+    ``EfficiencyModelRegistry``; its predicted optimum wins when available.
     """
     temp = _coerce_float(miner.get("temp_c"))
     efficiency = _coerce_float(miner.get("efficiency_w_th"))
     hashrate = _coerce_float(miner.get("hashrate_ths"))
 
+    optimum = models.optimal_point(miner.get("miner_id"), TEMP_HOT_C) if models else None
+    if optimum:
+        return {
+            "miner_id": miner.get("miner_id"),
+            "model": miner.get("model"),
+            "hashrate_ths": hashrate,
+            "temp_c": temp,
+            "efficiency_w_th": efficiency,
+            "source": "model",
+            "predicted_optimum": optimum,
+            "recommendation": _describe_optimum(miner, optimum)
+        }
+
     recommendations: List[str] = []
 
     # Temperature heuristics
@@ -51,13 +83,15 @@ def generate_tuning_recommendation(miner: Dict[str, Any]) -> Dict[str, Any]:
         "hashrate_ths": hashrate,
         "temp_c": temp,
         "efficiency_w_th": efficiency,
+        "source": "heuristic",
+        "predicted_optimum": None,
         "recommendation": "; ".join(recommendations) if recommendations else "No change needed"
     }
 
 
-def auto_tune_miners(miners: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def auto_tune_miners(miners: List[Dict[str, Any]], models: Optional[Any] = None) -> List[Dict[str, Any]]:
     """Processes a list of miner stats and returns tuning recommendations."""
-    return [generate_tuning_recommendation(miner) for miner in miners]
+    return [generate_tuning_recommendation(miner, models) for miner in miners]
 
 
 def stats_to_tuning_payload(stats: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -89,6 +123,7 @@ def stats_to_tuning_payload(stats: Dict[str, Dict[str, Any]]) -> List[Dict[str,
             "model": model,
             "hashrate_ths": hashrate,
             "temp_c": temp_c,
-            "efficiency_w_th": efficiency
+            "efficiency_w_th": efficiency,
+            "frequency_mhz": _coerce_float(miner.get("frequency_mhz")) or _coerce_float(miner.get("frequency"))
         })
     return payload
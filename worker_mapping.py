@@ -0,0 +1,156 @@
+"""
+Registry for ``pool_worker_mapping.json`` (local miner name -> pool worker).
+
+The file is parsed once and re-read only when its mtime/size changes (the
+``stat()`` itself runs at most once per ``WORKER_MAPPING_CHECK_INTERVAL``),
+and both directions are indexed. Workers the pool reports without a mapping
+are tracked and reported in one rate-limited summary line instead of one
+warning per worker per request, together with name-based suggestions for
+which local miner each one probably is.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from difflib import SequenceMatcher
+from pathlib import Path
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("worker_mapping")
+
+WORKER_MAPPING_FILE = Path(os.getenv("POOL_WORKER_MAPPING_FILE", "pool_worker_mapping.json"))
+UNMAPPED_WARN_INTERVAL = float(os.getenv("UNMAPPED_WARN_INTERVAL", "600"))
+WORKER_MAPPING_CHECK_INTERVAL = float(os.getenv("WORKER_MAPPING_CHECK_INTERVAL", "5"))
+SUGGESTION_MIN_SCORE = 0.6
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def name_score(worker: str, miner: str) -> float:
+    """Similarity in [0, 1] between a pool worker name and a local miner name."""
+    w, m = _normalize(worker), _normalize(miner)
+    if not w or not m:
+        return 0.0
+    if w == m:
+        return 1.0
+    # Workers are often "<account>.<rig>" or the rig name with a suffix.
+    tail = _normalize(str(worker).rsplit(".", 1)[-1])
+    if tail == m:
+        return 0.95
+    if w.endswith(m) or w.startswith(m) or m.endswith(w):
+        return 0.85
+    return SequenceMatcher(None, w, m).ratio()
+
+
+class WorkerMappingRegistry:
+    def __init__(
+        self,
+        path: Path = WORKER_MAPPING_FILE,
+        warn_interval: float = UNMAPPED_WARN_INTERVAL,
+        check_interval: float = WORKER_MAPPING_CHECK_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.warn_interval = warn_interval
+        self.check_interval = check_interval
+        self._checked: Optional[float] = None
+        self._version: Optional[Tuple[int, int]] = None
+        self._forward: Dict[str, str] = {}
+        self._reverse: Dict[str, str] = {}
+        self._unmapped: Dict[str, Dict[str, Any]] = {}
+        self._last_warning = 0.0
+        self._warned: set = set()
+
+    def _reload_if_changed(self) -> None:
+        now = monotonic()
+        if self._checked is not None and now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        try:
+            stat = self.path.stat()
+            version = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            version = None
+        if version == self._version:
+            return
+        self._version = version
+        if version is None:
+            self._forward, self._reverse = {}, {}
+            return
+        try:
+            with self.path.open("r") as handle:
+                mapping = json.load(handle)
+            if not isinstance(mapping, dict):
+                raise ValueError("expected an object of miner -> worker")
+        except Exception as exc:
+            # Keep the previous indexes; a half-written file should not unmap the fleet.
+            logger.warning("Failed to load pool worker mapping: %s", exc)
+            return
+        self._forward = {str(k): str(v) for k, v in mapping.items()}
+        self._reverse = {v: k for k, v in self._forward.items()}
+        # Previously unmapped workers may be covered now.
+        for worker in list(self._unmapped):
+            if worker in self._reverse:
+                del self._unmapped[worker]
+        logger.debug("Loaded pool worker mapping: %s", list(self._forward))
+
+    def forward(self) -> Dict[str, str]:
+        self._reload_if_changed()
+        return dict(self._forward)
+
+    def reverse(self) -> Dict[str, str]:
+        """Pool worker -> local miner, for resolving a whole batch with one check."""
+        self._reload_if_changed()
+        return self._reverse
+
+    def miner_for(self, worker: str) -> Optional[str]:
+        self._reload_if_changed()
+        return self._reverse.get(worker)
+
+    def worker_for(self, miner: str) -> Optional[str]:
+        self._reload_if_changed()
+        return self._forward.get(miner)
+
+    def note_unmapped(self, workers: Iterable[str]) -> None:
+        """Record workers seen without a mapping; logs one summary per interval."""
+        now = monotonic()
+        fresh = []
+        for worker in workers:
+            entry = self._unmapped.get(worker)
+            if entry is None:
+                entry = self._unmapped[worker] = {"first_seen": now, "count": 0}
+            entry["last_seen"] = now
+            entry["count"] += 1
+            if worker not in self._warned:
+                fresh.append(worker)
+        if not self._unmapped:
+            return
+        # New names are reported at once; known ones only as a periodic reminder.
+        if fresh or now - self._last_warning >= self.warn_interval:
+            names = sorted(self._unmapped)
+            logger.warning(
+                "%d pool worker(s) have no mapping in %s: %s",
+                len(names), self.path.name, ", ".join(names[:10]) + (" ..." if len(names) > 10 else ""),
+            )
+            self._last_warning = now
+            self._warned.update(fresh)
+
+    def unmapped(self) -> List[str]:
+        return sorted(self._unmapped)
+
+    def suggestions(self, local_names: Iterable[str], workers: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Best unmapped local miner for each unmapped worker, by name similarity."""
+        self._reload_if_changed()
+        candidates = [name for name in local_names if name not in self._forward]
+        out: Dict[str, Dict[str, Any]] = {}
+        for worker in (workers if workers is not None else self.unmapped()):
+            if worker in self._reverse:
+                continue
+            scored = sorted(((name_score(worker, name), name) for name in candidates), reverse=True)
+            if scored and scored[0][0] >= SUGGESTION_MIN_SCORE:
+                out[worker] = {"miner": scored[0][1], "score": round(scored[0][0], 3)}
+        return out